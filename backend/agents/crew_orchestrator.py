@@ -20,15 +20,18 @@ llm = LLM(
 # --- Import Agents & Tools ---
 from .crew_setup import (
     parser_agent,
-    scraper_orchestrator_agent,
     comparator_agent,
     formatter_agent,
-    web_scraper_tool
+    make_scraper_orchestrator_agent,
+    make_web_scraper_tool
 )
 
 def create_shopping_crew(user_prompt: str, num_products: int, scraping_session_id: str = None):
     """Create a shopping crew with 3 parameters"""
     
+    # The result cap and tracking session are bound into this crew's scraper tool
+    scraper_agent = make_scraper_orchestrator_agent(make_web_scraper_tool(num_products, scraping_session_id))
+    
     # Simple task setup
     parse_task = Task(
         description=f"Parse this product request: {user_prompt}",
@@ -37,8 +40,8 @@ def create_shopping_crew(user_prompt: str, num_products: int, scraping_session_i
     )
     
     scrape_task = Task(
-        description=f"Scrape {num_products} products using session {scraping_session_id}",
-        agent=scraper_orchestrator_agent,
+        description=f"Scrape {num_products} products",
+        agent=scraper_agent,
         context=[parse_task],
         expected_output="JSON array of product objects."
     )
@@ -58,7 +61,7 @@ def create_shopping_crew(user_prompt: str, num_products: int, scraping_session_i
     )
     
     crew = Crew(
-        agents=[parser_agent, scraper_orchestrator_agent, comparator_agent, formatter_agent],
+        agents=[parser_agent, scraper_agent, comparator_agent, formatter_agent],
         tasks=[parse_task, scrape_task, compare_task, format_task],
         verbose=True,
         process=Process.sequential
@@ -2,11 +2,12 @@
 
 import os
 import json
+import time
 from dotenv import load_dotenv
 from crewai import Agent, Task, Crew, Process
 from crewai.tools import tool
 from crewai import LLM
-from tools.enhanced_web_scraper import search_both_platforms
+from tools.enhanced_web_scraper import stream_both_platforms
 
 # --- Load environment variables ---
 load_dotenv()
@@ -46,14 +47,8 @@ llm = LLM(
 #     )
 
 # --- Tool: Enhanced Web Scraper ---
-@tool("EnhancedWebScraper")
-def web_scraper_tool(product_keyword: str, session_id: str = None) -> str:
-    """
-    Scrape product data from Amazon India and Flipkart using the enhanced scraper.
-
-    Returns:
-        JSON string: List of products with 'product_name', 'current_price', 'image_url', 'product_url', and 'source'.
-    """
+def _scrape_products(product_keyword: str, session_id: str = None, max_results: int = 8) -> str:
+    """Stream products from both marketplaces (up to 50), storing batches in the tracking session if given"""
     try:
         # Import here to avoid circular imports
         from services.scraping_tracker import ScrapingTracker
@@ -71,24 +66,35 @@ def web_scraper_tool(product_keyword: str, session_id: str = None) -> str:
             
         # Update status if tracker is available
         if tracker and session_id:
-            tracker.update_status(session_id, "scraping_amazon", "amazon")
+            tracker.mark_sources_in_flight(session_id, ["amazon", "flipkart"])
             
-        # Use enhanced scraper to get products from both platforms
-        results = search_both_platforms(product_keyword, max_results=8)
+        # Stream products from both platforms, storing them in small batches so the
+        # session shows partial results while the scrape is still running
+        results = []
+        pending = {"amazon": [], "flipkart": []}
+        counts = {"amazon": 0, "flipkart": 0}
+        last_flush = time.monotonic()
+
+        def flush():
+            for source, products in pending.items():
+                if products:
+                    tracker.store_products(session_id, products, source)
+                    counts[source] = counts.get(source, 0) + len(products)
+                    pending[source] = []
+            tracker.update_product_count(session_id, amazon_count=counts["amazon"], flipkart_count=counts["flipkart"])
+
+        limit = max(1, min(int(max_results or 8), 50))
+        for product in stream_both_platforms(product_keyword, max_results=limit):
+            results.append(product)
+            if tracker and session_id:
+                pending.setdefault(product.get('source', 'amazon'), []).append(product)
+                if sum(map(len, pending.values())) >= 4 or time.monotonic() - last_flush >= 0.5:
+                    flush()
+                    last_flush = time.monotonic()
         
-        # Store results if tracker is available
+        # Store whatever arrived since the last batch
         if tracker and session_id:
-            amazon_results = [p for p in results if p.get('source') == 'amazon']
-            flipkart_results = [p for p in results if p.get('source') == 'flipkart']
-            
-            if amazon_results:
-                tracker.store_products(session_id, amazon_results, "amazon")
-            if flipkart_results:
-                tracker.store_products(session_id, flipkart_results, "flipkart")
-                
-            tracker.update_product_count(session_id, 
-                                       amazon_count=len(amazon_results), 
-                                       flipkart_count=len(flipkart_results))
+            flush()
             tracker.update_status(session_id, "processing", "processing")
             
         return json.dumps(results)
@@ -96,6 +102,33 @@ def web_scraper_tool(product_keyword: str, session_id: str = None) -> str:
         return json.dumps({"error": str(e), "results": []})
 
 
+@tool("EnhancedWebScraper")
+def web_scraper_tool(product_keyword: str, session_id: str = None, max_results: int = 8) -> str:
+    """
+    Scrape product data from Amazon India and Flipkart using the enhanced scraper.
+    Pass max_results (up to 50) when more products were requested; extra result pages are fetched in parallel.
+
+    Returns:
+        JSON string: List of products with 'product_name', 'current_price', 'image_url', 'product_url', and 'source'.
+    """
+    return _scrape_products(product_keyword, session_id, max_results)
+
+
+def make_web_scraper_tool(max_results: int, session_id: str = None):
+    """EnhancedWebScraper with the crew's result cap and tracking session bound in, rather than left to the LLM"""
+    @tool("EnhancedWebScraper")
+    def bound_web_scraper_tool(product_keyword: str) -> str:
+        """
+        Scrape product data from Amazon India and Flipkart using the enhanced scraper.
+
+        Returns:
+            JSON string: List of products with 'product_name', 'current_price', 'image_url', 'product_url', and 'source'.
+        """
+        return _scrape_products(product_keyword, session_id, max_results)
+
+    return bound_web_scraper_tool
+
+
 # --- Agent 1: Product Request Parser ---
 parser_agent = Agent(
     role="Product Request Parser",
@@ -113,19 +146,24 @@ parser_agent = Agent(
 )
 
 # --- Agent 2: Web Search & Scraper Orchestrator ---
-scraper_orchestrator_agent = Agent(
-    role="Web Search & Scraping Orchestrator",
-    goal="Use the WebScraper tool ONCE to gather product data. Accept any number of results without re-scraping.",
-    backstory=(
-        "Efficient data collector who uses tools exactly once per task. "
-        "Never calls the same tool multiple times or tries to get more results. "
-        "Always satisfied with the first scraping result, whether it's 3 products or 10 products."
-    ),
-    llm=llm,
-    tools=[web_scraper_tool],
-    verbose=True,
-    allow_delegation=False
-)
+def make_scraper_orchestrator_agent(scraper_tool=web_scraper_tool) -> Agent:
+    """Scraper agent using scraper_tool; crews pass one from make_web_scraper_tool()"""
+    return Agent(
+        role="Web Search & Scraping Orchestrator",
+        goal="Use the WebScraper tool ONCE to gather product data. Accept any number of results without re-scraping.",
+        backstory=(
+            "Efficient data collector who uses tools exactly once per task. "
+            "Never calls the same tool multiple times or tries to get more results. "
+            "Always satisfied with the first scraping result, whether it's 3 products or 10 products."
+        ),
+        llm=llm,
+        tools=[scraper_tool],
+        verbose=True,
+        allow_delegation=False
+    )
+
+
+scraper_orchestrator_agent = make_scraper_orchestrator_agent()
 
 # --- Agent 3: Product Comparison & Ranking ---
 comparator_agent = Agent(
@@ -170,6 +208,8 @@ def create_shopping_crew(user_prompt: str, num_products: int) -> Crew:
     Returns:
         Crew: Configured CrewAI instance ready for execution.
     """
+    # The result cap is bound into this crew's scraper tool
+    scraper_agent = make_scraper_orchestrator_agent(make_web_scraper_tool(num_products))
 
     # --- Task 1: Parse Product Request ---
     parse_task = Task(
@@ -219,7 +259,7 @@ def create_shopping_crew(user_prompt: str, num_products: int) -> Crew:
         
         STRICT RULE: Use the EnhancedWebScraper tool exactly once and return its output.
         """,
-        agent=scraper_orchestrator_agent,
+        agent=scraper_agent,
         context=[parse_task],
         expected_output="Complete JSON array from single EnhancedWebScraper call (any number of products is acceptable)"
     )
@@ -307,7 +347,7 @@ def create_shopping_crew(user_prompt: str, num_products: int) -> Crew:
 
     # --- Assemble Crew ---
     product_crew = Crew(
-        agents=[parser_agent, scraper_orchestrator_agent, comparator_agent, formatter_agent],
+        agents=[parser_agent, scraper_agent, comparator_agent, formatter_agent],
         tasks=[parse_task, scrape_task, compare_and_rank_task, format_task],
         verbose=True,
         process=Process.sequential
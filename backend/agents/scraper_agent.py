@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 from tools.web_scraper import scrape_ecommerce_site
 from services.enhanced_data_sources import EnhancedDataSources
 from services.product_categorizer import ProductCategorizer
+from services.product_identifiers import listing_name
 
 # Load environment variables
 load_dotenv()
@@ -53,7 +54,7 @@ def enhanced_web_scraper_tool(product_keyword: str, category: str = "general") -
         formatted_results = []
         for item in results[:10]:  # Limit to top 10 results
             formatted_item = {
-                "name": item.get("name", "N/A"),
+                "name": listing_name(item) or "N/A",
                 "current_price": item.get("current_price"),
                 "image_url": item.get("image_url", "N/A"),
                 "product_url": item.get("product_url", "N/A"),
@@ -74,7 +75,7 @@ def enhanced_web_scraper_tool(product_keyword: str, category: str = "general") -
     except Exception as e:
         print(f"[EnhancedWebScraper] Failed: {e}")
         # Fallback: Basic scraping
-        fallback_results = asyncio.run(scrape_ecommerce_site(product_keyword, 5, "both"))
+        fallback_results = scrape_ecommerce_site(product_keyword, 5, "both")
         return json.dumps(fallback_results)
 
 
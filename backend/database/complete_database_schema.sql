@@ -53,8 +53,8 @@ CREATE TABLE IF NOT EXISTS public.scraping_sessions (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     session_id VARCHAR(255) UNIQUE NOT NULL,
     search_query TEXT NOT NULL,
-    status VARCHAR(50) DEFAULT 'initiated', -- 'initiated', 'scraping_amazon', 'scraping_flipkart', 'processing', 'completed', 'failed'
-    current_source VARCHAR(50), -- 'amazon', 'flipkart', 'processing'
+    status VARCHAR(50) DEFAULT 'initiated', -- 'initiated', 'scraping_amazon', 'scraping_flipkart', 'scraping_both', 'processing', 'completed', 'failed'
+    current_source VARCHAR(50), -- 'amazon', 'flipkart', 'amazon,flipkart', 'processing'
     products_found INTEGER DEFAULT 0,
     amazon_products INTEGER DEFAULT 0,
     flipkart_products INTEGER DEFAULT 0,
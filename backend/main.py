@@ -8,13 +8,26 @@ from typing import Dict, Optional
 
 from fastapi import FastAPI, Request, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv       # Store search query in database env
 from supabase import create_client, Client
 
 from agents.crew_orchestrator import create_shopping_crew
 from models import SearchRequest, SearchResponse, ProductResult, SearchStatus, FilterSuggestion
+from services.enhanced_data_sources import fan_out_snapshot
 from services.filter_processor import FilterProcessor
+from services.product_cache import get_product_cache, close_product_cache
+from services.product_identifiers import get_product_index, close_product_index
 from services.scraping_tracker import ScrapingTracker
+from tools.async_scraper import get_scraper_engine, close_scraper_engine
+from tools.browser_pool import get_browser_pool, close_browser_pool
+from tools.circuit_breaker import OPEN, get_source_guard
+from tools.resource_blocking import get_resource_report
+from tools.scraper_config import env_bool
+from tools.scraper_loop import stop_scraper_loop
+from tools.rate_limiter import get_rate_limiter
+from tools.selector_stats import selector_stats_snapshot
+from tools.single_flight import single_flight_snapshot
 
 # Load environment variables
 load_dotenv()
@@ -393,6 +406,34 @@ async def process_search_async(query_id: str, request_data: SearchRequest, token
         print(f"DEBUG: Error occurred for user_id: {user_id if 'user_id' in locals() else 'undefined'}")
 
 
+# ------------------- Lifecycle -------------------
+
+@app.on_event("startup")
+async def start_scraper_engine():
+    """Open the pooled marketplace clients once for the life of the process"""
+    await get_scraper_engine().start()
+
+@app.on_event("startup")
+async def warm_browser_pool():
+    """Launch the pooled headless browser so Playwright scrapes skip Chromium cold start"""
+    if not env_bool("SCRAPER_BROWSER_WARM", True):
+        return
+    try:
+        await get_browser_pool().start()
+    except Exception as e:
+        # Playwright or its browsers may not be installed; HTTP scraping still works
+        print(f"Browser pool not warmed: {e}")
+
+@app.on_event("shutdown")
+async def stop_scraper_engine():
+    """Close pooled scraping resources and their event loop"""
+    await close_scraper_engine()
+    await close_browser_pool()
+    stop_scraper_loop()
+    close_product_cache()
+    close_product_index()
+
+
 # ------------------- API Endpoints -------------------
 
 @app.get("/")
@@ -416,12 +457,15 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    # Per-marketplace circuit breakers: an open one means searches skip that site
+    scrapers = get_source_guard().snapshot()
     try:
         # Test database connection
         supabase.table("search_queries").select("id").limit(1).execute()
-        return {"status": "healthy", "database": "connected"}
+        degraded = any(breaker["state"] == OPEN for breaker in scrapers["breakers"].values())
+        return {"status": "degraded" if degraded else "healthy", "database": "connected", "scrapers": scrapers}
     except Exception as e:
-        return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
+        return {"status": "unhealthy", "database": "disconnected", "error": str(e), "scrapers": scrapers}
 
 @app.post("/api/search", response_model=dict)
 async def search_products(
@@ -833,6 +877,90 @@ async def get_scraping_products(session_id: str, user_and_token=Depends(get_curr
         raise HTTPException(status_code=500, detail=f"Error getting scraped products: {str(e)}")
 
 
+@app.get("/api/scraping/stream")
+async def stream_scraped_products(query: str, max_results: int = 10, user_and_token=Depends(get_current_user)):
+    """Stream products as newline-delimited JSON while Amazon and Flipkart are being scraped"""
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Search query is required.")
+
+    async def product_lines():
+        engine = get_scraper_engine()
+        async for product in engine.stream_products(query, max_results=max(1, min(max_results, 50))):
+            yield json.dumps(product) + "\n"
+
+    return StreamingResponse(product_lines(), media_type="application/x-ndjson")
+
+
+@app.get("/api/scraper/selector-stats")
+async def get_selector_stats(user_and_token=Depends(get_current_user)):
+    """Per-site selector hit/miss counters and the current adaptive selector order"""
+    return selector_stats_snapshot()
+
+
+@app.get("/api/scraper/rate-limits")
+async def get_rate_limits(user_and_token=Depends(get_current_user)):
+    """Per-host request budgets and how often searches had to wait for them"""
+    return get_rate_limiter().snapshot()
+
+
+@app.get("/api/scraper/browser-pool")
+async def get_browser_pool_status(user_and_token=Depends(get_current_user)):
+    """Pooled browser health, usage and recycling counters"""
+    return get_browser_pool().snapshot()
+
+
+@app.get("/api/scraper/resource-report")
+async def get_browser_resource_report(user_and_token=Depends(get_current_user)):
+    """Bandwidth and page-ready latency of browser scrapes, and what fast mode saves"""
+    return get_resource_report().snapshot()
+
+
+@app.get("/api/scraper/single-flight")
+async def get_single_flight_stats(user_and_token=Depends(get_current_user)):
+    """Scrapes started versus identical concurrent searches that joined one in flight"""
+    return single_flight_snapshot()
+
+
+@app.get("/api/scraper/fan-out")
+async def get_fan_out_stats(user_and_token=Depends(get_current_user)):
+    """Marketplace searches run versus saved by adaptive keyword expansion"""
+    return fan_out_snapshot()
+
+
+@app.get("/api/scraper/cache")
+async def get_product_cache_stats(user_and_token=Depends(get_current_user)):
+    """Shared product cache size, budgets and hit/miss/eviction counters"""
+    return get_product_cache().snapshot()
+
+
+@app.get("/api/products/lookup")
+async def lookup_product(identifier: Optional[str] = None, url: Optional[str] = None,
+                         user_and_token=Depends(get_current_user)):
+    """
+    Latest known listing per marketplace for a product, without scraping.
+
+    Pass a namespaced identifier (asin:B0BWQM5WHC, fkpid:..., model:15sfq5111tu)
+    or a product URL / title to extract identifiers from.
+    """
+    if not identifier and not url:
+        raise HTTPException(status_code=400, detail="Pass an identifier or a url.")
+    index = get_product_index()
+    # Memory hits are O(1); misses read the SQLite copy, so keep them off the event loop
+    if identifier:
+        listings = await asyncio.to_thread(index.lookup, identifier)
+    else:
+        listings = await asyncio.to_thread(index.find, url)
+    if not listings:
+        raise HTTPException(status_code=404, detail="Product not indexed yet.")
+    return {"listings": listings}
+
+
+@app.get("/api/scraper/product-index")
+async def get_product_index_stats(user_and_token=Depends(get_current_user)):
+    """Identifier index size and memory/SQLite hit counters"""
+    return get_product_index().snapshot()
+
+
 @app.get("/api/history")
 async def get_history(user_and_token=Depends(get_current_user)):
     """Return search history for the current user"""
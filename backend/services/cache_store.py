@@ -0,0 +1,150 @@
+# services/cache_store.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from tools.scraper_config import env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  ".cache", "product_cache.sqlite3")
+
+
+def encode_value(value: Any) -> bytes:
+    """Compressed JSON, the on-disk and on-the-wire format of cached results"""
+    return zlib.compress(json.dumps(value, default=str).encode("utf-8"))
+
+
+def decode_value(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class SQLiteCacheStore:
+    """Second cache tier in a local SQLite file.
+
+    Every uvicorn worker on the node opens the same file (WAL mode lets readers and
+    a writer work concurrently), and entries survive restarts. Expiry uses wall-clock
+    time because monotonic clocks aren't comparable across processes.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = path or env_str("PRODUCT_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries or env_int("PRODUCT_CACHE_DISK_MAX_ENTRIES", 10000)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS product_cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, updated_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS product_cache_expires ON product_cache (expires_at)")
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Cached value and its remaining TTL in seconds, or None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM product_cache WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+        if row is None:
+            return None
+        return decode_value(row[0]), row[1] - now
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        now = time.time()
+        blob = encode_value(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO product_cache (key, value, expires_at, updated_at) VALUES (?, ?, ?, ?)",
+                (key, blob, now + ttl_seconds, now))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM product_cache WHERE key = ?", (key,))
+
+    def purge(self) -> int:
+        """Drop expired rows, then the least recently written rows over max_entries"""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM product_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            removed += self._conn.execute(
+                "DELETE FROM product_cache WHERE key IN (SELECT key FROM product_cache "
+                "ORDER BY updated_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)).rowcount
+        return removed
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM product_cache").fetchone()
+        return {"backend": self.name, "path": self.path, "entries": entries, "compressed_bytes": size,
+                "max_entries": self.max_entries}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisCacheStore:
+    """Second cache tier in Redis (or any Redis-compatible server), shared across nodes"""
+
+    name = "redis"
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "product_cache:", client=None):
+        self.url = url or env_str("PRODUCT_CACHE_REDIS_URL", "redis://localhost:6379/0")
+        self.prefix = prefix
+        if client is None:
+            # Imported lazily so the redis package is only needed when this backend is selected
+            import redis
+            client = redis.Redis.from_url(self.url, socket_timeout=2, socket_connect_timeout=2)
+        self._client = client
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        name = self.prefix + key
+        blob = self._client.get(name)
+        if blob is None:
+            return None
+        ttl = self._client.ttl(name)
+        return decode_value(blob), float(ttl) if ttl and ttl > 0 else 0.0
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        # Redis expires keys itself
+        self._client.set(self.prefix + key, encode_value(value), ex=max(1, int(ttl_seconds)))
+
+    def delete(self, key: str):
+        self._client.delete(self.prefix + key)
+
+    def purge(self) -> int:
+        return 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"backend": self.name, "url": self.url.split("@")[-1]}
+
+    def close(self):
+        try:
+            self._client.close()
+        except Exception as e:
+            logger.debug(f"Ignoring error while closing Redis cache client: {e}")
+
+
+def open_cache_store():
+    """Second-tier store selected by PRODUCT_CACHE_STORE ('sqlite', 'redis' or 'none')"""
+    backend = env_str("PRODUCT_CACHE_STORE", "sqlite").lower()
+    if backend == "none":
+        return None
+    try:
+        if backend == "redis":
+            return RedisCacheStore()
+        if backend == "sqlite":
+            return SQLiteCacheStore()
+        logger.warning(f"Unknown PRODUCT_CACHE_STORE {backend!r}, using memory only")
+    except Exception as e:
+        # A missing redis package or unwritable cache path shouldn't stop searches
+        logger.warning(f"Product cache store {backend!r} unavailable, using memory only: {e}")
+    return None
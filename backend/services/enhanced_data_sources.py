@@ -1,205 +1,231 @@
 # services/enhanced_data_sources.py
 import asyncio
-import aiohttp
 import json
 import re
+import threading
+import weakref
 from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-import hashlib
 
-class ProductDataCache:
-    """Simple in-memory cache with TTL for product data."""
-    
-    def __init__(self, ttl_minutes: int = 30):
-        self.cache = {}
-        self.ttl = timedelta(minutes=ttl_minutes)
-    
-    def _generate_key(self, search_term: str, source: str) -> str:
-        """Generate cache key from search parameters."""
-        return hashlib.md5(f"{search_term}:{source}".encode()).hexdigest()
-    
-    def get(self, search_term: str, source: str) -> Optional[List[Dict]]:
-        """Retrieve cached data if not expired."""
-        key = self._generate_key(search_term, source)
-        if key in self.cache:
-            data, timestamp = self.cache[key]
-            if datetime.now() - timestamp < self.ttl:
-                return data
-            else:
-                del self.cache[key]
-        return None
-    
-    def set(self, search_term: str, source: str, data: List[Dict]):
-        """Cache data with current timestamp."""
-        key = self._generate_key(search_term, source)
-        self.cache[key] = (data, datetime.now())
-    
-    def clear_expired(self):
-        """Remove expired cache entries."""
-        now = datetime.now()
-        expired_keys = [
-            key for key, (_, timestamp) in self.cache.items() 
-            if now - timestamp >= self.ttl
-        ]
-        for key in expired_keys:
-            del self.cache[key]
+from services.product_cache import get_product_cache
+from services.product_identifiers import extract_identifiers, get_product_index, listing_name
+from services.product_matcher import ProductMatcher, listing_price
+from tools.async_scraper import get_scraper_engine
+from tools.circuit_breaker import SourceUnavailable, get_source_guard
+from tools.query_canonicalizer import canonical_query
+from tools.scraper_config import env_float, env_int
+from tools.single_flight import get_single_flight
+
+# Sources searched for every term
+SEARCH_SOURCES = ("amazon", "flipkart")
+
+# One per event loop: a semaphore is bound to the loop that first waits on it, and the
+# scraper loop is recreated after stop_scraper_loop(); dead loops drop out on their own
+_search_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_search_slots_lock = threading.Lock()
+
+
+def _get_search_slots() -> asyncio.Semaphore:
+    """Cap on marketplace searches running at once on the current loop (the scraper loop in production)"""
+    loop = asyncio.get_running_loop()
+    with _search_slots_lock:
+        slots = _search_slots.get(loop)
+        if slots is None:
+            slots = _search_slots[loop] = asyncio.Semaphore(env_int("SCRAPER_MAX_CONCURRENT_SEARCHES", 6))
+        return slots
+
+
+_fan_out_lock = threading.Lock()
+_fan_out_stats = {"searches": 0, "terms_offered": 0, "terms_searched": 0, "expanded": 0,
+                  "source_searches_planned": 0, "source_searches_run": 0, "source_searches_saved": 0}
+
+
+def _record_fan_out(terms_offered: int, terms_searched: int, sources: int):
+    with _fan_out_lock:
+        _fan_out_stats["searches"] += 1
+        _fan_out_stats["terms_offered"] += terms_offered
+        _fan_out_stats["terms_searched"] += terms_searched
+        _fan_out_stats["expanded"] += terms_searched > 1
+        _fan_out_stats["source_searches_planned"] += terms_offered * sources
+        _fan_out_stats["source_searches_run"] += terms_searched * sources
+        _fan_out_stats["source_searches_saved"] += (terms_offered - terms_searched) * sources
+
+
+def fan_out_snapshot() -> Dict[str, float]:
+    """Keyword fan-out counters: source searches an all-terms fan-out would have run versus those run"""
+    with _fan_out_lock:
+        stats = dict(_fan_out_stats)
+    stats["saved_per_search"] = round(stats["source_searches_saved"] / stats["searches"], 2) if stats["searches"] else 0.0
+    return stats
+
 
 class EnhancedDataSources:
     """Enhanced product data sources with multiple APIs and intelligent fallbacks."""
     
     def __init__(self):
-        self.cache = ProductDataCache()
-        self.session: Optional[aiohttp.ClientSession] = None
+        # Process-wide cache, so results are reused across searches and instances
+        self.cache = get_product_cache()
+        # Shared engine: pooled per-host clients live for the whole process
+        self.engine = get_scraper_engine()
+        # Identical searches in flight at the same time share one scrape
+        self.flights = get_single_flight("enhanced_data_sources")
+        # Sources that are blocking us are skipped instead of scraped
+        self.guard = get_source_guard()
+        # ASIN / Flipkart pid / model number -> latest listings, across searches and restarts
+        self.index = get_product_index()
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        # Nothing to close per search; the engine is closed on app shutdown
+        pass
     
     async def search_amazon_api(self, search_term: str, num_results: int = 10) -> List[Dict]:
         """Enhanced Amazon search with improved parsing using enhanced_web_scraper."""
-        # Check cache first
-        cached = self.cache.get(search_term, "amazon")
-        if cached:
-            return cached[:num_results]
-        
-        # Import enhanced scraper
-        import sys
-        import os
-        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-        from tools.enhanced_web_scraper import search_amazon
-        
+        # Stale cached results are served at once and refreshed in the background
+        try:
+            results = await self.cache.get_or_fetch(
+                search_term, "amazon", lambda: self._coalesced(self._fetch_amazon, "amazon", search_term, num_results),
+                cache_result=False)
+        except SourceUnavailable as e:
+            # Nothing cached; the engine skips Amazon too and answers with its fallback products, uncached
+            print(f"Skipping Amazon search: {e}")
+            results = await self._fetch_amazon(search_term, num_results)
+        return results[:num_results]
+    
+    async def _fetch_amazon(self, search_term: str, num_results: int) -> List[Dict]:
         try:
-            # Use enhanced Amazon scraper with better URL and data extraction
-            results = search_amazon(search_term, max_results=num_results)
-            
-            # Enhanced data processing
-            enhanced_results = []
-            for item in results:
-                enhanced_item = {
-                    **item,
-                    "source": "amazon",
-                    "confidence_score": self._calculate_confidence_score(item),
-                    "extracted_specs": self._extract_specifications(item.get("name", "")),
-                    "price_per_rating": self._calculate_price_per_rating(item),
-                    "search_relevance": self._calculate_search_relevance(item.get("name", ""), search_term)
-                }
-                enhanced_results.append(enhanced_item)
-            
-            # Cache results
-            self.cache.set(search_term, "amazon", enhanced_results)
-            return enhanced_results
-            
+            # Use the async engine with better URL and data extraction
+            results = await self.engine.search_amazon(search_term, max_results=num_results)
         except Exception as e:
             print(f"Enhanced Amazon search failed, falling back to basic scraper: {e}")
             # Fallback to existing scraper
-            from tools.web_scraper import scrape_ecommerce_site
+            from tools.web_scraper import scrape_ecommerce_site_async
             try:
-                results = await scrape_ecommerce_site(search_term, num_results, "amazon")
-                enhanced_results = []
-                for item in results:
-                    enhanced_item = {
-                        **item,
-                        "source": "amazon",
-                        "confidence_score": self._calculate_confidence_score(item),
-                        "extracted_specs": self._extract_specifications(item.get("name", "")),
-                        "price_per_rating": self._calculate_price_per_rating(item),
-                        "search_relevance": self._calculate_search_relevance(item.get("name", ""), search_term)
-                    }
-                    enhanced_results.append(enhanced_item)
-                self.cache.set(search_term, "amazon", enhanced_results)
-                return enhanced_results
+                results = await scrape_ecommerce_site_async(search_term, num_results, "amazon")
             except Exception as fallback_e:
                 print(f"Fallback Amazon search also failed: {fallback_e}")
                 return []
+        return await self._indexed(self._enhance_results(results, "amazon", search_term))
     
     async def search_flipkart_api(self, search_term: str, num_results: int = 10) -> List[Dict]:
         """Enhanced Flipkart search with improved parsing using enhanced_web_scraper."""
-        cached = self.cache.get(search_term, "flipkart")
-        if cached:
-            return cached[:num_results]
-        
-        # Import enhanced scraper
-        import sys
-        import os
-        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-        from tools.enhanced_web_scraper import search_flipkart
-        
         try:
-            # Use enhanced Flipkart scraper with better URL and data extraction
-            results = search_flipkart(search_term, max_results=num_results)
-            
-            enhanced_results = []
-            for item in results:
-                enhanced_item = {
-                    **item,
-                    "source": "flipkart",
-                    "confidence_score": self._calculate_confidence_score(item),
-                    "extracted_specs": self._extract_specifications(item.get("name", "")),
-                    "price_per_rating": self._calculate_price_per_rating(item),
-                    "search_relevance": self._calculate_search_relevance(item.get("name", ""), search_term)
-                }
-                enhanced_results.append(enhanced_item)
-            
-            # Cache results
-            self.cache.set(search_term, "flipkart", enhanced_results)
-            return enhanced_results
-            
+            results = await self.cache.get_or_fetch(
+                search_term, "flipkart",
+                lambda: self._coalesced(self._fetch_flipkart, "flipkart", search_term, num_results),
+                cache_result=False)
+        except SourceUnavailable as e:
+            print(f"Skipping Flipkart search: {e}")
+            return []
+        return results[:num_results]
+    
+    async def _fetch_flipkart(self, search_term: str, num_results: int) -> List[Dict]:
+        try:
+            # Use the async engine with better URL and data extraction
+            results = await self.engine.search_flipkart(search_term, max_results=num_results)
         except Exception as e:
             print(f"Enhanced Flipkart search failed, falling back to basic scraper: {e}")
             # Fallback to existing scraper
-            from tools.web_scraper import scrape_ecommerce_site
+            from tools.web_scraper import scrape_ecommerce_site_async
             try:
-                results = await scrape_ecommerce_site(search_term, num_results, "flipkart")
-                enhanced_results = []
-                for item in results:
-                    enhanced_item = {
-                        **item,
-                        "source": "flipkart",
-                        "confidence_score": self._calculate_confidence_score(item),
-                        "extracted_specs": self._extract_specifications(item.get("name", "")),
-                        "price_per_rating": self._calculate_price_per_rating(item),
-                        "search_relevance": self._calculate_search_relevance(item.get("name", ""), search_term)
-                    }
-                    enhanced_results.append(enhanced_item)
-                self.cache.set(search_term, "flipkart", enhanced_results)
-                return enhanced_results
+                results = await scrape_ecommerce_site_async(search_term, num_results, "flipkart")
             except Exception as fallback_e:
                 print(f"Fallback Flipkart search also failed: {fallback_e}")
                 return []
-            
-            self.cache.set(search_term, "flipkart", enhanced_results)
-            return enhanced_results
-            
+        return await self._indexed(self._enhance_results(results, "flipkart", search_term))
+    
+    async def _indexed(self, results: List[Dict]) -> List[Dict]:
+        """Record freshly scraped listings in the identifier index."""
+        try:
+            await asyncio.to_thread(self.index.add_many, results)
         except Exception as e:
-            print(f"Flipkart search failed: {e}")
-            return []
+            print(f"Product index update failed: {e}")
+        return results
+    
+    def _coalesced(self, fetch, source: str, search_term: str, num_results: int):
+        """Await fetch once for identical searches that are in flight at the same time.
+
+        Raises SourceUnavailable without fetching while the source's breaker is open.
+        """
+        self.guard.check(source, search_term)
+        return self.flights.run((source, canonical_query(search_term), num_results),
+                                lambda: self._limited(fetch, source, search_term, num_results))
+    
+    async def _limited(self, fetch, source: str, search_term: str, num_results: int) -> List[Dict]:
+        """Run fetch once a global search slot is free; cache hits and coalesced callers don't take one.
+
+        Results are cached here, in the detached flight, so a scrape that finishes after
+        its caller hit the search deadline is still reused by the next search.
+        """
+        async with _get_search_slots():
+            results = await fetch(search_term, num_results)
+        if results:
+            await self.cache.aset(search_term, source, results)
+        return results
+    
+    def _enhance_results(self, results: List[Dict], source: str, search_term: str) -> List[Dict]:
+        """Add source, scoring and extracted specs to raw scraper results."""
+        return [
+            {
+                **item,
+                "source": source,
+                "confidence_score": self._calculate_confidence_score(item),
+                "extracted_specs": self._extract_specifications(listing_name(item)),
+                "price_per_rating": self._calculate_price_per_rating(item),
+                "search_relevance": self._calculate_search_relevance(listing_name(item), search_term),
+                "identifiers": extract_identifiers({**item, "source": source})
+            }
+            for item in results
+        ]
     
-    async def search_multiple_sources(self, search_terms: List[str], category: str, num_results: int = 5) -> List[Dict]:
-        """Search multiple sources in parallel with intelligent aggregation."""
-        all_results = []
+    async def search_multiple_sources(self, search_terms: List[str], category: str, num_results: int = 5,
+                                      deadline: Optional[float] = None, target: Optional[int] = None) -> List[Dict]:
+        """Search multiple sources with adaptive keyword fan-out and intelligent aggregation.
         
-        # Search all terms across sources in parallel
-        tasks = []
-        for term in search_terms:
-            tasks.append(self.search_amazon_api(term, num_results))
-            tasks.append(self.search_flipkart_api(term, num_results))
+        The first (primary) term is searched on every source at once. Each further
+        term is only searched while fewer than `target` unique products relevant to
+        the primary term have been found (default: the num_results * 2 returned).
+        Searches still running after `deadline` seconds in total are dropped and
+        the results that did arrive are returned.
+        
+        Listings of the same product on several marketplaces come back as one
+        result, with the best price per source under "offers".
+        """
+        deadline = env_float("SCRAPER_SEARCH_DEADLINE", 20.0) if deadline is None else deadline
+        target = num_results * 2 if target is None else target
+        min_relevance = env_float("SCRAPER_FAN_OUT_MIN_RELEVANCE", 0.5)
+        loop = asyncio.get_running_loop()
+        stop_at = loop.time() + deadline
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Terms that canonicalize alike would only hit the same cache entry twice
+        unique_terms = {}
+        for term in search_terms:
+            unique_terms.setdefault(canonical_query(term), term)
+        terms = list(unique_terms.values())
         
-        # Aggregate and deduplicate results
-        seen_products = set()
-        for result_list in results:
-            if isinstance(result_list, list):
+        # Near-duplicate listings across sources are clustered into one product
+        matcher = ProductMatcher()
+        relevant = searched = 0
+        for term in terms:
+            remaining = stop_at - loop.time()
+            if remaining <= 0 or relevant >= target:
+                break
+            searched += 1
+            for result_list in await self._search_term(term, num_results, remaining):
+                if not isinstance(result_list, list):
+                    continue
                 for item in result_list:
-                    # Simple deduplication based on product name similarity
-                    product_key = self._normalize_product_name(item.get("name", ""))
-                    if product_key not in seen_products and len(product_key) > 3:
-                        seen_products.add(product_key)
-                        all_results.append(item)
+                    # Scrapers name the title product_name; older sources used name
+                    name = listing_name(item)
+                    if len(self._normalize_product_name(name)) <= 3:
+                        continue
+                    _, new_product = matcher.add(item)
+                    if new_product and self._calculate_search_relevance(name, terms[0]) >= min_relevance:
+                        relevant += 1
+        
+        _record_fan_out(len(terms), searched, len(SEARCH_SOURCES))
+        all_results = [cluster.to_result() for cluster in matcher.clusters()]
         
         # Sort by confidence and relevance
         all_results.sort(key=lambda x: (
@@ -209,6 +235,17 @@ class EnhancedDataSources:
         
         return all_results[:num_results * 2]  # Return more for better comparison
     
+    async def _search_term(self, term: str, num_results: int, timeout: float) -> List:
+        """Search every source for one term concurrently; sources still running after `timeout` are dropped."""
+        tasks = [asyncio.ensure_future(getattr(self, f"search_{source}_api")(term, num_results))
+                 for source in SEARCH_SOURCES]
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            print(f"Search deadline reached: keeping {len(done)} of {len(tasks)} source searches for {term!r}")
+        return [task.exception() or task.result() for task in tasks if task in done]
+    
     def _calculate_confidence_score(self, item: Dict) -> float:
         """Calculate confidence score for a product listing."""
         score = 0.5  # Base score
@@ -218,7 +255,7 @@ class EnhancedDataSources:
             score += 0.2
         
         # Boost for having valid price
-        if item.get("current_price") and isinstance(item["current_price"], (int, float)) and item["current_price"] > 0:
+        if listing_price(item):
             score += 0.2
         
         # Boost for having product URL
@@ -262,7 +299,7 @@ class EnhancedDataSources:
     
     def _calculate_price_per_rating(self, item: Dict) -> float:
         """Calculate value metric (price per rating point)."""
-        price = item.get("current_price", 0)
+        price = listing_price(item) or 0
         # Mock rating - in real implementation, extract from reviews
         mock_rating = 4.0  # Default decent rating
         return price / mock_rating if price > 0 else float('inf')
@@ -3,6 +3,7 @@ from typing import Dict, List, Optional, Any
 import re
 from dataclasses import dataclass
 from models import SearchFilters
+from tools.query_canonicalizer import canonical_query, normalize_query
 
 @dataclass
 class EnhancedQuery:
@@ -13,6 +14,7 @@ class EnhancedQuery:
     brand_filters: List[str]
     price_context: Optional[str]
     use_case_context: Optional[str]
+    canonical_query: str = ""
 
 class FilterProcessor:
     """Process and enhance search queries based on user filters"""
@@ -51,7 +53,7 @@ class FilterProcessor:
         """Convert filters into enhanced search query"""
         
         enhanced_parts = []
-        search_terms = [query.lower()]
+        search_terms = [normalize_query(query)]
         category_terms = []
         brand_filters = []
         price_context = None
@@ -110,13 +112,22 @@ class FilterProcessor:
         return EnhancedQuery(
             original_query=query,
             enhanced_query=enhanced_query,
-            search_terms=list(set(search_terms)),  # Remove duplicates
+            search_terms=self._unique_terms(search_terms),
             category_specific_terms=category_terms,
             brand_filters=brand_filters,
             price_context=price_context,
-            use_case_context=use_case_context
+            use_case_context=use_case_context,
+            canonical_query=canonical_query(query)
         )
     
+    @staticmethod
+    def _unique_terms(terms: List[str]) -> List[str]:
+        """Drop terms that canonicalize to one already listed ("gaming laptop" / "laptop gaming")"""
+        unique = {}
+        for term in terms:
+            unique.setdefault(canonical_query(term), normalize_query(term))
+        return list(unique.values())
+    
     def calculate_match_score(self, product: Dict[str, Any], filters: SearchFilters, enhanced_query: EnhancedQuery) -> float:
         """Calculate how well a product matches the search criteria"""
         score = 0.0
@@ -0,0 +1,334 @@
+# services/product_cache.py
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from services.cache_store import open_cache_store
+from tools.query_canonicalizer import canonical_query
+from tools.scraper_config import env_float, env_int
+from tools.scraper_loop import get_scraper_loop
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("value", "term", "size", "fresh_until", "expires_at")
+
+    def __init__(self, value: Any, term: Optional[str], size: int, fresh_until: float, expires_at: float):
+        self.value = value
+        self.term = term
+        self.size = size
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory cost of a cached value by its JSON encoding"""
+    try:
+        return len(json.dumps(value, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+def is_fallback(data: Any) -> bool:
+    """Whether results are only the curated fallback products served when a scrape fails"""
+    return isinstance(data, list) and bool(data) and all(isinstance(item, dict) and item.get("fallback")
+                                                          for item in data)
+
+
+class ProductCache:
+    """Process-wide LRU cache of search results with TTLs and a memory budget.
+
+    Entries live in an OrderedDict kept in recency order, so lookups, inserts and
+    evictions are O(1). The least recently used entries are evicted once either
+    `max_entries` or `max_bytes` is exceeded. Expiry uses the monotonic clock, and a
+    daemon thread drops expired entries every `sweep_interval` seconds so idle
+    results don't hold memory until the next lookup.
+
+    An optional `store` (see services.cache_store) is the second tier: writes go to
+    both, and memory misses are looked up there and promoted, so results outlive the
+    process and are shared with the other workers.
+
+    Entries are fresh for `ttl_seconds` (soft TTL), then served stale for another
+    `stale_seconds` (up to the hard TTL). `get_or_fetch()` returns stale results
+    immediately and refreshes them once in the background on the scraper loop.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None, sweep_interval: Optional[float] = None,
+                 stale_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic,
+                 store=None):
+        self.max_entries = max_entries or env_int("PRODUCT_CACHE_MAX_ENTRIES", 512)
+        self.max_bytes = max_bytes or env_int("PRODUCT_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds or env_float("PRODUCT_CACHE_TTL_SECONDS", 1800)
+        self.stale_seconds = env_float("PRODUCT_CACHE_STALE_SECONDS", 3600) if stale_seconds is None else stale_seconds
+        self.sweep_interval = env_float("PRODUCT_CACHE_SWEEP_SECONDS", 60) if sweep_interval is None else sweep_interval
+        self._clock = clock
+        self.store = store
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        self._refreshing: Set[Tuple[str, str]] = set()
+        self.stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expirations": 0, "rejected": 0,
+                      "store_hits": 0, "store_errors": 0, "stale_hits": 0, "refreshes": 0, "refresh_errors": 0,
+                      "canonical_hits": 0}
+
+    @staticmethod
+    def key(search_term: str, source: str) -> Tuple[str, str]:
+        # Spelling variants of one search ("Gaming Laptop", "laptop for gaming") share an entry
+        return (canonical_query(search_term), source)
+
+    @staticmethod
+    def store_key(key: Tuple[str, str]) -> str:
+        search_term, source = key
+        return f"{source}:{search_term}"
+
+    def get(self, search_term: str, source: str) -> Optional[Any]:
+        """Cached results for a search, stale or fresh, or None if past the hard TTL in every tier"""
+        key = self.key(search_term, source)
+        found = self._memory_get(key, search_term)
+        if found is None and self.store is not None:
+            found = self._store_get(key, search_term)
+        return self._counted(found)
+
+    async def aget(self, search_term: str, source: str) -> Optional[Any]:
+        """get() for coroutines: memory hits return inline, store reads run in a worker thread"""
+        return (await self._alookup(search_term, source))[0]
+
+    async def _alookup(self, search_term: str, source: str) -> Tuple[Optional[Any], bool]:
+        key = self.key(search_term, source)
+        found = self._memory_get(key, search_term)
+        if found is None and self.store is not None:
+            found = await asyncio.to_thread(self._store_get, key, search_term)
+        return self._counted(found), found is not None and found[1]
+
+    def _counted(self, found: Optional[Tuple[Any, bool]]) -> Optional[Any]:
+        with self._lock:
+            if found is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            if not found[1]:
+                self.stats["stale_hits"] += 1
+            return found[0]
+
+    async def get_or_fetch(self, search_term: str, source: str, fetch: Callable[[], Awaitable[Any]],
+                           cache_result: bool = True) -> Any:
+        """Cached results if any (refreshing stale ones in the background), else `await fetch()`.
+
+        Empty results aren't cached, so a failed scrape is retried on the next search.
+        Pass cache_result=False when fetch caches its own results, e.g. a detached
+        scrape that should still be kept if this caller is cancelled.
+        """
+        value, fresh = await self._alookup(search_term, source)
+        if value is not None:
+            if not fresh:
+                self.schedule_refresh(search_term, source, fetch, cache_result)
+            return value
+        value = await fetch()
+        if value and cache_result:
+            await self.aset(search_term, source, value)
+        return value
+
+    def schedule_refresh(self, search_term: str, source: str, fetch: Callable[[], Awaitable[Any]],
+                         cache_result: bool = True) -> bool:
+        """Refresh one search in the background unless a refresh for it is already running"""
+        key = self.key(search_term, source)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+        # The scraper loop outlives the caller's loop (e.g. asyncio.run() in CrewAI tools)
+        asyncio.run_coroutine_threadsafe(self._refresh(search_term, source, fetch, cache_result), get_scraper_loop())
+        return True
+
+    async def _refresh(self, search_term: str, source: str, fetch: Callable[[], Awaitable[Any]],
+                       cache_result: bool = True):
+        key = self.key(search_term, source)
+        try:
+            value = await fetch()
+            if value and cache_result:
+                await self.aset(search_term, source, value)
+            self._count("refreshes")
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} failed: {e}")
+            self._count("refresh_errors")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def set(self, search_term: str, source: str, data: Any, ttl_seconds: Optional[float] = None):
+        """Cache results for a search in memory and, unless they are fallback products, in the store"""
+        key, ttl = self.key(search_term, source), ttl_seconds or self.ttl_seconds
+        self._memory_set(key, data, ttl, term=search_term)
+        if self.store is not None and not is_fallback(data):
+            self._store_set(key, data, ttl)
+
+    async def aset(self, search_term: str, source: str, data: Any, ttl_seconds: Optional[float] = None):
+        """set() for coroutines: the store write runs in a worker thread"""
+        key, ttl = self.key(search_term, source), ttl_seconds or self.ttl_seconds
+        self._memory_set(key, data, ttl, term=search_term)
+        if self.store is not None and not is_fallback(data):
+            await asyncio.to_thread(self._store_set, key, data, ttl)
+
+    def _count(self, stat: str, n: int = 1):
+        with self._lock:
+            self.stats[stat] += n
+
+    def _memory_get(self, key: Hashable, term: Optional[str] = None) -> Optional[Tuple[Any, bool]]:
+        """(value, fresh) from the memory tier, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            now = self._clock()
+            if entry.expires_at <= now:
+                self._drop(key)
+                self.stats["expirations"] += 1
+                return None
+            self._entries.move_to_end(key)
+            if term is not None and entry.term is not None and term != entry.term:
+                # A hit that raw search-term keys would have missed
+                self.stats["canonical_hits"] += 1
+            return entry.value, now < entry.fresh_until
+
+    def _memory_set(self, key: Hashable, data: Any, ttl_seconds: float, stale_seconds: Optional[float] = None,
+                    term: Optional[str] = None):
+        """Insert into the memory tier, evicting least recently used entries over budget"""
+        size = estimate_size(data)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                # Would evict everything else and still not fit
+                self.stats["rejected"] += 1
+                return
+            fresh_until = self._clock() + ttl_seconds
+            stale = self.stale_seconds if stale_seconds is None else stale_seconds
+            self._entries[key] = _Entry(data, term, size, fresh_until, fresh_until + stale)
+            self._bytes += size
+            self.stats["sets"] += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.stats["evictions"] += 1
+        self._ensure_sweeper()
+
+    def _store_get(self, key: Tuple[str, str], term: Optional[str] = None) -> Optional[Tuple[Any, bool]]:
+        try:
+            found = self.store.get(self.store_key(key))
+        except Exception as e:
+            logger.warning(f"Product cache store read failed: {e}")
+            self._count("store_errors")
+            return None
+        if found is None:
+            return None
+        # The store keeps entries until the hard TTL; the soft deadline is stale_seconds earlier
+        value, remaining = found
+        fresh_remaining = remaining - self.stale_seconds
+        # Promote into memory for the rest of its lifetime
+        self._memory_set(key, value, fresh_remaining, remaining - fresh_remaining, term)
+        self._count("store_hits")
+        return value, fresh_remaining > 0
+
+    def _store_set(self, key: Tuple[str, str], data: Any, ttl_seconds: float):
+        try:
+            self.store.set(self.store_key(key), data, ttl_seconds + self.stale_seconds)
+        except Exception as e:
+            logger.warning(f"Product cache store write failed: {e}")
+            self._count("store_errors")
+
+    def _drop(self, key: Hashable):
+        self._bytes -= self._entries.pop(key).size
+
+    def clear_expired(self) -> int:
+        """Remove expired entries, returning how many were dropped"""
+        with self._lock:
+            now = self._clock()
+            expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+            for key in expired:
+                self._drop(key)
+            self.stats["expirations"] += len(expired)
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _ensure_sweeper(self):
+        if self._sweeper is not None or self.sweep_interval <= 0:
+            return
+        with self._lock:
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._sweep, name="product-cache-sweeper", daemon=True)
+                self._sweeper.start()
+
+    def _sweep(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                dropped = self.clear_expired()
+                if self.store is not None:
+                    dropped += self.store.purge()
+                if dropped:
+                    logger.debug(f"Product cache dropped {dropped} expired entries")
+            except Exception as e:
+                logger.warning(f"Product cache sweep failed: {e}")
+
+    def close(self):
+        """Stop the background expiry thread and close the store"""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+        if self.store is not None:
+            self.store.close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Size, budgets and hit/miss/eviction counters"""
+        with self._lock:
+            stats = dict(self.stats)
+            entries, size = len(self._entries), self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+            "refreshing": len(self._refreshing),
+            "hit_rate": round(stats["hits"] / lookups, 3) if lookups else None,
+            **stats,
+            "store": self.store.snapshot() if self.store is not None else None,
+        }
+
+
+_cache: Optional[ProductCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_product_cache() -> ProductCache:
+    """Process-wide product cache shared by every search"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProductCache(store=open_cache_store())
+        return _cache
+
+
+def close_product_cache():
+    """Stop the shared cache's expiry thread and close its store (FastAPI shutdown)"""
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
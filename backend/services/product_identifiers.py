@@ -0,0 +1,217 @@
+# services/product_identifiers.py
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+from urllib.parse import parse_qs, urlsplit
+
+from services.cache_store import decode_value, encode_value
+from tools.query_canonicalizer import normalize_query
+from tools.scraper_config import env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  ".cache", "product_index.sqlite3")
+
+ASIN_PATH = re.compile(r'/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?=[/?#]|$)', re.IGNORECASE)
+FLIPKART_ITEM = re.compile(r'/p/(itm[0-9a-z]+)', re.IGNORECASE)
+FLIPKART_PID = re.compile(r'^[A-Z0-9]{16}$')
+
+# Model-like tokens that are really specs shared by many products
+# (RAM, CPUs, GPUs, resolutions, refresh rates, OS versions)
+SPEC_TOKEN = re.compile(
+    r'^(?:\d+(?:\.\d+)?(?:gb|tb|mb|mah|w|hz|mp|inch|cm|mm|ghz|nm|v|th|nd|rd|st)'
+    r'|i[3579]-?\d{4,5}[a-z]{0,2}|\d{4,5}[a-z]{1,2}|(?:rtx|gtx|rx|mx)-?\d{3,4}[a-z]*|(?:lp)?ddr\d[x]?-?\d*'
+    r'|\d+x\d+|\d+k\d+hz|win\d+)$'
+)
+TOKEN = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*')
+
+
+def extract_model_numbers(text: str) -> Set[str]:
+    """Manufacturer model codes in a title (e.g. '15s-fq5111TU', '82K201UHIN'), hyphens removed"""
+    models = set()
+    for token in TOKEN.findall(normalize_query(text)):
+        compact = token.replace('-', '')
+        digits = sum(ch.isdigit() for ch in compact)
+        if len(compact) >= 5 and digits >= 2 and digits < len(compact) and not SPEC_TOKEN.match(token):
+            models.add(compact)
+    return models
+
+
+def listing_name(item: Dict[str, Any]) -> str:
+    """Title of a listing; scrapers call it product_name, older code name"""
+    return item.get("product_name") or item.get("name") or ""
+
+
+def extract_identifiers(item: Dict[str, Any]) -> List[str]:
+    """Stable identifiers of a listing from its URL, product id, name and specs.
+
+    Returned namespaced: 'asin:B0BWQM5WHC', 'fkpid:COMGFB2GSG8EQXCQ', 'fkitm:itm6ac6485515ae4'
+    and 'model:15sfq5111tu'.
+    """
+    identifiers = []
+    url = item.get("product_url") or ""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    source = (item.get("source") or ("flipkart" if "flipkart" in host else "amazon" if "amazon" in host else "")).lower()
+    product_id = (item.get("product_id") or "").strip()
+
+    if source == "amazon" or "amazon" in host:
+        match = ASIN_PATH.search(parts.path)
+        asin = match.group(1) if match else product_id
+        if len(asin) == 10 and asin.isalnum():
+            identifiers.append(f"asin:{asin.upper()}")
+    if source == "flipkart" or "flipkart" in host:
+        pid = parse_qs(parts.query).get("pid", [product_id])[0].upper()
+        if FLIPKART_PID.match(pid):
+            identifiers.append(f"fkpid:{pid}")
+        match = FLIPKART_ITEM.search(parts.path)
+        if match:
+            identifiers.append(f"fkitm:{match.group(1).lower()}")
+
+    texts = [listing_name(item)]
+    specs = item.get("key_specifications") or item.get("specs") or []
+    texts.extend(spec for spec in (specs if isinstance(specs, list) else [specs]) if isinstance(spec, str))
+    models = set().union(*(extract_model_numbers(text) for text in texts if text))
+    identifiers.extend(f"model:{model}" for model in sorted(models))
+    return identifiers
+
+
+class ProductIndex:
+    """Identifier -> latest known listing per source, in memory with a SQLite copy.
+
+    Lookups hit an in-memory LRU dict; misses fall back to the SQLite table (a
+    primary-key lookup) and are promoted, so identifiers seen in earlier searches,
+    or before a restart, resolve without rescraping or fuzzy matching.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        path = path if path is not None else env_str("PRODUCT_INDEX_PATH", DEFAULT_INDEX_PATH)
+        self.path = None if path.lower() in ("", "none") else path
+        self.max_entries = max_entries or env_int("PRODUCT_INDEX_MAX_ENTRIES", 20000)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {"indexed": 0, "lookups": 0, "memory_hits": 0, "store_hits": 0, "misses": 0, "store_errors": 0}
+        self._conn = None
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS product_identifiers (identifier TEXT NOT NULL, source TEXT NOT NULL, "
+                "listing BLOB NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (identifier, source))")
+
+    def _remember(self, identifier: str, listings: Dict[str, Dict[str, Any]]):
+        """Store in the memory LRU; caller holds the lock"""
+        current = self._entries.pop(identifier, {})
+        current.update(listings)
+        self._entries[identifier] = current
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def add_many(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Index listings under each of their identifiers; returns how many identifiers were written"""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for item in items:
+                if item.get("fallback"):
+                    # Curated stand-ins with static prices, not listings anyone scraped
+                    continue
+                source = item.get("source") or "unknown"
+                for identifier in item.get("identifiers") or extract_identifiers(item):
+                    self._remember(identifier, {source: item})
+                    rows.append((identifier, source, encode_value(item), now))
+            self.stats["indexed"] += len(rows)
+            if self._conn is not None and rows:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO product_identifiers (identifier, source, listing, updated_at) "
+                        "VALUES (?, ?, ?, ?)", rows)
+                except sqlite3.Error as e:
+                    self.stats["store_errors"] += 1
+                    logger.warning(f"Product index write failed: {e}")
+        return len(rows)
+
+    def add(self, item: Dict[str, Any]) -> int:
+        return self.add_many([item])
+
+    def lookup(self, identifier: str) -> Dict[str, Dict[str, Any]]:
+        """Latest listing per source for one namespaced identifier ({} when unknown)"""
+        with self._lock:
+            self.stats["lookups"] += 1
+            listings = self._entries.get(identifier)
+            if listings is not None:
+                self._entries.move_to_end(identifier)
+                self.stats["memory_hits"] += 1
+                return dict(listings)
+            if self._conn is not None:
+                try:
+                    rows = self._conn.execute(
+                        "SELECT source, listing FROM product_identifiers WHERE identifier = ?", (identifier,)).fetchall()
+                except sqlite3.Error as e:
+                    self.stats["store_errors"] += 1
+                    logger.warning(f"Product index read failed: {e}")
+                    rows = []
+                if rows:
+                    listings = {source: decode_value(blob) for source, blob in rows}
+                    self._remember(identifier, listings)
+                    self.stats["store_hits"] += 1
+                    return dict(listings)
+            self.stats["misses"] += 1
+            return {}
+
+    def find(self, item_or_url: Union[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Known listings per source for a listing, product URL or title, via any of its identifiers"""
+        if isinstance(item_or_url, str):
+            item_or_url = {"product_url": item_or_url} if "://" in item_or_url else {"name": item_or_url}
+        item = item_or_url
+        found: Dict[str, Dict[str, Any]] = {}
+        for identifier in extract_identifiers(item):
+            for source, listing in self.lookup(identifier).items():
+                found.setdefault(source, listing)
+        return found
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = None
+            if self._conn is not None:
+                try:
+                    stored = self._conn.execute("SELECT COUNT(*) FROM product_identifiers").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+            return {"identifiers": len(self._entries), "max_entries": self.max_entries, "path": self.path,
+                    "stored_rows": stored, **self.stats}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_index: Optional[ProductIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_product_index() -> ProductIndex:
+    """Process-wide identifier index shared by every search"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ProductIndex()
+        return _index
+
+
+def close_product_index():
+    global _index
+    with _index_lock:
+        index, _index = _index, None
+    if index is not None:
+        index.close()
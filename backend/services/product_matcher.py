@@ -0,0 +1,181 @@
+# services/product_matcher.py
+import random
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from services.product_identifiers import TOKEN, extract_identifiers, listing_name
+from tools.query_canonicalizer import normalize_query
+
+# Title words that say nothing about which product a listing is
+NOISE_WORDS = frozenset({
+    'a', 'an', 'and', 'the', 'with', 'for', 'of', 'in', 'on', 'by', 'to', 'new', 'latest', 'edition',
+    'ram', 'storage', 'memory', 'colour', 'color',
+})
+
+# Words that name a different variant of the same line ('iPhone 15' vs 'iPhone 15 Plus')
+VARIANT_WORDS = frozenset({
+    'plus', 'pro', 'max', 'mini', 'ultra', 'lite', 'se', 'fe', 'neo', 'air', 'prime', 'note', '4g', '5g',
+})
+
+MEASURE = re.compile(r'^\d+(?:\.\d+)?([a-z]+)$')
+PRICE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+# Mersenne prime for the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+
+def listing_price(item: Dict[str, Any]) -> Optional[float]:
+    """Price of a listing as a number: price_numeric, else current_price (a number or text like '₹39,990')"""
+    for price in (item.get("price_numeric"), item.get("current_price")):
+        if isinstance(price, str):
+            match = PRICE.search(price)
+            price = float(match.group().replace(",", "")) if match else None
+        if isinstance(price, (int, float)) and price > 0:
+            return float(price)
+    return None
+
+
+def _conflicting(a: FrozenSet[str], b: FrozenSet[str]) -> bool:
+    """Titles that differ in a variant word, a plain number or a value of the same unit (128gb vs 256gb)"""
+    only_a, only_b = a - b, b - a
+    if (only_a | only_b) & VARIANT_WORDS:
+        return True
+    if any(token.isdigit() for token in only_a) and any(token.isdigit() for token in only_b):
+        return True
+    units_a = {m.group(1) for m in map(MEASURE.match, only_a) if m}
+    return any(m and m.group(1) in units_a for m in map(MEASURE.match, only_b))
+
+
+@dataclass
+class ProductCluster:
+    """Listings of one product, possibly from several marketplaces"""
+    listings: List[Dict[str, Any]] = field(default_factory=list)
+    model_numbers: Set[str] = field(default_factory=set)
+    shingles: List[FrozenSet[str]] = field(default_factory=list)
+
+    def best_prices(self) -> Dict[str, Dict[str, Any]]:
+        """Cheapest priced listing per source"""
+        best, prices = {}, {}
+        for item in self.listings:
+            price = listing_price(item)
+            if price is None:
+                continue
+            source = item.get("source", "unknown")
+            if source not in best or price < prices[source]:
+                best[source], prices[source] = item, price
+        return best
+
+    def to_result(self) -> Dict[str, Any]:
+        """The first listing, annotated with the best offer from each source"""
+        best = self.best_prices()
+        cheapest = min(best.values(), key=listing_price, default=None)
+        return {
+            **self.listings[0],
+            "offers": {
+                source: {"price": listing_price(item), "current_price": item.get("current_price"),
+                         "product_url": item.get("product_url", "N/A"), "name": listing_name(item) or "N/A"}
+                for source, item in best.items()
+            },
+            "best_price": listing_price(cheapest) if cheapest else None,
+            "best_source": cheapest.get("source") if cheapest else None,
+            "model_numbers": sorted(self.model_numbers),
+            "duplicates": len(self.listings) - 1,
+        }
+
+
+class ProductMatcher:
+    """Online near-duplicate clustering of listings across marketplaces.
+
+    Titles are reduced to word shingles with a MinHash signature; LSH bands bucket
+    the signatures, so a listing is only compared with the few clusters sharing a
+    band and clustering stays roughly linear. Listings sharing a marketplace ID (ASIN,
+    Flipkart pid/item id) are merged outright. A shared model number only lowers the
+    title similarity needed to `model_threshold`, and listings whose model numbers
+    differ are never merged.
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 36, bands: int = 12, max_tokens: int = 12,
+                 seed: int = 1, model_threshold: float = 0.3):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.model_threshold = model_threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Marketplace titles lead with brand and model; the tail is feature lists that differ per site
+        self.max_tokens = max_tokens
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._clusters: List[ProductCluster] = []
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._by_identifier: Dict[str, int] = {}
+        self.comparisons = 0
+
+    def shingles(self, name: str) -> FrozenSet[str]:
+        tokens = [token for token in TOKEN.findall(normalize_query(name)) if token not in NOISE_WORDS]
+        return frozenset(tokens[:self.max_tokens])
+
+    def signature(self, shingles: FrozenSet[str]) -> List[int]:
+        hashes = [zlib.crc32(shingle.encode()) for shingle in shingles] or [0]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, signature: List[int]):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def _matches(self, cluster: ProductCluster, shingles: FrozenSet[str], models: Set[str]) -> bool:
+        if models and cluster.model_numbers and not models & cluster.model_numbers:
+            return False
+        threshold = self.model_threshold if models & cluster.model_numbers else self.threshold
+        self.comparisons += 1
+        return any(len(shingles & other) / len(shingles | other) >= threshold
+                   and not _conflicting(shingles, other)
+                   for other in cluster.shingles if shingles | other)
+
+    def add(self, item: Dict[str, Any]) -> Tuple[ProductCluster, bool]:
+        """File a listing under its product; returns the cluster and whether it is new"""
+        shingles = self.shingles(listing_name(item))
+        identifiers = item.get("identifiers") or extract_identifiers(item)
+        models = {identifier[len("model:"):] for identifier in identifiers if identifier.startswith("model:")}
+        band_keys = list(self._band_keys(self.signature(shingles)))
+
+        match: Optional[int] = next((self._by_identifier[identifier] for identifier in identifiers
+                                     if identifier in self._by_identifier and not identifier.startswith("model:")),
+                                    None)
+        if match is None:
+            # Model codes can be misread from titles, so they only widen the candidates
+            shared = [self._by_identifier[f"model:{model}"] for model in models
+                      if f"model:{model}" in self._by_identifier]
+            candidates = dict.fromkeys(shared + [index for key in band_keys for index in self._buckets.get(key, ())])
+            match = next((index for index in candidates
+                          if self._matches(self._clusters[index], shingles, models)), None)
+
+        new = match is None
+        if new:
+            match = len(self._clusters)
+            self._clusters.append(ProductCluster())
+        cluster = self._clusters[match]
+        cluster.listings.append(item)
+        cluster.model_numbers |= models
+        if shingles not in cluster.shingles:
+            cluster.shingles.append(shingles)
+            for key in band_keys:
+                bucket = self._buckets.setdefault(key, [])
+                if match not in bucket:
+                    bucket.append(match)
+        for identifier in identifiers:
+            self._by_identifier.setdefault(identifier, match)
+        return cluster, new
+
+    def clusters(self) -> List[ProductCluster]:
+        return list(self._clusters)
+
+
+def cluster_listings(items: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+    """Group near-duplicate listings; one result per product with its best price per source"""
+    matcher = ProductMatcher(**kwargs)
+    for item in items:
+        matcher.add(item)
+    return [cluster.to_result() for cluster in matcher.clusters()]
@@ -49,6 +49,13 @@ class ScrapingTracker:
         except Exception as e:
             print(f"Error updating scraping session: {e}")
     
+    def mark_sources_in_flight(self, session_id: str, sources: List[str]):
+        """Report which marketplaces are being scraped right now"""
+        if len(sources) == 1:
+            self.update_status(session_id, f"scraping_{sources[0]}", sources[0])
+        else:
+            self.update_status(session_id, "scraping_both", ",".join(sources))
+    
     def update_product_count(self, session_id: str, amazon_count: int = 0, flipkart_count: int = 0):
         """Update product counts for the session"""
         total_products = amazon_count + flipkart_count
@@ -70,7 +77,7 @@ class ScrapingTracker:
             for product in products:
                 products_to_insert.append({
                     "session_id": session_id,
-                    "product_name": product.get("name", "Unknown"),
+                    "product_name": product.get("product_name") or product.get("name", "Unknown"),
                     "product_url": product.get("product_url"),
                     "image_url": product.get("image_url"),
                     "current_price": product.get("current_price"),
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Compare Playwright scrapes with and without resource blocking (fast mode).
+
+Usage:
+    python tests/benchmark_browser_modes.py ["search term" ...] [--rounds N]
+
+Each search runs on Amazon and Flipkart in full and fast mode, alternating so
+network conditions affect both equally, then prints the average bandwidth and
+page-ready latency per mode and what fast mode saves per search. Needs
+Playwright and its Chromium build (playwright install chromium).
+"""
+
+import sys
+import os
+import json
+import asyncio
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.browser_pool import get_browser_pool, close_browser_pool
+from tools.resource_blocking import get_resource_report
+from tools.web_scraper import scrape_amazon, scrape_flipkart
+
+
+async def run(searches, rounds):
+    pool = get_browser_pool()
+    for _ in range(rounds):
+        for search in searches:
+            for fast in (False, True):
+                for scrape in (scrape_amazon, scrape_flipkart):
+                    try:
+                        await pool.run(scrape, search, 5, fast=fast)
+                    except Exception as e:
+                        print(f"⚠️ {scrape.__name__} ({'fast' if fast else 'full'}) failed for {search!r}: {e}")
+    await close_browser_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("searches", nargs="*", default=["laptop", "wireless earbuds"])
+    parser.add_argument("--rounds", type=int, default=2)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.searches, args.rounds))
+    print(json.dumps(get_resource_report().snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
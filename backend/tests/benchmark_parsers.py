@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML parser backends on search result pages, parsing either the
+whole page or only the result containers (scoped parsing).
+
+Usage:
+    python tests/benchmark_parsers.py [page.html ...] [--iterations N]
+
+Pass pages saved from a browser for numbers that mean anything; a page is
+treated as Amazon or Flipkart based on its file name. With no pages given, the
+synthetic pages from tests/synthetic_pages.py are generated and used. Their
+filler markup is not a real marketplace page, so treat those results as a
+smoke test of the benchmark, not as backend speedups.
+"""
+
+import sys
+import os
+import time
+import logging
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.enhanced_web_scraper import EnhancedWebScraper
+from tools.html_parsers import available_backends
+from synthetic_pages import SYNTHETIC_PAGES
+
+
+def synthetic_pages():
+    """Generated pages, used when no saved pages are given"""
+    return [(f"{name} (synthetic)", site, page()) for name, (site, page) in SYNTHETIC_PAGES.items()]
+
+
+def load_pages(paths):
+    """Read saved pages and tag each with its marketplace"""
+    pages = []
+    for path in paths:
+        name = os.path.basename(path).lower()
+        site = "flipkart" if "flipkart" in name else "amazon"
+        with open(path, "rb") as f:
+            pages.append((name, site, f.read()))
+    return pages
+
+
+def parse_page(scraper, site, content):
+    if site == "amazon":
+        return scraper.parse_amazon_results(content, max_results=50)
+    return scraper.parse_flipkart_results(content, max_results=50)
+
+
+def benchmark_backend(backend, scoped, pages, iterations):
+    """Parse and extract every page `iterations` times, returning pages/sec, products/page and peak KB/page"""
+    scraper = EnhancedWebScraper(parser_backend=backend, scoped_parsing=scoped)
+    products = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for _, site, content in pages:
+            products += len(parse_page(scraper, site, content))
+    elapsed = time.perf_counter() - start
+    total_pages = iterations * len(pages)
+
+    peaks = []
+    for _, site, content in pages:
+        tracemalloc.start()
+        parse_page(scraper, site, content)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return total_pages / elapsed, products / total_pages, sum(peaks) / len(peaks) / 1024
+
+
+def main():
+    args = sys.argv[1:]
+    iterations = 20
+    if "--iterations" in args:
+        index = args.index("--iterations")
+        iterations = int(args[index + 1])
+        del args[index:index + 2]
+
+    pages = load_pages(args) if args else synthetic_pages()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print("📊 HTML parser backend benchmark")
+    print("=" * 60)
+    print(f"Pages: {', '.join(name for name, _, _ in pages)}")
+    print(f"Iterations: {iterations}")
+    if not args:
+        print("Synthetic pages: generated filler markup, not saved marketplace pages")
+    print("-" * 60)
+
+    results = {}
+    for backend in available_backends():
+        for scoped in (False, True):
+            mode = "scoped" if scoped else "full"
+            pages_per_sec, products_per_page, peak_kb = benchmark_backend(backend, scoped, pages, iterations)
+            results[(backend, mode)] = pages_per_sec
+            print(f"{backend:<12} {mode:<7} {pages_per_sec:8.1f} pages/sec   "
+                  f"{products_per_page:5.1f} products/page   {peak_kb:8.0f} KB peak/page")
+
+    baseline = results.get(("html.parser", "full"))
+    if baseline:
+        print("-" * 60)
+        for (backend, mode), pages_per_sec in results.items():
+            if (backend, mode) != ("html.parser", "full"):
+                print(f"{backend} ({mode}) is {pages_per_sec / baseline:.1f}x html.parser (full)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Replay a search query log against raw and canonical cache keys.
+
+Usage:
+    python tests/benchmark_query_canonicalization.py [queries.txt ...]
+
+Each file holds one query per line, either plain text or a JSON object with a
+"query_text" (search_queries table export) or "query" field. Every query is
+looked up in an unbounded cache keyed first by the raw search term (the old
+keys) and then by canonical_query(); the hit rates show how many scrapes
+canonicalization saves. Without files a small built-in sample is replayed.
+"""
+
+import sys
+import os
+import json
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.query_canonicalizer import canonical_query
+
+SAMPLE_QUERIES = [
+    "Gaming Laptop", "gaming laptop", "gaming  laptop", "laptop gaming", "Laptop for Gaming",
+    "gaming laptop under 60000", "Gaming laptop under Rs. 60,000", "gaming laptop below ₹60k",
+    "wireless earbuds", "Wireless Earbuds", "earbuds wireless", "best wireless earbuds",
+    "iPhone 15", "iphone 15", "mechanical keyboard", "Mechanical Keyboard!", "keyboard mechanical",
+    "27 inch monitor", '27" monitor', "27-inch Monitor", "1 TB SSD", "1tb ssd", "ssd 1 tb",
+]
+
+
+def read_queries(paths):
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith("{"):
+                    record = json.loads(line)
+                    line = record.get("query_text") or record.get("query") or ""
+                if line:
+                    yield line
+
+
+def replay(queries, key):
+    seen, hits = set(), 0
+    for query in queries:
+        k = key(query)
+        if k in seen:
+            hits += 1
+        seen.add(k)
+    return hits, len(seen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("logs", nargs="*")
+    args = parser.parse_args()
+
+    queries = list(read_queries(args.logs)) if args.logs else SAMPLE_QUERIES
+    if not queries:
+        print("No queries found")
+        return
+    raw_hits, raw_keys = replay(queries, lambda q: q)
+    canonical_hits, canonical_keys = replay(queries, canonical_query)
+    print(json.dumps({
+        "queries": len(queries),
+        "raw": {"distinct_keys": raw_keys, "hits": raw_hits, "hit_rate": round(raw_hits / len(queries), 3)},
+        "canonical": {"distinct_keys": canonical_keys, "hits": canonical_hits,
+                      "hit_rate": round(canonical_hits / len(queries), 3)},
+        # Each miss scrapes Amazon and Flipkart
+        "scrapes_saved": 2 * (canonical_hits - raw_hits),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
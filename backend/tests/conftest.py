@@ -0,0 +1,43 @@
+# conftest.py - Shared fixtures for the backend tests
+import sys
+import os
+from contextlib import contextmanager
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from services.product_cache import close_product_cache, get_product_cache
+from services.product_identifiers import close_product_index, get_product_index
+
+# Memory-only stores with no expiry thread, so tests neither read nor leave on-disk state
+ISOLATED_STORES_ENV = {
+    "PRODUCT_CACHE_STORE": "none",
+    "PRODUCT_CACHE_SWEEP_SECONDS": "0",
+    "PRODUCT_INDEX_PATH": "none",
+}
+
+
+@contextmanager
+def fresh_product_stores():
+    """Fresh process-wide product cache and identifier index, closed again on exit"""
+    saved = {name: os.environ.get(name) for name in ISOLATED_STORES_ENV}
+    os.environ.update(ISOLATED_STORES_ENV)
+    close_product_cache()
+    close_product_index()
+    try:
+        yield get_product_cache(), get_product_index()
+    finally:
+        close_product_cache()
+        close_product_index()
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@pytest.fixture
+def product_stores():
+    """The (cache, index) pair every EnhancedDataSources in the test shares"""
+    with fresh_product_stores() as stores:
+        yield stores
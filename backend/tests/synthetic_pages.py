@@ -0,0 +1,135 @@
+# synthetic_pages.py - Synthetic Amazon/Flipkart laptop search pages for parser tests and benchmarks
+"""
+Generated stand-ins for saved marketplace search result pages.
+
+These are NOT captured pages: the product cards copy the markup our selectors
+target, and the rest is filler (navigation/refinement blocks, repeated inline
+scripts) that only bulks the document up to a realistic size. Parser speed
+and "same output on every backend" results measured on them say nothing about
+real pages; pass saved pages to tests/benchmark_parsers.py for that.
+
+The pages are deterministic (seeded), so tests can assert on their products.
+"""
+
+import random
+from functools import lru_cache
+
+BRANDS = ['HP', 'Dell', 'Lenovo', 'ASUS', 'Acer', 'MSI', 'Apple', 'Samsung']
+CPUS = ['Intel Core i5-1235U', 'AMD Ryzen 5 5600H', 'Intel Core i7-1255U', 'AMD Ryzen 7 5800H', 'Intel Core i3-1115G4']
+MODELS = ['15s-fq5111TU', '82K201UHIN', 'X515EA-EJ312WS', 'A515-56', 'Inspiron 3520', 'Modern 14 B11MOU',
+          'VivoBook 16X', 'IdeaPad Slim 3']
+
+
+def noise(n):
+    """Filler blocks standing in for navigation, refinements and footers"""
+    return "\n".join(
+        f'<div class="a-section a-spacing-none nav-filler-{i % 7}"><span class="a-color-secondary">Filter option {i}'
+        f'</span><a class="a-link-normal s-navigation-item" href="/s?rh=n%3A{i}">Refine {i}</a></div>'
+        for i in range(n))
+
+
+def _code(rng, alphabet, length):
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def _amazon_page(rng):
+    rows = []
+    for i in range(24):
+        b = rng.choice(BRANDS)
+        c = rng.choice(CPUS)
+        m = rng.choice(MODELS)
+        a = "B0" + _code(rng, "ABCDEFGHJKLMNPQRSTUVWXYZ0123456789", 8)
+        price = rng.randint(28, 95) * 1000 + 990
+        ram = rng.choice([8, 16])
+        ssd = rng.choice([256, 512, 1024])
+        name = f"{b} {m} Laptop, {c}, {ram}GB RAM, {ssd}GB SSD, Windows 11"
+        slug = name.replace(' ', '-').replace(',', '')[:60]
+        # Every sixth result is a sponsored card whose first link is a click tracker
+        if i % 6 == 0:
+            first_link = f'/sspa/click?ie=UTF8&spc=MTo{i}&url=%2Fdp%2F{a}'
+        else:
+            first_link = f'/{slug}/dp/{a}/ref=sr_1_{i+1}?keywords=laptop&qid=1700000000&sr=8-{i+1}'
+        rows.append(f'''<div data-asin="{a}" data-index="{i+2}" data-uuid="uuid-{i}" data-component-type="s-search-result" class="sg-col-4-of-24 sg-col-4-of-12 s-result-item s-asin sg-col-4-of-16 sg-col s-widget-spacing-small sg-col-4-of-20">
+ <div class="sg-col-inner"><div cel_widget_id="MAIN-SEARCH_RESULTS-{i+2}" class="s-widget-container s-spacing-small s-widget-container-height-small celwidget slot=MAIN template=SEARCH_RESULTS widgetId=search-results_{i+1}">
+  <span class="a-declarative"><div class="puis-card-container s-card-container s-overflow-hidden aok-relative puis-include-content-margin puis puis-v2 s-latency-cf-section puis-card-border">
+   <div class="a-section a-spacing-base"><div class="s-product-image-container aok-relative s-text-center s-image-overlay-grey puis-image-overlay-grey s-padding-left-small s-padding-right-small puis-spacing-small s-height-equalized puis puis-v2">
+    <span data-component-type="s-product-image" class="rush-component"><a class="a-link-normal s-no-outline" tabindex="-1" href="{first_link}"><div class="a-section aok-relative s-image-fixed-height">
+     <img class="s-image" src="https://m.media-amazon.com/images/I/{a}._AC_UY218_.jpg" srcset="https://m.media-amazon.com/images/I/{a}._AC_UY218_.jpg 1x, https://m.media-amazon.com/images/I/{a}._AC_UY327_QL65_.jpg 1.5x" alt="{name}" data-image-index="{i+1}" data-image-load="" data-image-latency="s-product-image" data-image-source-density="1"/>
+    </div></a></span></div>
+    <div class="a-section a-spacing-small puis-padding-left-small puis-padding-right-small">
+     <div data-cy="title-recipe" class="a-section a-spacing-none a-spacing-top-small s-title-instructions-style">
+      <h2 class="a-size-mini a-spacing-none a-color-base s-line-clamp-4"><a class="a-link-normal s-underline-text s-underline-link-text s-link-style a-text-normal" href="/{slug}/dp/{a}/ref=sr_1_{i+1}?keywords=laptop"><span class="a-size-base-plus a-color-base a-text-normal">{name}</span></a></h2>
+     </div>
+     <div data-cy="reviews-block" class="a-section a-spacing-none a-spacing-top-micro"><div class="a-row a-size-small"><span aria-label="4.{i%10} out of 5 stars"><span class="a-declarative"><a href="javascript:void(0)" role="button" class="a-popover-trigger a-declarative"><i class="a-icon a-icon-star-small a-star-small-4 aok-align-bottom"><span class="a-icon-alt">4.{i%10} out of 5 stars</span></i></a></span></span><span aria-label="{rng.randint(10,5000)}"><a class="a-link-normal s-underline-text s-underline-link-text s-link-style" href="/{slug}/dp/{a}/#customerReviews"><span class="a-size-base s-underline-text">{rng.randint(10,5000):,}</span></a></span></div></div>
+     <div data-cy="price-recipe" class="a-section a-spacing-none a-spacing-top-small s-price-instructions-style"><div class="a-row a-size-base a-color-base"><a class="a-link-normal s-no-hover s-underline-text s-underline-link-text s-link-style a-text-normal" href="/{slug}/dp/{a}/"><span class="a-price" data-a-size="xl" data-a-color="base"><span class="a-offscreen">₹{price:,}</span><span aria-hidden="true"><span class="a-price-symbol">₹</span><span class="a-price-whole">{price:,}<span class="a-price-decimal">.</span></span><span class="a-price-fraction">00</span></span></span></a></div></div>
+     <div data-cy="delivery-recipe" class="a-section a-spacing-none a-spacing-top-micro"><div class="a-row a-size-base a-color-secondary s-align-children-center"><span aria-label="FREE delivery Sat, 18 Oct"><span class="a-color-base">FREE delivery </span><span class="a-color-base a-text-bold">Sat, 18 Oct</span></span></div></div>
+    </div>
+   </div>
+  </div></span>
+ </div></div>
+</div>''')
+    return f'''<!doctype html><html lang="en-in" class="a-no-js"><head><meta charset="utf-8"/><title>Amazon.in : laptop</title>
+<script>window.ue_t0=+new Date();{"var x=1;"*200}</script><link rel="stylesheet" href="https://m.media-amazon.com/images/I/style.css"/></head>
+<body class="a-m-in a-aui_72554-c"><div id="a-page"><header id="navbar-main">{noise(150)}</header>
+<div class="s-desktop-width-max s-desktop-content s-opposite-dir s-wide-grid-style sg-row">
+<div class="sg-col-4-of-24 sg-col-4-of-12 s-matching-dir sg-col-4-of-16 sg-col sg-col-4-of-20" id="s-refinements">{noise(250)}</div>
+<div class="sg-col-20-of-24 s-matching-dir sg-col-12-of-16 sg-col sg-col-8-of-12 sg-col-16-of-20"><div class="s-main-slot s-result-list s-search-results sg-row">
+<div data-asin="" data-index="0" class="sg-col-20-of-24 s-result-item s-flex-full-width sg-col-12-of-16 sg-col sg-col-16-of-20"><span class="a-size-medium-plus a-color-base a-text-normal">Results</span></div>
+{chr(10).join(rows)}
+</div></div></div>
+<footer class="navLeftFooter">{noise(120)}</footer></div>
+<script>{"P.when('A').execute(function(){});"*300}</script></body></html>'''
+
+
+def _flipkart_page(rng):
+    rows = []
+    for i in range(24):
+        b = rng.choice(BRANDS)
+        c = rng.choice(CPUS)
+        m = rng.choice(MODELS)
+        price = rng.randint(28, 95) * 1000 + 990
+        ram = rng.choice([8, 16])
+        ssd = rng.choice([256, 512, 1024])
+        name = f"{b} {m} {c} - ({ram} GB/{ssd} GB SSD/Windows 11 Home) Thin and Light Laptop"
+        pid = "COM" + _code(rng, "ABCDEFGHJKLMNPQRSTUVWXYZ0123456789", 13)
+        itm = "itm" + _code(rng, "0123456789abcdef", 13)
+        slug = name.lower().replace(' ', '-').replace('(', '').replace(')', '').replace('/', '-')[:50]
+        rows.append(f'''<div class="_1AtVbE col-12-12"><div class="_13oc-S"><div data-id="{pid}" style="width:100%"><div class="_2kHMtA">
+ <a class="_1fQZEK" target="_blank" rel="noopener noreferrer" href="/{slug}/p/{itm}?pid={pid}&amp;lid=LST{pid}&amp;marketplace=FLIPKART&amp;q=laptop">
+  <div class="MIXNux"><div class="_2QcLo-"><div><div class="CXW8mj" style="height:200px;width:200px"><img class="_396cs4" alt="{name}" src="https://rukminim2.flixcart.com/image/312/312/xif0q/computer/{pid.lower()}.jpeg?q=70" loading="eager"/></div></div></div></div>
+  <div class="_3pLy-c row"><div class="col col-7-12"><div class="_4rR01T">{name}</div>
+   <div class="gUuXy-"><span class="_1lRcqv"><div class="_3LWZlK">4.{i%10}<img class="_1wB99o" src="data:image/svg+xml;base64,PHN2Zz4="/></div></span><span class="_2_R_DZ"><span>{rng.randint(100,9000):,} Ratings&amp; {rng.randint(10,900)} Reviews</span></span></div>
+   <div class="fMghEO"><ul class="_1xgFaf"><li class="rgWa7D">{c} Processor</li><li class="rgWa7D">{ram} GB DDR4 RAM</li><li class="rgWa7D">{ssd} GB SSD</li><li class="rgWa7D">39.62 cm (15.6 inch) Display</li><li class="rgWa7D">1 Year Onsite Warranty</li></ul></div></div>
+   <div class="col col-5-12 nlI3QM"><div class="_3tbKJL"><div class="_25b18c"><div class="_30jeq3 _1_WHN1">₹{price:,}</div><div class="_3I9_wc _27UcVY">₹{price+12000:,}</div><div class="_3Ay6Sb"><span>{rng.randint(5,40)}% off</span></div></div></div><div class="_2Tpdn3 _18hQoS">Free delivery</div></div></div>
+ </a></div></div></div></div>''')
+    return f'''<!doctype html><html lang="en"><head><meta charset="utf-8"/><title>Laptop- Buy Products Online at Best Price in India - All Categories | Flipkart.com</title>
+<script>window.__INITIAL_STATE__={{"pageDataV4":{{"page":{{"data":{{"10002":[{",".join('{"slotType":"WIDGET","id":%d}'%k for k in range(400))}]}}}}}}}};</script><link rel="stylesheet" href="https://static-assets-web.flixcart.com/fk-p-linchpin-web/app.css"/></head>
+<body><div id="container"><div class="_1kfTjk"><div class="_3ybBIU">{noise(120)}</div></div>
+<div class="_36fx1h _6t1WkM _3HqJxg"><div class="_1YokD2 _2GoDe3"><div class="_1YokD2 _3Mn1Gg col-2-12">{noise(200)}</div>
+<div class="_1YokD2 _3Mn1Gg col-10-12">
+{chr(10).join(rows)}
+</div></div></div><footer class="_1ZMrY_">{noise(80)}</footer></div></body></html>'''
+
+
+@lru_cache(maxsize=None)
+def _pages():
+    # One seeded generator for both pages, Amazon first, so the products never change
+    rng = random.Random(7)
+    amazon = _amazon_page(rng)
+    return amazon.encode("utf-8"), _flipkart_page(rng).encode("utf-8")
+
+
+def amazon_search_page() -> bytes:
+    """Synthetic Amazon.in search results for "laptop": 24 product cards, 4 of them sponsored"""
+    return _pages()[0]
+
+
+def flipkart_search_page() -> bytes:
+    """Synthetic Flipkart search results for "laptop": 24 list-layout product cards"""
+    return _pages()[1]
+
+
+SYNTHETIC_PAGES = {
+    "amazon_search_laptop.html": ("amazon", amazon_search_page),
+    "flipkart_search_laptop.html": ("flipkart", flipkart_search_page),
+}
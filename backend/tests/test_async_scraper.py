@@ -0,0 +1,73 @@
+# test_async_scraper.py - Test the pooled async scraper engine against a local server
+import sys
+import os
+import asyncio
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from aiohttp import web
+
+from tools.async_scraper import AsyncScraperEngine
+from tools.rate_limiter import HostRateLimiter
+
+
+def start_local_server():
+    """Serve a tiny page on a random localhost port from a background thread"""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def page(request):
+        return web.Response(text="<html><body>ok</body></html>", content_type="text/html")
+
+    async def setup():
+        app = web.Application()
+        app.router.add_get("/s", page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        state["port"] = runner.addresses[0][1]
+        state["runner"] = runner
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(setup())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return f"http://127.0.0.1:{state['port']}/s"
+
+
+def test_engine_reuses_one_client_per_host_across_event_loops():
+    """Callers on different event loops share the same pooled client"""
+    print("🧪 Testing pooled async scraper engine")
+    url = start_local_server()
+    engine = AsyncScraperEngine(connections_per_host=2, rate_limiter=HostRateLimiter(rate=1000, burst=100))
+
+    status, body = asyncio.run(engine.fetch(url))
+    first_client = engine._clients["127.0.0.1"]
+    assert status == 200 and b"ok" in body
+
+    # A second asyncio.run() creates a brand new loop, like a CrewAI tool does
+    async def fetch_many():
+        return await asyncio.gather(*(engine.fetch(url) for _ in range(5)))
+
+    statuses = asyncio.run(asyncio.wait_for(fetch_many(), timeout=10))
+    assert [s for s, _ in statuses] == [200] * 5
+    assert engine._clients["127.0.0.1"] is first_client
+    assert first_client.connector.limit_per_host == 2
+
+    # Synchronous callers go through the same engine
+    status, _ = engine.run_sync(engine.fetch(url), timeout=10)
+    assert status == 200
+
+    asyncio.run(engine.close())
+    assert first_client.closed
+    print("   ✅ one client per host, shared across loops and threads")
+
+
+if __name__ == "__main__":
+    test_engine_reuses_one_client_per_host_across_event_loops()
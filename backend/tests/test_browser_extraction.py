@@ -0,0 +1,74 @@
+# test_browser_extraction.py - Test single-round-trip extraction in the Playwright scrapers
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools.web_scraper import scrape_amazon, scrape_flipkart, amazon_product, flipkart_product
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+
+    async def evaluate_all(self, script, arg):
+        self.page.round_trips += 1
+        return self.page.raw_results[:arg]
+
+
+class FakePage:
+    """Counts browser round-trips made after the page is ready"""
+
+    def __init__(self, raw_results):
+        self.raw_results = raw_results
+        self.round_trips = 0
+
+    def on(self, event, handler):
+        pass
+
+    def remove_listener(self, event, handler):
+        pass
+
+    async def goto(self, url, wait_until=None):
+        pass
+
+    async def wait_for_selector(self, selector, timeout=None):
+        pass
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+
+def test_one_round_trip_per_page():
+    """All fields of all results come back from a single evaluate_all call"""
+    print("🧪 Testing bulk browser extraction")
+    raw = {"name": "HP Laptop 15s", "link": "/dp/B0TEST1234", "price_whole": "52,990.",
+           "price_fraction": "00", "offscreen_price": "₹52,990", "image_url": "https://m.media-amazon.com/1.jpg"}
+    page = FakePage([raw] * 20)
+    products = asyncio.run(scrape_amazon(page, "laptop", 8, fast=False))
+    assert len(products) == 8 and page.round_trips == 1
+    assert products[0]["product_url"] == "https://www.amazon.in/dp/B0TEST1234"
+    assert products[0]["current_price"] == 52990.0
+
+    page = FakePage([{"name": "ASUS Vivobook", "link": "/asus/p/itm1?pid=COM1", "price": "₹45,990", "image_url": None}] * 5)
+    products = asyncio.run(scrape_flipkart(page, "laptop", 10, fast=False))
+    assert len(products) == 5 and page.round_trips == 1
+    print("   ✅ 1 round-trip per page instead of one per field")
+
+
+def test_missing_fields_match_locator_defaults():
+    """Absent elements produce the same placeholders as the per-locator reads did"""
+    product = amazon_product({"name": None, "link": None, "price_whole": None, "price_fraction": None,
+                              "offscreen_price": "$1,299.50", "image_url": None})
+    assert product["name"] == "N/A" and product["image_url"] == "N/A" and product["product_url"] == "N/A"
+    assert product["current_price"] == 1299.5
+
+    product = flipkart_product({"name": "Phone", "link": "https://www.flipkart.com/p", "price": "Sold out", "image_url": None})
+    assert product["current_price"] is None and product["product_url"] == "https://www.flipkart.com/p"
+
+
+if __name__ == "__main__":
+    test_one_round_trip_per_page()
+    test_missing_fields_match_locator_defaults()
+    print("✅ Browser extraction tests passed")
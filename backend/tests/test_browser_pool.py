@@ -0,0 +1,263 @@
+# test_browser_pool.py - Test the pooled browser with stand-in Playwright objects
+import sys
+import os
+import time
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import tools.browser_pool as browser_pool
+from tools.browser_pool import BrowserPool
+from tools import web_scraper
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        self.contexts.append(FakeContext())
+        return self.contexts[-1]
+
+    async def close(self):
+        self.closed = True
+        self.connected = False
+
+
+class CrashedBrowser(FakeBrowser):
+    """A browser whose connection dropped; closing what's left of it fails"""
+
+    async def close(self):
+        self.closed = True
+        raise RuntimeError("Target page, context or browser has been closed")
+
+
+def make_pool(**kwargs):
+    browsers = []
+
+    async def launcher():
+        browsers.append(FakeBrowser())
+        return browsers[-1]
+
+    return BrowserPool(launcher=launcher, **kwargs), browsers
+
+
+def test_pages_are_reused_and_bounded():
+    """Sequential scrapes reuse one page; concurrent ones never exceed the pool size"""
+    print("🧪 Testing browser pool")
+    pool, browsers = make_pool(max_contexts=2, pages_per_context=2, max_uses=100)
+    active = {"now": 0, "peak": 0}
+
+    async def scrape(page, delay):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(delay)
+        active["now"] -= 1
+        return id(page)
+
+    async def main():
+        await pool.start()
+        first = await pool.run(scrape, 0)
+        second = await pool.run(scrape, 0)
+        assert first == second
+        await asyncio.gather(*(pool.run(scrape, 0.05) for _ in range(10)))
+
+    asyncio.run(main())
+    snapshot = pool.snapshot()
+    assert len(browsers) == 1 and snapshot["launches"] == 1
+    assert active["peak"] == 4
+    assert snapshot["pages_created"] == 4 and snapshot["contexts"] == 2
+    assert snapshot["leases"] == 12 and snapshot["pages_in_use"] == 0
+    print(f"   ✅ 12 scrapes on {snapshot['pages_created']} pages, peak concurrency {active['peak']}")
+
+
+def test_contexts_recycle_and_browser_relaunches():
+    """Contexts retire after max_uses; a disconnected browser is relaunched"""
+    pool, browsers = make_pool(max_contexts=1, pages_per_context=1, max_uses=3)
+
+    async def scrape(page):
+        return page
+
+    async def main():
+        pages = [await pool.run(scrape) for _ in range(4)]
+        assert pages[0] is pages[1] is pages[2]
+        assert pages[2].closed and pages[3] is not pages[2]
+        assert pool.snapshot()["contexts_recycled"] == 1
+
+        browsers[-1].connected = False
+        await pool.run(scrape)
+
+    asyncio.run(main())
+    assert len(browsers) == 2 and pool.snapshot()["browser_connected"]
+    # The disconnected browser and its contexts were closed, not leaked
+    assert browsers[0].closed and all(context.closed for context in browsers[0].contexts)
+
+
+def test_crashed_browser_is_closed_before_relaunch():
+    """Errors closing a crashed browser don't stop the relaunch"""
+    browsers = [CrashedBrowser(), FakeBrowser()]
+    launched = iter(browsers)
+
+    async def launcher():
+        return next(launched)
+
+    pool = BrowserPool(launcher=launcher, max_contexts=1, pages_per_context=1, max_uses=100)
+
+    async def scrape(page):
+        return page
+
+    async def main():
+        await pool.run(scrape)
+        browsers[0].connected = False
+        return await pool.run(scrape)
+
+    page = asyncio.run(main())
+    assert browsers[0].closed and browsers[0].contexts[0].closed
+    assert page in browsers[1].contexts[0].pages and pool.snapshot()["launches"] == 2
+    print("   ✅ crashed browser closed quietly, then relaunched")
+
+
+def test_failed_scrape_discards_its_page():
+    """A page whose scrape raised is closed rather than handed out again"""
+    pool, _ = make_pool(max_contexts=1, pages_per_context=1, max_uses=100)
+    seen = []
+
+    async def failing(page):
+        seen.append(page)
+        raise RuntimeError("navigation timeout")
+
+    async def ok(page):
+        return page
+
+    async def main():
+        try:
+            await pool.run(failing)
+        except RuntimeError:
+            pass
+        return await pool.run(ok)
+
+    page = asyncio.run(main())
+    assert seen[0].closed and page is not seen[0]
+
+
+class RecordingTracker:
+    def __init__(self):
+        self.statuses = []
+        self.counts = {}
+
+    def update_status(self, session_id, status, current_source=None, error_message=None):
+        self.statuses.append((status, current_source))
+
+    def mark_sources_in_flight(self, session_id, sources):
+        self.update_status(session_id, "scraping_both", ",".join(sources))
+
+    def store_products(self, session_id, products, source):
+        pass
+
+    def update_product_count(self, session_id, amazon_count=0, flipkart_count=0):
+        self.counts = {"amazon": amazon_count, "flipkart": flipkart_count}
+
+
+def test_both_sites_scrape_in_parallel_pages():
+    """Amazon and Flipkart run on separate pooled pages at the same time"""
+    pool, _ = make_pool(max_contexts=1, pages_per_context=2, max_uses=100)
+    pages = set()
+
+    def slow_scraper(source):
+        async def scrape(page, keyword, num_results):
+            pages.add(id(page))
+            await asyncio.sleep(0.3)
+            return [{"name": f"{source} {keyword}", "source": source}] * num_results
+        return scrape
+
+    originals = dict(web_scraper.SITE_SCRAPERS)
+    web_scraper.SITE_SCRAPERS.update(amazon=slow_scraper("Amazon"), flipkart=slow_scraper("Flipkart"))
+    browser_pool._pool = pool
+    tracker = RecordingTracker()
+    try:
+        started = time.monotonic()
+        products = web_scraper.scrape_ecommerce_site("laptop", 2, "both", tracker=tracker, session_id="s1")
+        elapsed = time.monotonic() - started
+    finally:
+        web_scraper.SITE_SCRAPERS.update(originals)
+        browser_pool._pool = None
+
+    assert len(products) == 4 and len(pages) == 2
+    assert elapsed < 0.55
+    assert tracker.statuses == [("scraping_both", "amazon,flipkart"), ("processing", "processing")]
+    assert tracker.counts == {"amazon": 2, "flipkart": 2}
+    print(f"   ✅ both marketplaces scraped in {elapsed:.2f}s on separate pages")
+
+
+def test_async_entry_point_awaits_inside_running_loop():
+    """Coroutines await the async scraper directly; the sync wrapper refuses to nest loops"""
+    pool, _ = make_pool(max_contexts=1, pages_per_context=2, max_uses=100)
+
+    async def scraper(page, keyword, num_results):
+        await asyncio.sleep(0.05)
+        return [{"name": keyword, "source": "Amazon"}] * num_results
+
+    originals = dict(web_scraper.SITE_SCRAPERS)
+    web_scraper.SITE_SCRAPERS.update(amazon=scraper)
+    browser_pool._pool = pool
+
+    async def main():
+        # Two concurrent callers, as from FastAPI background tasks
+        results = await asyncio.gather(
+            web_scraper.scrape_ecommerce_site_async("phone", 2, "amazon"),
+            web_scraper.scrape_ecommerce_site_async("laptop", 1, "amazon"),
+        )
+        try:
+            web_scraper.scrape_ecommerce_site("phone", 1, "amazon")
+        except RuntimeError:
+            return results, True
+        return results, False
+
+    try:
+        (phones, laptops), refused = asyncio.run(main())
+    finally:
+        web_scraper.SITE_SCRAPERS.update(originals)
+        browser_pool._pool = None
+
+    assert len(phones) == 2 and len(laptops) == 1 and laptops[0]["name"] == "laptop"
+    assert refused
+    print("   ✅ async scraper awaited from a running loop; sync wrapper refuses to nest")
+
+
+if __name__ == "__main__":
+    test_pages_are_reused_and_bounded()
+    test_contexts_recycle_and_browser_relaunches()
+    test_crashed_browser_is_closed_before_relaunch()
+    test_failed_scrape_discards_its_page()
+    test_both_sites_scrape_in_parallel_pages()
+    test_async_entry_point_awaits_inside_running_loop()
+    print("✅ Browser pool tests passed")
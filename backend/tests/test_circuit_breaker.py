@@ -0,0 +1,201 @@
+# test_circuit_breaker.py - Test per-marketplace circuit breakers and negative caching
+import sys
+import os
+import time
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools.async_scraper import AsyncScraperEngine
+from tools.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, SourceGuard, SourceUnavailable, looks_blocked
+from tools.rate_limiter import HostRateLimiter
+from tools.web_scraper import _guarded_scrape, scrape_flipkart
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    async def read(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeClient:
+    """Stands in for a pooled aiohttp client; every request gets the same response"""
+
+    def __init__(self, status=503, body=b"Service Unavailable"):
+        self.status = status
+        self.body = body
+        self.requests = []
+
+    def get(self, url):
+        self.requests.append(url)
+        return FakeResponse(self.status, self.body)
+
+
+class FakeNavigation:
+    def __init__(self, status, body):
+        self.status = status
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class Page:
+    """Playwright page whose navigation answers with `status`, and whose result selector never shows up"""
+
+    def __init__(self, status=200, body=b"<html></html>", goto_error=None):
+        self.response = FakeNavigation(status, body)
+        self.goto_error = goto_error
+
+    def on(self, event, handler):
+        pass
+
+    def remove_listener(self, event, handler):
+        pass
+
+    async def goto(self, url, wait_until=None):
+        if self.goto_error:
+            raise self.goto_error
+        return self.response
+
+    async def wait_for_selector(self, selector, timeout=None):
+        raise TimeoutError(f"Timeout 15000ms exceeded waiting for {selector}")
+
+
+def test_breaker_opens_half_opens_and_closes():
+    print("🧪 Testing circuit breaker states")
+    clock = FakeClock()
+    breaker = CircuitBreaker("amazon", failure_threshold=3, reset_timeout=30, half_open_calls=1, clock=clock)
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure("HTTP 503")
+    assert breaker.state == CLOSED
+    breaker.record_failure("HTTP 503")
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now = 31
+    assert breaker.snapshot()["state"] == HALF_OPEN
+    assert breaker.allow() and not breaker.allow()  # one trial at a time
+    breaker.record_failure("HTTP 429")
+    assert breaker.state == OPEN and breaker.snapshot()["retry_in_seconds"] == 30
+
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+    assert breaker.stats["opened"] == 2 and breaker.stats["rejected"] == 2
+    print("   ✅ closed → open → half-open → open → closed")
+
+
+def test_unreported_half_open_trial_expires():
+    """A trial whose request never reported back doesn't keep the source shut forever"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("flipkart", failure_threshold=1, reset_timeout=10, half_open_calls=1, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow() and not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+    print("   ✅ lost trial given up after the reset timeout")
+
+
+def test_negative_cache_and_source_mapping():
+    clock = FakeClock()
+    guard = SourceGuard(failure_threshold=3, reset_timeout=30, half_open_calls=1, negative_ttl=5, clock=clock)
+    assert guard.source_for("https://www.amazon.in/s?k=laptop") == "amazon"
+    assert guard.source_for("www.flipkart.com") == "flipkart"
+    assert guard.breaker("https://www.amazon.in/s?k=phone") is guard.breaker("amazon")
+
+    guard.remember_failure("amazon", "Gaming Laptop")
+    try:
+        guard.check("amazon", "laptop for gaming")
+        assert False, "negative entry should match the canonical query"
+    except SourceUnavailable:
+        pass
+    guard.check("flipkart", "gaming laptop")
+    clock.now = 6
+    guard.check("amazon", "gaming laptop")
+
+    assert looks_blocked(429, b"") and looks_blocked(200, b"<form action='/errors/validateCaptcha'>")
+    assert not looks_blocked(200, b"<html>results</html>") and not looks_blocked(404, b"")
+    print("   ✅ failed searches skipped until their entry expires")
+
+
+def test_blocked_marketplace_is_skipped_without_requests():
+    """Once Flipkart keeps answering 503, searches return at once without touching the network"""
+    guard = SourceGuard(failure_threshold=1, reset_timeout=60, half_open_calls=1, negative_ttl=60)
+    engine = AsyncScraperEngine(rate_limiter=HostRateLimiter(rate=1000, burst=100), source_guard=guard)
+    client = FakeClient()
+    engine._client = lambda host: client
+
+    assert engine.run_sync(engine.search_flipkart("wireless earbuds", 20)) == []
+    assert guard.breaker("flipkart").state == OPEN
+    requests = len(client.requests)
+
+    start = time.perf_counter()
+    assert engine.run_sync(engine.search_flipkart("mechanical keyboard", 5)) == []
+    amazon = engine.run_sync(engine.search_amazon("mechanical keyboard", 3))
+    elapsed = time.perf_counter() - start
+
+    # Only Amazon went to the network
+    assert all("amazon" in url for url in client.requests[requests:])
+    assert len(amazon) == 3  # Amazon failed once and fell back to curated products
+    assert elapsed < 0.5
+    snapshot = guard.snapshot()
+    assert snapshot["breakers"]["flipkart"]["rejected"] >= 1
+    assert snapshot["breakers"]["flipkart"]["last_error"] == "HTTP 503"
+    assert snapshot["negative_cache"]["entries"] == 2
+    print(f"   ✅ open circuit skipped in {elapsed * 1000:.1f} ms")
+
+
+def test_only_blocking_answers_count_against_the_source():
+    """A 404 is not a success, and a stale selector in the browser isn't the site blocking us"""
+    guard = SourceGuard(failure_threshold=3, reset_timeout=60, half_open_calls=1, negative_ttl=60)
+    engine = AsyncScraperEngine(rate_limiter=HostRateLimiter(rate=1000, burst=100), source_guard=guard)
+    breaker = guard.breaker("amazon")
+    breaker.record_failure("HTTP 503")
+    engine._client = lambda host: FakeClient(404, b"Not Found")
+    engine.run_sync(engine.fetch("https://www.amazon.in/s?k=laptop"))
+    assert breaker.snapshot()["consecutive_failures"] == 1 and breaker.stats["successes"] == 0
+
+    def scrape(page):
+        try:
+            asyncio.run(_guarded_scrape(page, scrape_flipkart, guard.breaker("flipkart"), "laptop", 5, False))
+        except Exception:
+            pass
+
+    flipkart = guard.breaker("flipkart")
+    for _ in range(5):
+        scrape(Page())
+    assert flipkart.state == CLOSED and flipkart.stats["failures"] == 0 and flipkart.stats["successes"] == 5
+    scrape(Page(status=429))
+    scrape(Page(goto_error=ConnectionError("net::ERR_CONNECTION_RESET")))
+    scrape(Page(body=b"<form action='/errors/validateCaptcha'>"))
+    assert flipkart.state == OPEN and flipkart.stats["failures"] == 3
+    print("   ✅ selector timeouts and 404s leave the breaker alone")
+
+
+if __name__ == "__main__":
+    test_breaker_opens_half_opens_and_closes()
+    test_unreported_half_open_trial_expires()
+    test_negative_cache_and_source_mapping()
+    test_blocked_marketplace_is_skipped_without_requests()
+    test_only_blocking_answers_count_against_the_source()
+    print("✅ Circuit breaker tests passed")
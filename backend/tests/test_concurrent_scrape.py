@@ -0,0 +1,77 @@
+# test_concurrent_scrape.py - Test concurrent marketplace fan-out in scrape_products
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools.enhanced_web_scraper import EnhancedWebScraper
+
+
+class SlowScraper(EnhancedWebScraper):
+    """Scraper with canned per-platform latencies instead of network calls"""
+
+    def __init__(self, amazon_delay, flipkart_delay, **kwargs):
+        super().__init__(**kwargs)
+        self.amazon_delay = amazon_delay
+        self.flipkart_delay = flipkart_delay
+
+    def search_amazon(self, query, max_results=10):
+        time.sleep(self.amazon_delay)
+        return [{'source': 'amazon', 'product_name': f'Amazon {query} {i}'} for i in range(max_results)]
+
+    def search_flipkart(self, query, max_results=10):
+        time.sleep(self.flipkart_delay)
+        return [{'source': 'flipkart', 'product_name': f'Flipkart {query} {i}'} for i in range(max_results)]
+
+
+def test_concurrent_scrape_costs_slowest_site():
+    """Both platforms run at once, so total time tracks the slowest one"""
+    print("🧪 Testing concurrent scrape_products")
+    scraper = SlowScraper(amazon_delay=0.4, flipkart_delay=0.4)
+
+    start = time.monotonic()
+    products = scraper.scrape_products("laptop", max_results=5)
+    elapsed = time.monotonic() - start
+
+    print(f"   ⏱️  {len(products)} products in {elapsed:.2f}s")
+    assert len(products) == 5
+    assert sum(1 for p in products if p['source'] == 'amazon') == 2
+    assert sum(1 for p in products if p['source'] == 'flipkart') == 3
+    assert elapsed < 0.7
+
+
+def test_results_merged_in_arrival_order():
+    """The faster platform's products come first"""
+    scraper = SlowScraper(amazon_delay=0.3, flipkart_delay=0.05)
+    products = scraper.scrape_products("phone", max_results=4)
+    assert products[0]['source'] == 'flipkart'
+    assert products[-1]['source'] == 'amazon'
+
+
+def test_deadline_keeps_finished_platforms():
+    """A platform still running at the deadline is dropped, the rest are kept"""
+    scraper = SlowScraper(amazon_delay=1.5, flipkart_delay=0.05)
+
+    start = time.monotonic()
+    products = scraper.scrape_products("keyboard", max_results=4, deadline=0.5)
+    elapsed = time.monotonic() - start
+
+    print(f"   ⏱️  deadline hit after {elapsed:.2f}s with {len(products)} products")
+    assert elapsed < 1.0
+    assert products and all(p['source'] == 'flipkart' for p in products)
+
+
+def test_sequential_mode_and_enabled_platforms():
+    """Sequential mode still works and only enabled platforms are scraped"""
+    scraper = SlowScraper(amazon_delay=0, flipkart_delay=0, enabled_platforms=['flipkart'])
+    products = scraper.scrape_products("mouse", max_results=3, concurrent=False)
+    assert len(products) == 3
+    assert all(p['source'] == 'flipkart' for p in products)
+
+
+if __name__ == "__main__":
+    test_concurrent_scrape_costs_slowest_site()
+    test_results_merged_in_arrival_order()
+    test_deadline_keeps_finished_platforms()
+    test_sequential_mode_and_enabled_platforms()
+    print("✅ Concurrent scraping tests passed")
@@ -0,0 +1,120 @@
+# test_early_exit.py - Test lazy container extraction and next-page reads
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools.enhanced_web_scraper import EnhancedWebScraper
+from tools.rate_limiter import HostRateLimiter
+from synthetic_pages import amazon_search_page, flipkart_search_page
+
+UNLIMITED = HostRateLimiter(rate=1000, burst=100)
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.status_code = 200
+        self.content = content
+
+
+class FakeSession:
+    """Serves one results page for every request, recording the URLs.
+
+    With `distinct_pages` each page gets its own ASINs, like real pagination;
+    otherwise every page repeats the same listings.
+    """
+
+    def __init__(self, content, distinct_pages=True):
+        self.content = content
+        self.distinct_pages = distinct_pages
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        page = url.split("&page=")[1].split("&")[0] if "&page=" in url else "1"
+        content = self.content
+        if self.distinct_pages:
+            content = content.replace(b'data-asin="B', f'data-asin="{page}'.encode())
+        return FakeResponse(content)
+
+
+class CountingScraper(EnhancedWebScraper):
+    """Scraper that counts how many containers were extracted"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.extracted = 0
+
+    def extract_amazon_product(self, container):
+        self.extracted += 1
+        return super().extract_amazon_product(container)
+
+
+def test_extraction_stops_at_max_results():
+    """Only as many containers as needed are extracted"""
+    print("🧪 Testing early-exit extraction")
+    scraper = CountingScraper(parser_backend="html.parser")
+    products = scraper.parse_amazon_results(amazon_search_page(), max_results=3)
+    assert len(products) == 3
+    assert scraper.extracted == 3
+    print(f"   ✅ 3 products from {scraper.extracted} containers")
+
+
+def test_invalid_containers_do_not_use_up_the_budget():
+    """Containers without a name or price are skipped rather than counted"""
+    empty = b'<div data-component-type="s-search-result"><h2><span></span></h2></div>'
+    page = amazon_search_page().replace(b"<body", b"<body><div>" + empty * 4 + b"</div><i", 1)
+    scraper = CountingScraper(parser_backend="html.parser")
+    products = scraper.parse_amazon_results(page, max_results=3)
+    assert len(products) == 3
+    assert scraper.extracted == 7
+
+
+def test_next_page_only_when_first_runs_dry():
+    """A further page is requested only when the first ones have too few products"""
+    scraper = EnhancedWebScraper(parser_backend="html.parser", max_pages=3, rate_limiter=UNLIMITED)
+    scraper._session = FakeSession(amazon_search_page())
+    assert len(scraper.search_amazon("laptop", max_results=10)) == 10
+    assert len(scraper._session.urls) == 1
+
+    # 24 of 30 found on page 1 is still short, but one page was the estimate
+    scraper.RESULTS_PER_PAGE = {"amazon": 30}
+    scraper._session = FakeSession(amazon_search_page())
+    assert len(scraper.search_amazon("laptop", max_results=30)) == 30
+    assert len(scraper._session.urls) == 2
+    assert scraper._session.urls[1].endswith("&page=2&ref=sr_pg_2")
+    print("   ✅ next page read only when earlier pages ran dry")
+
+
+def test_pages_fetched_concurrently_and_deduplicated():
+    """Large requests fetch several pages at once and drop repeated listings"""
+    scraper = EnhancedWebScraper(parser_backend="html.parser", max_pages=3, rate_limiter=UNLIMITED)
+    scraper._session = FakeSession(amazon_search_page())
+    products = scraper.search_amazon("laptop", max_results=45)
+    assert len(scraper._session.urls) == 3  # ceil(45 / 20) pages up front
+    assert len(products) == 45
+    assert len({p["product_id"] for p in products}) == 45
+
+    # Pages repeating the same listings contribute nothing new
+    scraper._session = FakeSession(amazon_search_page(), distinct_pages=False)
+    products = scraper.search_amazon("laptop", max_results=45)
+    assert len(products) == 24
+    assert len({p["product_id"] for p in products}) == 24
+    print("   ✅ 45 unique products from 3 concurrent pages")
+
+
+def test_flipkart_nested_containers_are_not_repeated():
+    """Nested Flipkart containers for the same listing yield one product"""
+    scraper = EnhancedWebScraper(parser_backend="html.parser")
+    products = scraper.parse_flipkart_results(flipkart_search_page(), max_results=10)
+    assert len(products) == 10
+    assert len({p["product_id"] for p in products}) == 10
+    assert all(p["product_id"].startswith("COM") for p in products)
+
+
+if __name__ == "__main__":
+    test_extraction_stops_at_max_results()
+    test_invalid_containers_do_not_use_up_the_budget()
+    test_next_page_only_when_first_runs_dry()
+    test_pages_fetched_concurrently_and_deduplicated()
+    test_flipkart_nested_containers_are_not_repeated()
+    print("✅ Early-exit extraction tests passed")
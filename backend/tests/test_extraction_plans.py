@@ -0,0 +1,71 @@
+# test_extraction_plans.py - Test compiled per-site extraction plans against BeautifulSoup's CSS engine
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools.enhanced_web_scraper import (
+    EnhancedWebScraper, AMAZON_PLAN, FLIPKART_PLAN, AMAZON_CONTAINER_RULES, FLIPKART_CONTAINER_RULES,
+)
+from tools.extraction_plans import CompiledSelector, ExtractionPlan, Field, stripped_text
+from tools.html_parsers import find_containers, make_soup
+from synthetic_pages import amazon_search_page, flipkart_search_page
+
+
+def load_containers(page, rules):
+    return find_containers(make_soup(page, "html.parser"), rules)
+
+
+def test_compiled_selectors_match_select_one():
+    """Every plan selector finds the same first element as container.select_one"""
+    print("🧪 Testing compiled extraction plans")
+    cases = [
+        (AMAZON_PLAN, load_containers(amazon_search_page(), AMAZON_CONTAINER_RULES)),
+        (FLIPKART_PLAN, load_containers(flipkart_search_page(), FLIPKART_CONTAINER_RULES)),
+    ]
+    for plan, containers in cases:
+        for container in containers:
+            found = plan.collect(container)
+            for css in plan.selectors:
+                expected = container.select_one(css)
+                actual = found[css][0] if found[css] else None
+                assert actual is expected, f"{plan.site}: {css} disagrees with select_one"
+        print(f"   ✅ {plan.site}: {len(plan.selectors)} selectors agree on {len(containers)} containers")
+
+
+def test_plan_records_matching_fallback_selector():
+    """The result notes which fallback selector supplied each field"""
+    container = make_soup('<div><h2><span></span></h2><p class="title">Gaming Laptop</p></div>', "html.parser").div
+    plan = ExtractionPlan("test", [Field("name", ["h2 span", ".title"], stripped_text)])
+    result = plan.run(container)
+    assert result.get("name") == "Gaming Laptop"
+    assert result.matched == {"name": ".title"}
+
+
+def test_unsupported_selector_fails_at_compile_time():
+    """Selectors outside the supported subset are rejected when the plan is built"""
+    for css in ["div > a", "a:first-child", "a[href^='/dp']"]:
+        try:
+            CompiledSelector(css)
+        except ValueError:
+            continue
+        raise AssertionError(f"{css} should not compile")
+
+
+def test_extraction_uses_plans():
+    """Extractors still produce complete products from the synthetic pages"""
+    scraper = EnhancedWebScraper(parser_backend="html.parser")
+    products = scraper.parse_flipkart_results(flipkart_search_page(), max_results=5)
+    assert len(products) == 5
+    for product in products:
+        assert product["current_price"].startswith("₹")
+        assert "?" not in product["product_url"]
+    assert products[0]["product_url"].startswith("https://www.flipkart.com/")
+    assert products[0]["image_url"].startswith("https://rukminim")
+
+
+if __name__ == "__main__":
+    test_compiled_selectors_match_select_one()
+    test_plan_records_matching_fallback_selector()
+    test_unsupported_selector_fails_at_compile_time()
+    test_extraction_uses_plans()
+    print("✅ Extraction plan tests passed")
@@ -0,0 +1,161 @@
+# test_multi_source_search.py - Test concurrent multi-term searches with a global cap and deadline
+import sys
+import os
+import time
+import asyncio
+import zlib
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import services.enhanced_data_sources as enhanced_data_sources
+from services.enhanced_data_sources import EnhancedDataSources
+from tools.scraper_loop import run_sync, stop_scraper_loop
+from conftest import fresh_product_stores
+
+
+class SlowEngine:
+    """Marketplace searches that take `delays[(source, term)]` or `delays[term]` seconds, tracking overlap"""
+
+    def __init__(self, delays, results=None):
+        self.delays = delays
+        self.results = results or {}
+        self.running = 0
+        self.peak = 0
+        self.queries = []
+
+    async def _search(self, query, max_results, source):
+        self.queries.append((source, query))
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays.get((source, query), self.delays.get(query, 0.2)))
+        finally:
+            self.running -= 1
+        # Shaped like scraper output; distinct model numbers, so no two listings are near-duplicates
+        results = []
+        for i in range(self.results.get(query, max_results)):
+            price = 1000.0 + i
+            item = {"product_name": f"{query} {source}{i:03d}x", "current_price": f"₹{price:,.0f}",
+                    "image_url": "N/A", "product_url": "N/A", "product_id": f"{source[0].upper()}{zlib.crc32(query.encode()) % 10**5:05d}{i:04d}",
+                    "source": source}
+            if source == "amazon":
+                item["price_numeric"] = price
+            results.append(item)
+        return results
+
+    async def search_amazon(self, query, max_results=10):
+        return await self._search(query, max_results, "amazon")
+
+    async def search_flipkart(self, query, max_results=10):
+        return await self._search(query, max_results, "flipkart")
+
+
+def search(engine, searches, slots, rounds=1, pause=0, **kwargs):
+    """Run each list of terms as its own concurrent search_multiple_sources call, `rounds` times"""
+    os.environ["SCRAPER_MAX_CONCURRENT_SEARCHES"] = str(slots)
+    # Search slots are sized when a loop first uses them; start from a fresh scraper loop
+    stop_scraper_loop()
+    try:
+        async def one(terms):
+            sources = EnhancedDataSources()
+            sources.engine = engine
+            return await sources.search_multiple_sources(terms, "Electronics", num_results=2, **kwargs)
+
+        async def main():
+            for _ in range(rounds - 1):
+                await asyncio.gather(*(one(terms) for terms in searches))
+                await asyncio.sleep(pause)
+            return await asyncio.gather(*(one(terms) for terms in searches))
+
+        # Every call starts from an empty cache and index
+        with fresh_product_stores():
+            start = time.perf_counter()
+            results = asyncio.run(main())
+        return results, time.perf_counter() - start
+    finally:
+        os.environ.pop("SCRAPER_MAX_CONCURRENT_SEARCHES", None)
+
+
+def test_searches_overlap_up_to_the_global_cap():
+    print("🧪 Testing concurrent multi-source search")
+    engine = SlowEngine({})
+    searches = [["wireless earbuds"], ["bluetooth speaker"], ["smart watch"]]
+    results, elapsed = search(engine, searches, slots=4)
+
+    # Six searches, all overlapping up to the cap instead of running one by one
+    assert len(engine.queries) == 6 and engine.peak == 4 and engine.running == 0
+    assert all({item["source"] for item in result} == {"amazon", "flipkart"} for result in results)
+    print(f"   ✅ 6 searches in {elapsed:.2f}s with at most {engine.peak} at once")
+
+
+def test_deadline_keeps_results_that_arrived():
+    engine = SlowEngine({("flipkart", "wireless earbuds"): 5})
+    (results,), elapsed = search(engine, [["wireless earbuds", "earbuds"]], slots=6, deadline=0.5)
+
+    # The search returned while the slow Flipkart scrape was still running
+    assert engine.running == 1 and ("flipkart", "wireless earbuds") in engine.queries
+    sources = {item["source"] for item in results}
+    assert results and sources == {"amazon"}
+    print(f"   ✅ slow source dropped after {elapsed:.2f}s, {len(results)} products kept")
+
+
+def test_results_arriving_after_the_deadline_are_cached():
+    engine = SlowEngine({("flipkart", "noise cancelling earbuds"): 0.6})
+    # The first search gives up on Flipkart at 0.3s; its scrape finishes while we wait
+    (results,), _ = search(engine, [["noise cancelling earbuds"]], slots=6, rounds=2, pause=0.6, deadline=0.3)
+
+    assert engine.queries == [("amazon", "noise cancelling earbuds"), ("flipkart", "noise cancelling earbuds")]
+    assert {item["source"] for item in results} == {"amazon", "flipkart"}
+    print("   ✅ late Flipkart results reused by the next search, not scraped again")
+
+
+def test_expansion_terms_only_when_results_are_short():
+    terms = ["wired headphones", "studio headphones", "best headphones 2024", "headphones reviews"]
+    before = enhanced_data_sources.fan_out_snapshot()
+
+    # The primary term alone finds the 4 products asked for
+    engine = SlowEngine({}, {})
+    search(engine, [terms], slots=6, deadline=5)
+    assert {query for _, query in engine.queries} == {"wired headphones"}
+
+    # Too few hits for the primary term: expand until 4 relevant products are found
+    engine = SlowEngine({}, {"wired headphones": 1})
+    (results,), _ = search(engine, [terms], slots=6, deadline=5)
+    assert [query for _, query in engine.queries[::2]] == ["wired headphones", "studio headphones"]
+    assert len(results) == 4
+
+    stats = enhanced_data_sources.fan_out_snapshot()
+    assert stats["searches"] - before["searches"] == 2 and stats["expanded"] - before["expanded"] == 1
+    assert stats["source_searches_saved"] - before["source_searches_saved"] == 6 + 4
+    print(f"   ✅ expansion saved {stats['source_searches_saved'] - before['source_searches_saved']} source searches")
+
+
+def test_search_slots_survive_a_restarted_scraper_loop():
+    """Each loop gets its own semaphore, so searches keep working after stop_scraper_loop()"""
+    async def limited():
+        async with enhanced_data_sources._get_search_slots():
+            await asyncio.sleep(0.01)
+            return asyncio.get_running_loop()
+
+    async def contended():
+        # The second search waits for the slot, which binds the semaphore to this loop
+        return await asyncio.gather(limited(), limited())
+
+    os.environ["SCRAPER_MAX_CONCURRENT_SEARCHES"] = "1"
+    try:
+        first, _ = run_sync(contended())
+        stop_scraper_loop()
+        second, _ = run_sync(contended())
+    finally:
+        os.environ.pop("SCRAPER_MAX_CONCURRENT_SEARCHES", None)
+        stop_scraper_loop()
+    assert first is not second
+    print("   ✅ search slots rebound to the restarted scraper loop")
+
+
+if __name__ == "__main__":
+    test_searches_overlap_up_to_the_global_cap()
+    test_deadline_keeps_results_that_arrived()
+    test_results_arriving_after_the_deadline_are_cached()
+    test_expansion_terms_only_when_results_are_short()
+    test_search_slots_survive_a_restarted_scraper_loop()
+    print("✅ Multi-source search tests passed")
@@ -0,0 +1,54 @@
+# test_parser_backends.py - Test that every HTML parser backend extracts the same products
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools.enhanced_web_scraper import EnhancedWebScraper
+from tools.html_parsers import available_backends, resolve_backend
+from synthetic_pages import amazon_search_page, flipkart_search_page
+
+
+def test_backends_extract_identical_products():
+    """lxml and html.parser must agree on the synthetic result pages"""
+    print("🧪 Testing parser backends")
+    amazon_page = amazon_search_page()
+    flipkart_page = flipkart_search_page()
+
+    results = {}
+    for backend in available_backends():
+        scraper = EnhancedWebScraper(parser_backend=backend)
+        results[backend] = (
+            scraper.parse_amazon_results(amazon_page, max_results=10),
+            scraper.parse_flipkart_results(flipkart_page, max_results=10),
+        )
+        print(f"   {backend}: {len(results[backend][0])} Amazon, {len(results[backend][1])} Flipkart")
+
+    reference = results["html.parser"]
+    assert len(reference[0]) == 10 and len(reference[1]) == 10
+    for backend, extracted in results.items():
+        assert extracted == reference, f"{backend} disagrees with html.parser"
+
+
+def test_scoped_parsing_matches_full_document():
+    """Container-scoped parsing finds the same products as parsing the whole page"""
+    amazon_page = amazon_search_page()
+    flipkart_page = flipkart_search_page()
+
+    for backend in available_backends():
+        full = EnhancedWebScraper(parser_backend=backend, scoped_parsing=False)
+        scoped = EnhancedWebScraper(parser_backend=backend, scoped_parsing=True)
+        assert scoped.parse_amazon_results(amazon_page, 10) == full.parse_amazon_results(amazon_page, 10)
+        assert scoped.parse_flipkart_results(flipkart_page, 10) == full.parse_flipkart_results(flipkart_page, 10)
+
+
+def test_unknown_backend_falls_back_to_html_parser():
+    """Asking for a backend that isn't installed falls back to the stdlib parser"""
+    assert resolve_backend("not-a-parser") == "html.parser"
+    assert resolve_backend("auto") == available_backends()[0]
+
+
+if __name__ == "__main__":
+    test_backends_extract_identical_products()
+    test_scoped_parsing_matches_full_document()
+    test_unknown_backend_falls_back_to_html_parser()
+    print("✅ Parser backend tests passed")
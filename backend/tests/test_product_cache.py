@@ -0,0 +1,244 @@
+# test_product_cache.py - Test the shared LRU + TTL product cache
+import sys
+import os
+import time
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services.product_cache import ProductCache, estimate_size
+from services.cache_store import SQLiteCacheStore, RedisCacheStore, encode_value
+from conftest import fresh_product_stores
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def products(n, name="Laptop"):
+    return [{"name": f"{name} {i}", "current_price": 1000 + i} for i in range(n)]
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Reading an entry protects it; the oldest untouched entry goes first"""
+    print("🧪 Testing product cache LRU eviction")
+    cache = ProductCache(max_entries=2, max_bytes=10**6, ttl_seconds=60, sweep_interval=0)
+    cache.set("laptop", "amazon", products(2))
+    cache.set("phone", "amazon", products(2))
+    assert cache.get("laptop", "amazon")  # laptop is now most recent
+    cache.set("tablet", "amazon", products(2))
+
+    assert cache.get("phone", "amazon") is None
+    assert cache.get("laptop", "amazon") and cache.get("tablet", "amazon")
+    stats = cache.snapshot()
+    assert stats["evictions"] == 1 and stats["entries"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 1
+    print("   ✅ least recently used search evicted")
+
+
+def test_byte_budget_bounds_memory():
+    """Entries are evicted to stay within the byte budget; oversized values are not cached"""
+    size = estimate_size(products(5))
+    cache = ProductCache(max_entries=100, max_bytes=size * 2, ttl_seconds=60, sweep_interval=0)
+    for term in ("a", "b", "c"):
+        cache.set(term, "flipkart", products(5))
+    assert len(cache) == 2 and cache.snapshot()["bytes"] <= size * 2
+    assert cache.get("a", "flipkart") is None
+
+    cache.set("huge", "flipkart", products(50))
+    assert cache.get("huge", "flipkart") is None and cache.stats["rejected"] == 1
+    print("   ✅ byte budget enforced")
+
+
+def test_entries_expire_on_the_monotonic_clock():
+    """Expired entries miss on lookup and are dropped by the sweep"""
+    clock = FakeClock()
+    cache = ProductCache(max_entries=10, max_bytes=10**6, ttl_seconds=30, stale_seconds=0,
+                         sweep_interval=0, clock=clock)
+    cache.set("laptop", "amazon", products(1))
+    cache.set("phone", "amazon", products(1), ttl_seconds=120)
+    clock.now += 31
+    assert cache.get("laptop", "amazon") is None
+    assert cache.get("phone", "amazon")
+    clock.now += 100
+    assert cache.clear_expired() == 1 and len(cache) == 0
+    assert cache.stats["expirations"] == 2
+    print("   ✅ TTLs honoured per entry")
+
+
+def test_background_sweep_drops_idle_entries():
+    cache = ProductCache(max_entries=10, max_bytes=10**6, ttl_seconds=0.05, stale_seconds=0, sweep_interval=0.02)
+    cache.set("laptop", "amazon", products(1))
+    try:
+        deadline = time.monotonic() + 2
+        while len(cache) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert len(cache) == 0
+    finally:
+        cache.close()
+    print("   ✅ background sweep expires entries nobody reads")
+
+
+def test_cache_is_shared_across_data_source_instances(product_stores):
+    """Each search builds a new EnhancedDataSources; they must share one cache"""
+    from services.enhanced_data_sources import EnhancedDataSources
+    cache, _ = product_stores
+    first, second = EnhancedDataSources(), EnhancedDataSources()
+    first.cache.set("laptop", "amazon", products(3))
+    assert first.cache is cache and second.cache is cache
+    assert second.cache.get("laptop", "amazon") == products(3)
+    print("   ✅ one cache per process")
+
+
+def test_sqlite_tier_survives_restarts():
+    """A new process (or another worker) reads what the last one cached, compressed on disk"""
+    print("🧪 Testing on-disk cache tier")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        first = ProductCache(max_entries=10, max_bytes=10**6, ttl_seconds=60, sweep_interval=0,
+                             store=SQLiteCacheStore(path))
+        first.set("gaming laptop", "amazon", products(20))
+        first.close()
+
+        second = ProductCache(max_entries=10, max_bytes=10**6, ttl_seconds=60, sweep_interval=0,
+                              store=SQLiteCacheStore(path))
+        try:
+            assert second.get("gaming laptop", "amazon") == products(20)
+            # Promoted into memory: the next read doesn't touch the store
+            assert second.get("gaming laptop", "amazon") == products(20)
+            assert second.stats["store_hits"] == 1 and second.stats["hits"] == 2
+            store = second.snapshot()["store"]
+            assert store["entries"] == 1 and store["compressed_bytes"] < estimate_size(products(20))
+        finally:
+            second.close()
+    print("   ✅ cached results read back after restart")
+
+
+def test_fallback_products_stay_out_of_the_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCacheStore(os.path.join(tmp, "cache.sqlite3"))
+        cache = ProductCache(max_entries=10, max_bytes=10**6, ttl_seconds=60, sweep_interval=0, store=store)
+        try:
+            fallback = [{**item, "fallback": True} for item in products(3)]
+            cache.set("laptop", "amazon", fallback)
+            asyncio.run(cache.aset("gaming laptop", "amazon", fallback))
+            assert cache.get("laptop", "amazon") == fallback
+            assert store.get(cache.store_key(cache.key("laptop", "amazon"))) is None
+            assert cache.snapshot()["store"]["entries"] == 0
+        finally:
+            cache.close()
+    print("   ✅ fallback products cached in memory only")
+
+
+def test_expired_rows_are_not_served_from_disk():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCacheStore(os.path.join(tmp, "cache.sqlite3"), max_entries=2)
+        try:
+            store.set("amazon:old", products(1), ttl_seconds=-1)
+            assert store.get("amazon:old") is None
+            for term in ("a", "b", "c"):
+                store.set(f"amazon:{term}", products(1), ttl_seconds=60)
+                time.sleep(0.01)
+            # The expired row and the oldest row over max_entries go
+            assert store.purge() == 2
+            assert store.get("amazon:a") is None and store.get("amazon:c")[0] == products(1)
+        finally:
+            store.close()
+    print("   ✅ expired and over-budget rows purged")
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        return self.data.get(name, (None, 0))[0]
+
+    def ttl(self, name):
+        return self.data[name][1] if name in self.data else -2
+
+    def set(self, name, value, ex=None):
+        self.data[name] = (value, ex)
+
+    def delete(self, name):
+        self.data.pop(name, None)
+
+    def close(self):
+        pass
+
+
+def test_redis_tier_through_async_api():
+    """The Redis backend stores the same compressed payload; coroutines use aget/aset"""
+    client = FakeRedis()
+    cache = ProductCache(max_entries=10, max_bytes=10**6, ttl_seconds=60, stale_seconds=0, sweep_interval=0,
+                         store=RedisCacheStore(url="redis://cache:6379/0", client=client))
+
+    async def main():
+        await cache.aset("phone", "flipkart", products(3))
+        cache.clear()  # as if another worker asks
+        return await cache.aget("phone", "flipkart")
+
+    assert asyncio.run(main()) == products(3)
+    assert client.data["product_cache:flipkart:phone"] == (encode_value(products(3)), 60)
+    assert cache.stats["store_hits"] == 1
+    print("   ✅ Redis tier shared through the async API")
+
+
+def test_stale_results_are_served_while_refreshing():
+    """Past the soft TTL, callers get the old results at once and one refresh runs in the background"""
+    print("🧪 Testing stale-while-revalidate")
+    clock = FakeClock()
+    cache = ProductCache(max_entries=10, max_bytes=10**6, ttl_seconds=30, stale_seconds=60,
+                         sweep_interval=0, clock=clock)
+    fetches = []
+
+    def fetcher(name, delay=0.0):
+        async def fetch():
+            fetches.append(name)
+            await asyncio.sleep(delay)
+            return products(2, name)
+        return fetch
+
+    async def main():
+        first = await cache.get_or_fetch("laptop", "amazon", fetcher("Old"))
+        clock.now += 10
+        fresh = await cache.get_or_fetch("laptop", "amazon", fetcher("Unused"))
+        clock.now += 25  # past the soft TTL
+        stale = await asyncio.gather(*(cache.get_or_fetch("laptop", "amazon", fetcher("New", 0.1))
+                                       for _ in range(3)))
+        return first, fresh, stale
+
+    first, fresh, stale = asyncio.run(main())
+    assert first == fresh == products(2, "Old")
+    assert all(result == products(2, "Old") for result in stale)
+
+    deadline = time.monotonic() + 2
+    while cache.stats["refreshes"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert fetches == ["Old", "New"]  # one refresh for three stale hits
+    assert cache.get("laptop", "amazon") == products(2, "New")
+    assert cache.stats["stale_hits"] == 3
+
+    # Past the hard TTL the caller waits for a scrape again
+    clock.now += 200
+    assert asyncio.run(cache.get_or_fetch("laptop", "amazon", fetcher("Cold"))) == products(2, "Cold")
+    print("   ✅ stale results served instantly, refreshed once in the background")
+
+
+if __name__ == "__main__":
+    test_least_recently_used_entry_is_evicted()
+    test_byte_budget_bounds_memory()
+    test_entries_expire_on_the_monotonic_clock()
+    test_background_sweep_drops_idle_entries()
+    with fresh_product_stores() as stores:
+        test_cache_is_shared_across_data_source_instances(stores)
+    test_sqlite_tier_survives_restarts()
+    test_fallback_products_stay_out_of_the_store()
+    test_expired_rows_are_not_served_from_disk()
+    test_redis_tier_through_async_api()
+    test_stale_results_are_served_while_refreshing()
+    print("✅ Product cache tests passed")
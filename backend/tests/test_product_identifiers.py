@@ -0,0 +1,108 @@
+# test_product_identifiers.py - Test identifier extraction and the persisted product index
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services.enhanced_data_sources import EnhancedDataSources
+from services.product_identifiers import ProductIndex, extract_identifiers
+from tools.enhanced_web_scraper import EnhancedWebScraper
+from conftest import fresh_product_stores
+
+HP_AMAZON = {
+    "name": "HP 15s-fq5111TU Laptop (12th Gen i5-1235U/16 GB/512 GB SSD, Win 11)",
+    "current_price": 52990.0,
+    "product_url": "https://www.amazon.in/HP-15s-fq5111TU-12th-i5-1235U-Windows/dp/B0BWQM5WHC/ref=sr_1_1",
+    "source": "amazon",
+}
+HP_FLIPKART = {
+    "name": "HP 15s (2023) Intel Core i5 12th Gen 1235U - (16 GB/512 GB SSD/Windows 11 Home) 15s-fq5111TU",
+    "current_price": 49990.0,
+    "product_url": "https://www.flipkart.com/hp-15s-2023-intel-core-i5/p/itm6ac6485515ae4",
+    "product_id": "COMGFB2GSG8EQXCQ",
+    "source": "flipkart",
+}
+
+
+def test_identifiers_from_urls_ids_and_names():
+    print("🧪 Testing product identifier extraction")
+    assert extract_identifiers(HP_AMAZON) == ["asin:B0BWQM5WHC", "model:15sfq5111tu"]
+    assert extract_identifiers(HP_FLIPKART) == ["fkpid:COMGFB2GSG8EQXCQ", "fkitm:itm6ac6485515ae4", "model:15sfq5111tu"]
+    # pid still in the URL, model code only in the specs
+    item = {"product_name": "Lenovo IdeaPad Gaming 3", "key_specifications": ["AMD Ryzen 5 5600H", "82K201UHIN"],
+            "product_url": "https://www.flipkart.com/lenovo-ideapad/p/itm123abc?pid=COMG8ZHH5YCSHBPQ&lid=x"}
+    assert extract_identifiers(item) == ["fkpid:COMG8ZHH5YCSHBPQ", "fkitm:itm123abc", "model:82k201uhin"]
+    assert extract_identifiers({"name": "boAt Airdopes 141", "product_url": "N/A", "source": "amazon"}) == []
+    print("   ✅ ASIN, Flipkart pid/item id and model codes extracted")
+
+
+def test_index_lookups_survive_a_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.sqlite3")
+        index = ProductIndex(path=path, max_entries=100)
+        assert index.add_many([HP_AMAZON, HP_FLIPKART]) == 5
+
+        # One model code resolves to the latest listing on each marketplace
+        listings = index.lookup("model:15sfq5111tu")
+        assert listings["amazon"]["current_price"] == 52990.0 and listings["flipkart"]["current_price"] == 49990.0
+        assert index.stats["memory_hits"] == 1
+
+        newer = {**HP_AMAZON, "current_price": 51490.0}
+        index.add(newer)
+        assert index.lookup("asin:B0BWQM5WHC")["amazon"]["current_price"] == 51490.0
+        index.close()
+
+        reopened = ProductIndex(path=path, max_entries=100)
+        found = reopened.find("https://www.amazon.in/dp/B0BWQM5WHC")
+        assert found["amazon"]["current_price"] == 51490.0
+        assert reopened.stats["store_hits"] == 1
+        reopened.lookup("asin:B0BWQM5WHC")
+        assert reopened.stats["memory_hits"] == 1
+        assert reopened.lookup("asin:B000000000") == {} and reopened.stats["misses"] == 1
+        reopened.close()
+    print("   ✅ latest listings found again after a restart")
+
+
+def test_fallback_products_are_not_indexed():
+    fallback = EnhancedWebScraper().get_fallback_products("laptop", 3)
+    assert all(item["fallback"] for item in fallback)
+    index = ProductIndex(path="none")
+    assert index.add_many(fallback + [HP_FLIPKART]) == 3
+    # The curated HP 15s entry shares a model code with the real listing but isn't served for it
+    assert set(index.lookup("model:15sfq5111tu")) == {"flipkart"}
+    assert index.find(fallback[1]["product_url"]) == {}
+    index.close()
+    print("   ✅ curated fallback products kept out of the index")
+
+
+class OneShotEngine:
+    def __init__(self):
+        self.calls = 0
+
+    async def search_amazon(self, query, max_results=10):
+        self.calls += 1
+        return [dict(HP_AMAZON)]
+
+
+def test_search_results_feed_the_index(product_stores):
+    _, index = product_stores
+    engine = OneShotEngine()
+    sources = EnhancedDataSources()
+    sources.engine = engine
+    results = asyncio.run(sources.search_amazon_api("hp 15s laptop", 5))
+    assert results[0]["identifiers"] == ["asin:B0BWQM5WHC", "model:15sfq5111tu"]
+
+    # A later search for the same product resolves from the index, no scrape
+    listings = index.find(HP_FLIPKART["name"])
+    assert listings["amazon"]["product_url"] == HP_AMAZON["product_url"] and engine.calls == 1
+    print("   ✅ scraped listings indexed by identifier")
+
+
+if __name__ == "__main__":
+    test_identifiers_from_urls_ids_and_names()
+    test_index_lookups_survive_a_restart()
+    test_fallback_products_are_not_indexed()
+    with fresh_product_stores() as stores:
+        test_search_results_feed_the_index(stores)
+    print("✅ Product identifier tests passed")
@@ -0,0 +1,105 @@
+# test_product_matcher.py - Test cross-marketplace near-duplicate clustering
+import sys
+import os
+import time
+import random
+import string
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services.product_identifiers import extract_model_numbers
+from services.product_matcher import ProductMatcher, cluster_listings
+
+
+def listing(name, price, source):
+    """Shaped like scraper output: a formatted price string, with price_numeric only from Amazon"""
+    item = {"product_name": name, "current_price": f"₹{price:,.0f}", "source": source,
+            "product_url": f"https://{source}.example/{price:.0f}"}
+    if source == "amazon":
+        item["price_numeric"] = price
+    return item
+
+
+def test_same_product_on_both_marketplaces_is_one_result():
+    print("🧪 Testing near-duplicate clustering")
+    results = cluster_listings([
+        listing("Apple iPhone 15 (128 GB) - Black", 69900.0, "amazon"),
+        listing("APPLE iPhone 15 (Black, 128 GB)", 65999.0, "flipkart"),
+        listing("Apple iPhone 15 (128 GB) - Black | Renewed", 64000.0, "amazon"),
+        listing("Samsung Galaxy M34 5G (Dark Blue, 6GB, 128GB Storage) | 120Hz sAMOLED", 16999.0, "amazon"),
+        listing("SAMSUNG Galaxy M34 5G (Dark Blue, 128 GB)  (6 GB RAM)", 15999.0, "flipkart"),
+    ])
+    assert len(results) == 2
+    iphone, galaxy = results
+    assert iphone["duplicates"] == 2
+    assert iphone["offers"]["amazon"]["price"] == 64000.0 and iphone["offers"]["flipkart"]["price"] == 65999.0
+    assert iphone["best_price"] == 64000.0 and iphone["best_source"] == "amazon"
+    assert galaxy["best_source"] == "flipkart" and set(galaxy["offers"]) == {"amazon", "flipkart"}
+    print("   ✅ listings merged across sources with the best price per source")
+
+
+def test_variants_and_model_numbers_stay_apart():
+    results = cluster_listings([
+        listing("Apple iPhone 15 (128 GB) - Black", 69900.0, "amazon"),
+        listing("Apple iPhone 15 Plus (128 GB) - Black", 79900.0, "amazon"),
+        listing("Apple iPhone 15 (256 GB) - Black", 79900.0, "flipkart"),
+        listing("HP 15s-fq5111TU Laptop (12th Gen i5-1235U/16 GB/512 GB SSD)", 52990.0, "amazon"),
+        listing("HP 15s-fq5112TU Laptop (12th Gen i5-1235U/16 GB/512 GB SSD)", 54990.0, "amazon"),
+        listing("HP Laptop 15s-FQ5111TU Intel Core i5 12th Gen", 49990.0, "flipkart"),
+    ])
+    assert [r["duplicates"] for r in results] == [0, 0, 0, 1, 0]
+    assert results[3]["model_numbers"] == ["15sfq5111tu"] and results[3]["best_price"] == 49990.0
+    print("   ✅ Plus, storage sizes and model numbers kept distinct")
+
+
+def test_model_number_extraction_skips_specs():
+    assert extract_model_numbers("Lenovo IdeaPad Gaming 3 82K201UHIN Ryzen 5 5600H RTX 3050 DDR4-3200") == {"82k201uhin"}
+    assert extract_model_numbers("Samsung Galaxy S23 5G (SM-S911B) 8GB RAM 1920x1080") == {"sms911b"}
+    assert extract_model_numbers("boAt Airdopes 141 Wireless Earbuds") == set()
+    assert extract_model_numbers("Dell Inspiron 3520 Laptop, Win11, MSO'21") == set()
+    assert extract_model_numbers("Samsung 65 inch Neo QLED 8K60Hz 4K120Hz Smart TV") == set()
+    print("   ✅ CPUs, GPUs, memory, resolutions and OS versions aren't model numbers")
+
+
+def test_shared_model_code_still_needs_similar_titles():
+    results = cluster_listings([
+        listing("HP 15s Laptop 12th Gen Intel Core i3 8GB 512GB SSD FHD Win11 Silver", 38990.0, "amazon"),
+        listing("Dell Inspiron 3520 Laptop Intel Core i3 8GB 512GB Win11 Black", 36990.0, "flipkart"),
+        {**listing("Acer Aspire Lite Laptop", 30990.0, "amazon"), "identifiers": ["model:al1531"]},
+        {**listing("Lenovo IdeaPad Slim 3 Laptop", 33990.0, "flipkart"), "identifiers": ["model:al1531"]},
+    ])
+    assert [r["duplicates"] for r in results] == [0, 0, 0, 0]
+    print("   ✅ a misread model code doesn't merge different laptops")
+
+
+def test_clustering_is_roughly_linear():
+    """Thousands of listings only compare each one with the few clusters sharing an LSH band"""
+    rng = random.Random(7)
+    vocabulary = ["".join(rng.choice(string.ascii_lowercase) for _ in range(6)) for _ in range(300)]
+    kinds = ["Wireless Earbuds", "Smart Watch", "Bluetooth Speaker", "Power Bank", "Keyboard", "Mouse"]
+    items = []
+    for i in range(1000):
+        name = f"{' '.join(rng.sample(vocabulary, 4))} {kinds[i % 6]}"
+        items.append(listing(name.title(), 1000.0 + i, "amazon"))
+        items.append(listing(f"{name.upper()} (Black)", 990.0 + i, "flipkart"))
+
+    matcher = ProductMatcher()
+    start = time.perf_counter()
+    for item in items:
+        matcher.add(item)
+    elapsed = time.perf_counter() - start
+
+    clusters = matcher.clusters()
+    assert len(clusters) == 1000
+    assert all(len(cluster.listings) == 2 for cluster in clusters)
+    # Pairwise matching would need about n²/2 = 2,000,000 comparisons
+    assert matcher.comparisons < 20 * len(items)
+    print(f"   ✅ {len(items)} listings clustered in {elapsed:.2f}s with {matcher.comparisons} comparisons")
+
+
+if __name__ == "__main__":
+    test_same_product_on_both_marketplaces_is_one_result()
+    test_variants_and_model_numbers_stay_apart()
+    test_model_number_extraction_skips_specs()
+    test_shared_model_code_still_needs_similar_titles()
+    test_clustering_is_roughly_linear()
+    print("✅ Product matcher tests passed")
@@ -0,0 +1,66 @@
+# test_product_stream.py - Test streaming products from the async scraper engine
+import sys
+import os
+import time
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools.async_scraper import AsyncScraperEngine
+from tools.rate_limiter import HostRateLimiter
+from synthetic_pages import amazon_search_page, flipkart_search_page
+
+
+class FixtureEngine(AsyncScraperEngine):
+    """Engine serving synthetic result pages, with Flipkart answering slowly"""
+
+    def __init__(self, flipkart_delay=0.5):
+        super().__init__(rate_limiter=HostRateLimiter(rate=1000, burst=100))
+        self.flipkart_delay = flipkart_delay
+        self.pages = {
+            "www.amazon.in": amazon_search_page(),
+            "www.flipkart.com": flipkart_search_page(),
+        }
+
+    async def fetch(self, url):
+        if "flipkart" in url:
+            await asyncio.sleep(self.flipkart_delay)
+        host = url.split("/")[2]
+        return 200, self.pages[host]
+
+
+def test_products_stream_before_the_scrape_finishes():
+    """The first products arrive long before the slow marketplace answers"""
+    print("🧪 Testing streaming product API")
+    engine = FixtureEngine(flipkart_delay=0.5)
+
+    async def consume():
+        started = time.monotonic()
+        arrivals = []
+        async for product in engine.stream_products("laptop", max_results=10):
+            arrivals.append((time.monotonic() - started, product))
+        return arrivals
+
+    arrivals = asyncio.run(consume())
+    sources = [product["source"] for _, product in arrivals]
+    assert sources.count("amazon") == 5 and sources.count("flipkart") == 5
+    assert arrivals[0][1]["source"] == "amazon" and arrivals[0][0] < 0.4
+    assert arrivals[-1][0] >= 0.5
+    print(f"   ✅ first product after {arrivals[0][0]:.2f}s, last after {arrivals[-1][0]:.2f}s")
+
+
+def test_sync_stream_and_early_stop():
+    """Worker threads can iterate the stream and stop it early"""
+    engine = FixtureEngine(flipkart_delay=5)
+    started = time.monotonic()
+    stream = engine.stream_products_sync("laptop", max_results=10)
+    first = [next(stream) for _ in range(3)]
+    stream.close()
+    assert [p["source"] for p in first] == ["amazon"] * 3
+    assert all(p["product_id"] for p in first)
+    assert time.monotonic() - started < 2
+
+
+if __name__ == "__main__":
+    test_products_stream_before_the_scrape_finishes()
+    test_sync_stream_and_early_stop()
+    print("✅ Product stream tests passed")
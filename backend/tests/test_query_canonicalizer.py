@@ -0,0 +1,77 @@
+# test_query_canonicalizer.py - Test query normalization shared by cache, scrapers and filters
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services.filter_processor import FilterProcessor
+from services.product_cache import ProductCache
+from tools.enhanced_web_scraper import EnhancedWebScraper
+from tools.query_canonicalizer import canonical_query, normalize_query
+from models import SearchFilters
+
+
+def test_spelling_variants_share_one_canonical_form():
+    print("🧪 Testing query canonicalization")
+    variants = ["Gaming Laptop", "gaming  laptop", "laptop gaming", "Laptop for Gaming!", "best gaming laptop"]
+    assert {canonical_query(q) for q in variants} == {"gaming laptop"}
+    print("   ✅ case, whitespace, stopwords, punctuation and order ignored")
+
+
+def test_product_words_are_not_stopwords():
+    """One query must never share a cache key with a different product"""
+    assert canonical_query("tank top") == "tank top" and canonical_query("crop top") == "crop top"
+    assert canonical_query("top load washing machine") == "load machine top washing"
+    assert canonical_query("in ear headphones") != canonical_query("on ear headphones")
+    assert canonical_query("vitamin a capsules") != canonical_query("vitamin capsules")
+    assert normalize_query("C++ book") == "c++ book" and normalize_query("Google One 2TB+") == "google one 2tb+"
+    assert normalize_query("-- laptop ++ bag -") == "laptop bag"
+    print("   ✅ product words and c++ survive normalization")
+
+
+def test_currencies_and_units_are_normalized():
+    prices = ["gaming laptop under Rs. 60,000", "Gaming laptop below ₹60k", "gaming laptop under 60000 rupees",
+              "laptop gaming under INR 60000"]
+    assert {canonical_query(q) for q in prices} == {"gaming laptop under ₹60000"}
+    assert normalize_query('15.6" Laptop 16 GB RAM') == "15.6inch laptop 16gb ram"
+    assert normalize_query("15.6-inch laptop 16gb ram") == "15.6inch laptop 16gb ram"
+    assert normalize_query("USB-C charger 65 W") == "usb-c charger 65w"
+    assert normalize_query("earbuds under $1.5k") == "earbuds under $1500"
+    print("   ✅ currencies and units normalized")
+
+
+def test_price_bounds_stay_with_their_amount():
+    """Sorting tokens must not turn 'over 20000 under 30000' into its opposite"""
+    assert canonical_query("phone over 20000 under 30000") != canonical_query("phone under 20000 over 30000")
+    assert canonical_query("phone above 20000 below 30000") == canonical_query("phone under 30000 over 20000")
+    print("   ✅ price ranges keep their bounds")
+
+
+def test_marketplace_queries_keep_word_order():
+    scraper = EnhancedWebScraper()
+    assert scraper.amazon_search_url("Laptop for Gaming!").startswith("https://www.amazon.in/s?k=laptop+for+gaming&")
+    assert "q=gaming+laptop+under+%E2%82%B960000" in scraper.flipkart_search_url("Gaming laptop under ₹60k")
+    print("   ✅ scraper URLs use the normalized query")
+
+
+def test_cache_and_filters_use_canonical_keys():
+    cache = ProductCache(max_entries=10, max_bytes=10**6, ttl_seconds=60, sweep_interval=0)
+    cache.set("Gaming Laptop", "amazon", [{"name": "Laptop"}])
+    assert cache.get("laptop for gaming", "amazon") == [{"name": "Laptop"}]
+    assert cache.get("Gaming Laptop", "amazon")
+    assert cache.stats["canonical_hits"] == 1 and cache.stats["hits"] == 2
+
+    enhanced = FilterProcessor().process_filters("Gaming Laptop", SearchFilters(category="laptop"))
+    assert enhanced.canonical_query == "gaming laptop"
+    # "gaming laptop" from the category keywords duplicates the query itself
+    assert enhanced.search_terms.count("gaming laptop") == 1
+    print("   ✅ cache and filter processor share the canonical form")
+
+
+if __name__ == "__main__":
+    test_spelling_variants_share_one_canonical_form()
+    test_product_words_are_not_stopwords()
+    test_currencies_and_units_are_normalized()
+    test_price_bounds_stay_with_their_amount()
+    test_marketplace_queries_keep_word_order()
+    test_cache_and_filters_use_canonical_keys()
+    print("✅ Query canonicalizer tests passed")
@@ -0,0 +1,77 @@
+# test_rate_limiter.py - Test the shared per-host token bucket rate limiter
+import sys
+import os
+import time
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools.rate_limiter import HostRateLimiter
+
+
+def test_burst_is_free_then_requests_are_paced():
+    """Requests within the burst don't wait; the next one waits for a refill"""
+    print("🧪 Testing per-host rate limiter")
+    limiter = HostRateLimiter(rate=20, burst=3, host_rates={}, host_bursts={})
+    delays = [limiter.acquire_sync("https://www.amazon.in/s?k=laptop") for _ in range(4)]
+    assert delays[:3] == [0.0, 0.0, 0.0]
+    assert 0.02 < delays[3] <= 0.05
+    # Another host has its own budget
+    assert limiter.acquire_sync("www.flipkart.com") == 0.0
+    stats = limiter.snapshot()["www.amazon.in"]
+    assert stats["requests"] == 4 and stats["delayed"] == 1
+    print("   ✅ burst passes immediately, then paced at the configured rate")
+
+
+def test_waiting_does_not_block_the_event_loop():
+    """Callers waiting for budget sleep asynchronously and are served in order"""
+    limiter = HostRateLimiter(rate=10, burst=1, host_rates={}, host_bursts={})
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    async def main():
+        started = time.monotonic()
+        delays, _ = await asyncio.gather(
+            asyncio.gather(*(limiter.acquire("www.amazon.in") for _ in range(3))), ticker())
+        return delays, time.monotonic() - started
+
+    delays, elapsed = asyncio.run(main())
+    assert delays[0] == 0.0 and delays[1] < delays[2]
+    assert 0.18 <= elapsed < 0.5
+    assert len(ticks) == 5 and ticks[-1] - ticks[0] < 0.15
+
+
+def test_cancelled_waits_refund_their_tokens():
+    """Waiters cancelled by a deadline don't leave debt that delays later requests"""
+    limiter = HostRateLimiter(rate=2, burst=1, host_rates={}, host_bursts={})
+
+    async def main():
+        for _ in range(20):
+            try:
+                await asyncio.wait_for(limiter.acquire("www.flipkart.com"), timeout=0.01)
+            except asyncio.TimeoutError:
+                pass
+        return limiter.bucket("www.flipkart.com").reserve()
+
+    # Without refunds the 20th abandoned wait would leave the next request ~10s behind
+    assert asyncio.run(main()) <= 0.5
+    assert limiter.snapshot()["www.flipkart.com"]["refunded"] == 19
+
+
+def test_per_host_overrides():
+    """Configured host rates and bursts override the defaults"""
+    limiter = HostRateLimiter(rate=1, burst=1, host_rates={"www.flipkart.com": 5}, host_bursts={"www.flipkart.com": 4})
+    bucket = limiter.bucket("https://WWW.FLIPKART.COM/search?q=phone")
+    assert (bucket.rate, bucket.burst) == (5, 4)
+    assert limiter.bucket("www.amazon.in").rate == 1
+
+
+if __name__ == "__main__":
+    test_burst_is_free_then_requests_are_paced()
+    test_waiting_does_not_block_the_event_loop()
+    test_cancelled_waits_refund_their_tokens()
+    test_per_host_overrides()
+    print("✅ Rate limiter tests passed")
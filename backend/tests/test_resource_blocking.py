@@ -0,0 +1,111 @@
+# test_resource_blocking.py - Test fast-mode request blocking and its traffic report
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools.resource_blocking import ResourceReport, page_traffic, should_block
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type, size=1000):
+        self.url = url
+        self.resource_type = resource_type
+        self.size = size
+
+    async def sizes(self):
+        return {"responseBodySize": self.size, "responseHeadersSize": 0}
+
+
+class FakeRoute:
+    def __init__(self, request):
+        self.request = request
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+
+class FakePage:
+    """Records routes and listeners the way a Playwright page holds them"""
+
+    def __init__(self):
+        self.routes = []
+        self.listeners = []
+
+    def on(self, event, handler):
+        self.listeners.append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners.remove(handler)
+
+    async def route(self, pattern, handler):
+        self.routes.append(handler)
+
+    async def unroute(self, pattern, handler):
+        self.routes.remove(handler)
+
+    async def load(self, requests):
+        for request in requests:
+            route = FakeRoute(request)
+            for handler in self.routes:
+                await handler(route)
+            if route.outcome != "aborted":
+                for listener in self.listeners:
+                    listener(request)
+
+
+def test_blocking_rules():
+    """Heavy resource types and third-party hosts are blocked; the site's own documents and scripts are not"""
+    print("🧪 Testing resource blocking rules")
+    assert should_block("amazon", "image", "https://m.media-amazon.com/images/I/x.jpg")
+    assert should_block("amazon", "font", "https://www.amazon.in/font.woff2")
+    assert should_block("amazon", "script", "https://www.googletagmanager.com/gtm.js")
+    assert not should_block("amazon", "document", "https://www.amazon.in/s?k=laptop")
+    assert not should_block("amazon", "script", "https://images-eu.ssl-images-amazon.com/app.js")
+    assert not should_block("flipkart", "xhr", "https://rome.api.flipkart.com/api/4/page/fetch")
+    assert should_block("flipkart", "script", "https://evilflipkart.com/x.js")
+    assert not should_block("flipkart", "script", "https://cdn.partner.com/x.js", hosts=("flipkart.com", "partner.com"))
+
+
+def test_fast_mode_report_shows_savings():
+    """Full and fast scrapes of the same page produce a per-search savings figure"""
+    page_requests = [
+        FakeRequest("https://www.amazon.in/s?k=laptop", "document", 200_000),
+        FakeRequest("https://images-eu.ssl-images-amazon.com/app.js", "script", 100_000),
+        FakeRequest("https://m.media-amazon.com/images/I/1.jpg", "image", 300_000),
+        FakeRequest("https://www.amazon.in/style.css", "stylesheet", 50_000),
+        FakeRequest("https://ads.example.com/pixel.js", "script", 30_000),
+    ]
+    report = ResourceReport()
+    page = FakePage()
+
+    async def scrape(fast):
+        async with page_traffic(page, "amazon", fast) as traffic:
+            await page.load(page_requests)
+            traffic.mark_ready()
+        return traffic
+
+    async def main():
+        return await scrape(False), await scrape(True)
+
+    full, fast = asyncio.run(main())
+    assert page.routes == [] and page.listeners == []  # the pooled page is handed back clean
+    assert full.requests == 5 and full.bytes_received == 680_000
+    assert fast.requests == 2 and fast.bytes_received == 300_000
+    assert fast.blocked == {"image": 1, "stylesheet": 1, "script": 1}
+
+    for traffic in (full, fast):
+        report.record(traffic)
+    savings = report.snapshot()["amazon"]["savings_per_search"]
+    assert round(savings["kb"]) == round(380_000 / 1024)
+    print(f"   ✅ fast mode saves {savings['kb']} KB per search")
+
+
+if __name__ == "__main__":
+    test_blocking_rules()
+    test_fast_mode_report_shows_savings()
+    print("✅ Resource blocking tests passed")
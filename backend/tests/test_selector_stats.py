@@ -0,0 +1,130 @@
+# test_selector_stats.py - Test adaptive selector ordering driven by live hit rates
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools.extraction_plans import ExtractionPlan, Field, stripped_text
+from tools.html_parsers import ContainerRule, find_containers, make_soup
+from tools.selector_stats import SelectorStats, get_selector_stats, selector_stats_snapshot
+
+# The hand-written first choice ("h2 span") is gone from this "new layout"; ".title" wins
+NEW_LAYOUT = '<div><p class="title">Gaming Laptop</p></div>'
+# The old layout again: only the precise selector is there
+OLD_LAYOUT = '<div><h2><span>Gaming Laptop</span></h2></div>'
+# One card with an empty title: "h2 span" is still on the page, the cascade falls through
+EMPTY_TITLE = '<div><h2><span></span></h2><p class="title">Gaming Laptop</p></div>'
+# Both match, but the generic ".title" holds an unrelated label
+BOTH = '<div><h2><span>Gaming Laptop</span></h2><p class="title">Sponsored</p></div>'
+
+
+def test_winning_fallback_moves_first():
+    """After enough containers the selector that keeps winning is tried first"""
+    print("🧪 Testing adaptive selector ordering")
+    stats = get_selector_stats("test-adaptive")
+    stats.reorder_every = 5
+    stats.probe_every = 100
+    plan = ExtractionPlan("test-adaptive", [Field("name", ["h2 span", ".title"], stripped_text)])
+    assert stats.order("name") == ["h2 span", ".title"]
+
+    for _ in range(5):
+        result = plan.run(make_soup(NEW_LAYOUT, "html.parser").div)
+        assert result.get("name") == "Gaming Laptop"
+    assert stats.order("name") == [".title", "h2 span"]
+
+    # Once reordered, the old first choice is no longer tried (and so no longer misses)
+    result = plan.run(make_soup(NEW_LAYOUT, "html.parser").div)
+    assert result.matched == {"name": ".title"}
+    snapshot = selector_stats_snapshot()["test-adaptive"]
+    rows = {row["selector"]: row for row in snapshot["fields"]["name"]}
+    assert snapshot["containers"] == 6
+    assert rows[".title"]["hits"] == 6 and rows[".title"]["position"] == 0
+    assert rows["h2 span"]["misses"] == 5 and rows["h2 span"]["default_position"] == 0
+    print("   ✅ fallback selector promoted after 5 containers")
+
+
+def test_order_recovers_after_layout_change():
+    """Decayed recent wins let the original selector win back its place"""
+    stats = SelectorStats("test-recover", reorder_every=4)
+    stats.register("price", ["a", "b"])
+    for _ in range(4):
+        stats.record({"price": ("b", ["a"])})
+    assert stats.order("price") == ["b", "a"]
+    for _ in range(8):
+        stats.record({"price": ("a", [])})
+    assert stats.order("price") == ["a", "b"]
+
+
+
+def test_empty_values_do_not_demote_a_selector():
+    """A selector that finds an element with no usable value keeps its place"""
+    stats = get_selector_stats("test-empty")
+    stats.reorder_every = 5
+    stats.probe_every = 100
+    plan = ExtractionPlan("test-empty", [Field("name", ["h2 span", ".title"], stripped_text)])
+    names = [plan.run(make_soup(EMPTY_TITLE, "html.parser").div).get("name") for _ in range(5)]
+    assert names == ["Gaming Laptop"] * 5
+    assert stats.order("name") == ["h2 span", ".title"]
+
+    # So the generic fallback never shadows the precise selector on the normal layout
+    names = [plan.run(make_soup(BOTH, "html.parser").div).get("name") for _ in range(10)]
+    assert names == ["Gaming Laptop"] * 10
+    print("   ✅ empty values fall through without demoting the selector")
+
+
+def test_demoted_default_wins_its_place_back():
+    """A demoted selector that wins again (e.g. on a probe container) is restored at once"""
+    stats = get_selector_stats("test-probe")
+    stats.reorder_every = 5
+    stats.probe_every = 100
+    plan = ExtractionPlan("test-probe", [Field("name", ["h2 span", ".title"], stripped_text)])
+    for _ in range(5):
+        plan.run(make_soup(NEW_LAYOUT, "html.parser").div)
+    assert stats.order("name") == [".title", "h2 span"]
+
+    names = [plan.run(make_soup(OLD_LAYOUT, "html.parser").div).get("name") for _ in range(3)]
+    assert names == ["Gaming Laptop"] * 3
+    assert stats.order("name") == ["h2 span", ".title"]
+
+    probing = SelectorStats("test-probe-order", reorder_every=4, probe_every=3)
+    probing.register("price", ["a", "b"])
+    for _ in range(4):
+        probing.record({"price": ("b", ["a"])})
+    assert probing.order("price") == ["b", "a"]
+    probing.record({"price": ("b", ["a"])})
+    # The sixth container is a probe, tried in the default order; "a" wins there again
+    assert probing.order("price") == ["a", "b"]
+    probing.record({"price": ("a", [])})
+    assert probing.order("price") == ["a", "b"] and probing.snapshot()["fields"]["price"][0]["selector"] == "a"
+    print("   ✅ precise selector restored as soon as it wins again")
+
+
+def test_fallback_only_promoted_while_selectors_above_miss():
+    stats = SelectorStats("test-promote", reorder_every=4, probe_every=100)
+    stats.register("price", ["a", "b", "c"])
+    for _ in range(4):
+        stats.record({"price": ("c", ["a"])})
+    # "a" missed; "b" was never tried and keeps its place ahead of "c"
+    assert stats.order("price") == ["b", "c", "a"]
+
+
+def test_container_class_tokens_adapt():
+    """Container class alternatives are re-ranked like field selectors"""
+    stats = get_selector_stats("test-containers")
+    stats.reorder_every = 3
+    rule = ContainerRule("div", class_tokens=["_old", "_new"], site="test-containers")
+    soup = make_soup('<div class="x _new"></div>' * 3 + '<p class="_new"></p>', "html.parser")
+    assert len(find_containers(soup, [rule])) == 3
+    # Container matches don't count as extracted containers; re-ranking follows extraction
+    assert stats.snapshot()["containers"] == 0
+    stats.record({}, containers=3)
+    assert stats.order("container") == ["_new", "_old"]
+
+
+if __name__ == "__main__":
+    test_winning_fallback_moves_first()
+    test_order_recovers_after_layout_change()
+    test_empty_values_do_not_demote_a_selector()
+    test_demoted_default_wins_its_place_back()
+    test_fallback_only_promoted_while_selectors_above_miss()
+    test_container_class_tokens_adapt()
+    print("✅ Selector stats tests passed")
@@ -0,0 +1,178 @@
+# test_single_flight.py - Test coalescing of identical concurrent scrapes
+import sys
+import os
+import time
+import asyncio
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services.enhanced_data_sources import EnhancedDataSources
+import tools.single_flight as single_flight
+from tools.single_flight import SingleFlight
+from conftest import fresh_product_stores
+
+
+def test_concurrent_callers_share_one_call():
+    """Callers on different event loops and threads get one scrape's result"""
+    print("🧪 Testing single-flight coalescing")
+    flight = SingleFlight("test")
+    calls = []
+
+    async def scrape():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return [{"name": "Laptop", "price": 50000}]
+
+    results = []
+
+    def caller():
+        results.append(asyncio.run(flight.run(("gaming laptop", "amazon"), scrape)))
+
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    results.append(flight.run_sync(("gaming laptop", "amazon"), scrape))
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and len(results) == 5
+    assert all(result == [{"name": "Laptop", "price": 50000}] for result in results)
+    # Each caller owns its copy
+    results[0][0]["price"] = 1
+    assert results[1][0]["price"] == 50000
+    stats = flight.snapshot()
+    assert stats["executed"] == 1 and stats["coalesced"] == 4 and stats["in_flight"] == 0
+    print("   ✅ five callers, one scrape")
+
+
+def test_errors_reach_every_caller_and_are_not_remembered():
+    flight = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise ValueError("blocked")
+
+    async def main():
+        return await asyncio.gather(*(flight.run("phone", failing) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(error, ValueError) for error in errors)
+
+    async def ok():
+        return ["phone"]
+
+    # A finished call is not reused: the next search runs again
+    assert flight.run_sync("phone", ok) == ["phone"]
+    assert flight.snapshot()["executed"] == 2 and flight.snapshot()["errors"] == 1
+    print("   ✅ failures shared, then retried")
+
+
+def test_late_stream_subscribers_replay_earlier_items():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def scrape(on_item):
+        runs.append(1)
+        for i in range(4):
+            await asyncio.sleep(0.05)
+            on_item({"name": f"Phone {i}"})
+        return None
+
+    first = []
+
+    def early():
+        first.extend(flight.stream_sync("phone", scrape))
+
+    thread = threading.Thread(target=early)
+    thread.start()
+    time.sleep(0.12)  # join after some items were already emitted
+    second = list(flight.stream_sync("phone", scrape))
+    thread.join()
+
+    expected = [{"name": f"Phone {i}"} for i in range(4)]
+    assert first == expected and second == expected and len(runs) == 1
+    print("   ✅ joined stream gets every product")
+
+
+def test_abandoned_stream_is_cancelled():
+    flight = SingleFlight("test")
+    cancelled = threading.Event()
+
+    async def scrape(on_item):
+        try:
+            on_item("first")
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    stream = flight.stream_sync("laptop", scrape)
+    assert next(stream) == "first"
+    stream.close()
+    assert cancelled.wait(2) and flight.snapshot()["in_flight"] == 0
+    print("   ✅ scrape cancelled once nobody listens")
+
+
+def test_stream_is_published_with_its_future():
+    """A follower never finds a stream whose future doesn't exist yet"""
+    flight = SingleFlight("test")
+    seen = []
+    get_scraper_loop = single_flight.get_scraper_loop
+
+    def starting_loop():
+        # Called while the leader starts the scrape; the stream must not be joinable yet
+        seen.append(flight._calls.get("tablet"))
+        return get_scraper_loop()
+
+    async def scrape(on_item):
+        on_item("first")
+
+    single_flight.get_scraper_loop = starting_loop
+    try:
+        assert list(flight.stream_sync("tablet", scrape)) == ["first"]
+    finally:
+        single_flight.get_scraper_loop = get_scraper_loop
+    assert seen == [None] and flight.snapshot()["in_flight"] == 0
+
+
+class CountingEngine:
+    def __init__(self):
+        self.calls = 0
+
+    async def search_amazon(self, query, max_results=10):
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        return [{"name": f"{query} {i}", "current_price": 1000.0, "image_url": "N/A", "product_url": "N/A"}
+                for i in range(max_results)]
+
+
+def test_data_sources_coalesce_cache_misses(product_stores):
+    """Spelling variants of one search in flight together scrape once"""
+    engine = CountingEngine()
+
+    async def main():
+        sources = [EnhancedDataSources() for _ in range(3)]
+        for source in sources:
+            source.engine = engine
+        return await asyncio.gather(
+            sources[0].search_amazon_api("Gaming Laptop", 3),
+            sources[1].search_amazon_api("laptop for gaming", 3),
+            sources[2].search_amazon_api("gaming  laptop", 3),
+        )
+
+    results = asyncio.run(main())
+
+    assert engine.calls == 1
+    assert all(len(result) == 3 and result[0]["source"] == "amazon" for result in results)
+    print("   ✅ one Amazon scrape for three concurrent searches")
+
+
+if __name__ == "__main__":
+    test_concurrent_callers_share_one_call()
+    test_errors_reach_every_caller_and_are_not_remembered()
+    test_late_stream_subscribers_replay_earlier_items()
+    test_abandoned_stream_is_cancelled()
+    test_stream_is_published_with_its_future()
+    with fresh_product_stores() as stores:
+        test_data_sources_coalesce_cache_misses(stores)
+    print("✅ Single-flight tests passed")
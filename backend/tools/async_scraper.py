@@ -0,0 +1,284 @@
+# tools/async_scraper.py
+import asyncio
+import logging
+import queue
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from tools.circuit_breaker import SourceGuard, SourceUnavailable, get_source_guard, looks_blocked
+from tools.enhanced_web_scraper import EnhancedWebScraper, DEFAULT_HEADERS, clean_search_query
+from tools.rate_limiter import HostRateLimiter, get_rate_limiter
+from tools.scraper_config import env_float, env_host_map, env_int
+from tools.scraper_loop import get_scraper_loop, on_scraper_loop, run_sync
+
+logger = logging.getLogger(__name__)
+
+# aiohttp only decodes brotli when the Brotli package is installed
+ASYNC_HEADERS = {**DEFAULT_HEADERS, 'Accept-Encoding': 'gzip, deflate'}
+
+# Marks the end of a product stream
+_STREAM_END = object()
+
+class AsyncScraperEngine:
+    """asyncio scraping engine with one long-lived pooled HTTP client per marketplace host"""
+
+    # Hosts whose clients are opened at startup so the first search skips connection setup
+    WARM_HOSTS = ('www.amazon.in', 'www.flipkart.com')
+
+    def __init__(self, connections_per_host: Optional[int] = None, host_limits: Optional[Dict[str, int]] = None,
+                 request_timeout: Optional[float] = None, rate_limiter: Optional[HostRateLimiter] = None,
+                 source_guard: Optional[SourceGuard] = None):
+        self.connections_per_host = connections_per_host or env_int("SCRAPER_CONNECTIONS_PER_HOST", 8)
+        self.host_limits = host_limits if host_limits is not None else env_host_map("SCRAPER_HOST_CONNECTION_LIMITS", int)
+        self.request_timeout = request_timeout or env_float("SCRAPER_REQUEST_TIMEOUT", 15.0)
+        self._clients: Dict[str, aiohttp.ClientSession] = {}
+        self._parsers: Dict[str, EnhancedWebScraper] = {}
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.source_guard = source_guard or get_source_guard()
+
+    def _client(self, host: str) -> aiohttp.ClientSession:
+        """Pooled client for a host; must be called on the scraper loop"""
+        client = self._clients.get(host)
+        if client is None or client.closed:
+            limit = self.host_limits.get(host, self.connections_per_host)
+            connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit, ttl_dns_cache=300,
+                                             keepalive_timeout=60)
+            client = aiohttp.ClientSession(
+                connector=connector,
+                headers=ASYNC_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+            self._clients[host] = client
+            logger.info(f"Opened pooled client for {host} (limit {limit})")
+        return client
+
+    def _parser(self, amazon_domain: str = 'amazon.in') -> EnhancedWebScraper:
+        """Parse-only scraper used for page extraction and fallbacks"""
+        parser = self._parsers.get(amazon_domain)
+        if parser is None:
+            parser = EnhancedWebScraper(amazon_domain=amazon_domain)
+            self._parsers[amazon_domain] = parser
+        return parser
+
+    @on_scraper_loop
+    async def start(self):
+        """Open the pooled clients for the main marketplace hosts"""
+        for host in self.WARM_HOSTS:
+            self._client(host)
+
+    @on_scraper_loop
+    async def close(self):
+        """Close every pooled client"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.close()
+
+    @on_scraper_loop
+    async def fetch(self, url: str) -> Tuple[int, bytes]:
+        """GET a page through the host's pooled client, within the host's rate budget.
+
+        Refused at once with SourceUnavailable while the marketplace's breaker is open.
+        """
+        breaker = self.source_guard.breaker(url)
+        if not breaker.allow():
+            raise SourceUnavailable(f"{breaker.name} circuit is open")
+        await self.rate_limiter.acquire(url)
+        client = self._client(urlsplit(url).hostname)
+        try:
+            async with client.get(url) as response:
+                status, content = response.status, await response.read()
+        except Exception as e:
+            breaker.record_failure(f"{type(e).__name__}: {e}")
+            raise
+        if looks_blocked(status, content):
+            breaker.record_failure(f"HTTP {status}" + (" bot check" if status == 200 else ""))
+        elif status == 200:
+            breaker.record_success()
+        return status, content
+
+    async def _fetch_page(self, label: str, url: str, parse, max_results: int,
+                          on_product=None) -> Optional[List[Dict[str, Any]]]:
+        """Fetch and parse one results page; None when the request fails"""
+        try:
+            status, content = await self.fetch(url)
+            if status != 200:
+                logger.error(f"{label} request failed with status: {status}")
+                return None
+            return await asyncio.to_thread(parse, content, max_results, on_product)
+        except Exception as e:
+            logger.error(f"{label} page error for {url}: {e}")
+            return None
+
+    async def _search_pages(self, parser: EnhancedWebScraper, platform: str, url_for, parse, query: str,
+                            max_results: int, on_product=None) -> List[Dict[str, Any]]:
+        """Fetch the pages max_results needs concurrently, then further pages one at a time while short.
+
+        Concurrent page requests still queue on the host's rate limiter, so a burst
+        never exceeds the configured per-host budget. Products are merged (and passed
+        to `on_product`) one by one as the page parsers extract them.
+        """
+        label = parser.platform_label(platform)
+        loop = asyncio.get_running_loop()
+        products, seen = [], set()
+
+        def accept(product):
+            if parser.merge_page(products, seen, [product], max_results) and on_product:
+                on_product(product)
+
+        def extracted(product):
+            # Called from the parser thread; merging stays on the loop
+            loop.call_soon_threadsafe(accept, product)
+
+        first_pages = range(1, parser.pages_for(platform, max_results) + 1)
+        pages = await asyncio.gather(*(self._fetch_page(label, url_for(query, page), parse, max_results, extracted)
+                                       for page in first_pages))
+        if all(page is None for page in pages):
+            raise SourceUnavailable(f"every {label} results page failed")
+
+        page, page_products = len(pages), pages[-1]
+        while page_products and parser.needs_next_page(label, page, page_products, products, max_results):
+            page += 1
+            page_products = await self._fetch_page(label, url_for(query, page), parse, max_results, extracted)
+        return products
+
+    @on_scraper_loop
+    async def search_amazon(self, query: str, max_results: int = 10, amazon_domain: str = 'amazon.in',
+                            on_product=None) -> List[Dict[str, Any]]:
+        """Async Amazon search, falling back to curated products like the sync scraper"""
+        parser = self._parser(amazon_domain)
+        logger.info(f"Searching Amazon ({amazon_domain}) for: {clean_search_query(query)}")
+        products = await self._guarded_search('amazon', query, lambda: self._search_pages(
+            parser, 'amazon', parser.amazon_search_url, parser.parse_amazon_results, query, max_results, on_product))
+        if not products:
+            logger.info("No products from scraping, using fallback products...")
+            products = parser.get_fallback_products(query, max_results)
+            for product in products:
+                if on_product:
+                    on_product(product)
+        return products
+
+    @on_scraper_loop
+    async def search_flipkart(self, query: str, max_results: int = 10, on_product=None) -> List[Dict[str, Any]]:
+        """Async Flipkart search"""
+        parser = self._parser()
+        logger.info(f"Searching Flipkart for: {clean_search_query(query)}")
+        return await self._guarded_search('flipkart', query, lambda: self._search_pages(
+            parser, 'flipkart', parser.flipkart_search_url, parser.parse_flipkart_results, query, max_results,
+            on_product))
+
+    async def _guarded_search(self, source: str, query: str, search) -> List[Dict[str, Any]]:
+        """Run `search()` unless the source's breaker is open or this search just failed.
+
+        Returns [] when skipped or failed; failed searches are negatively cached so
+        repeats skip the source until the entry expires.
+        """
+        try:
+            self.source_guard.check(source, query)
+        except SourceUnavailable as e:
+            logger.warning(f"Skipping {source} scrape: {e}")
+            return []
+        try:
+            return await search()
+        except Exception as e:
+            logger.error(f"{source.capitalize()} scraping error: {e}")
+            self.source_guard.remember_failure(source, query)
+            return []
+
+    @on_scraper_loop
+    async def scrape_products(self, query: str, max_results: int = 10, amazon_domain: str = 'amazon.in',
+                              deadline: float = 30.0, on_product=None) -> List[Dict[str, Any]]:
+        """Search Amazon and Flipkart concurrently, merging results as they arrive.
+
+        `on_product` is called on the scraper loop with each product as it is extracted.
+        """
+        amazon_results = max_results // 2
+        searches = [
+            asyncio.ensure_future(self.search_amazon(query, amazon_results, amazon_domain, on_product)),
+            asyncio.ensure_future(self.search_flipkart(query, max_results - amazon_results, on_product)),
+        ]
+        all_products = []
+        try:
+            for next_done in asyncio.as_completed(searches, timeout=deadline):
+                try:
+                    all_products.extend(await next_done)
+                except asyncio.TimeoutError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Scraping error: {e}")
+        except asyncio.TimeoutError:
+            logger.warning(f"Scrape deadline of {deadline}s reached with {len(all_products)} products")
+        finally:
+            for search in searches:
+                search.cancel()
+
+        logger.info(f"Total products scraped: {len(all_products)}")
+        return all_products
+
+    async def stream_products(self, query: str, max_results: int = 10, amazon_domain: str = 'amazon.in',
+                              deadline: float = 30.0) -> AsyncIterator[Dict[str, Any]]:
+        """Yield products from both marketplaces as soon as each is extracted.
+
+        Every product carries its `source` ('amazon' or 'flipkart'). Works from any
+        event loop; leaving the loop early cancels the remaining scrape.
+        """
+        loop = asyncio.get_running_loop()
+        products: asyncio.Queue = asyncio.Queue()
+
+        def deliver(product):
+            loop.call_soon_threadsafe(products.put_nowait, product)
+
+        scrape = asyncio.ensure_future(self.scrape_products(query, max_results, amazon_domain, deadline, deliver))
+        scrape.add_done_callback(lambda _: products.put_nowait(_STREAM_END))
+        try:
+            while True:
+                product = await products.get()
+                if product is _STREAM_END:
+                    break
+                yield product
+        finally:
+            scrape.cancel()
+
+    def stream_products_sync(self, query: str, max_results: int = 10, amazon_domain: str = 'amazon.in',
+                             deadline: float = 30.0) -> Iterator[Dict[str, Any]]:
+        """Blocking iterator over stream_products() for worker threads and CrewAI tools"""
+        products: queue.Queue = queue.Queue()
+        scrape = asyncio.run_coroutine_threadsafe(
+            self.scrape_products(query, max_results, amazon_domain, deadline, products.put), get_scraper_loop())
+        scrape.add_done_callback(lambda _: products.put(_STREAM_END))
+        try:
+            while True:
+                product = products.get()
+                if product is _STREAM_END:
+                    break
+                yield product
+        finally:
+            scrape.cancel()
+
+    def run_sync(self, coro, timeout: Optional[float] = None):
+        """Block on an engine coroutine from synchronous code"""
+        return run_sync(coro, timeout)
+
+
+_engine: Optional[AsyncScraperEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_scraper_engine() -> AsyncScraperEngine:
+    """Process-wide scraper engine shared by the API, data sources and CrewAI tools"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncScraperEngine()
+        return _engine
+
+
+async def close_scraper_engine():
+    """Close the shared engine's pooled clients (FastAPI shutdown)"""
+    global _engine
+    with _engine_lock:
+        engine, _engine = _engine, None
+    if engine is not None:
+        await engine.close()
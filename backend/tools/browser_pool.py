@@ -0,0 +1,215 @@
+# tools/browser_pool.py
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from tools.scraper_config import env_bool, env_int
+from tools.scraper_loop import on_scraper_loop
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledContext:
+    """A browser context with the pages it keeps open for reuse"""
+
+    def __init__(self, context):
+        self.context = context
+        self.idle_pages: List[Any] = []
+        self.in_use = 0
+        self.uses = 0
+        self.retiring = False
+
+
+class BrowserPool:
+    """Process-wide headless Chromium with a bounded set of reusable contexts and pages.
+
+    One browser is launched (at FastAPI startup, or on first use) and kept running.
+    Scrapes borrow a page through `run()`; at most `max_concurrency` (by default
+    `max_contexts * pages_per_context`) pages are in use at once and further callers
+    wait for one to be returned. A
+    context is retired after `max_uses` page leases to shed cookies and memory, and
+    the browser is relaunched if it stops responding.
+    """
+
+    def __init__(self, max_contexts: Optional[int] = None, pages_per_context: Optional[int] = None,
+                 max_uses: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 headless: Optional[bool] = None, launcher: Optional[Callable[[], Awaitable[Any]]] = None):
+        self.max_contexts = max_contexts or env_int("SCRAPER_BROWSER_CONTEXTS", 2)
+        self.pages_per_context = pages_per_context or env_int("SCRAPER_BROWSER_PAGES_PER_CONTEXT", 2)
+        self.max_uses = max_uses or env_int("SCRAPER_BROWSER_MAX_USES", 50)
+        # Pages the browser may drive at once; defaults to every page the contexts can hold
+        self.max_concurrency = min(max_concurrency or env_int("SCRAPER_BROWSER_CONCURRENCY", self.capacity),
+                                   self.capacity)
+        self.headless = env_bool("SCRAPER_BROWSER_HEADLESS", True) if headless is None else headless
+        self._launcher = launcher or self._launch_chromium
+        self._playwright = None
+        self._browser = None
+        self._contexts: List[_PooledContext] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.stats = {"launches": 0, "contexts_created": 0, "contexts_recycled": 0, "pages_created": 0, "leases": 0}
+
+    @property
+    def capacity(self) -> int:
+        return self.max_contexts * self.pages_per_context
+
+    async def _launch_chromium(self):
+        # Imported lazily so the HTTP scrapers work without Playwright installed
+        from playwright.async_api import async_playwright
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(headless=self.headless)
+
+    def _healthy(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _ensure_browser(self):
+        """Launch the browser, or relaunch it if it crashed or disconnected"""
+        if self._healthy():
+            return
+        if self._browser is not None:
+            logger.warning("Pooled browser is not responding, relaunching")
+            # Close what's left of the old one so its Chromium processes don't leak
+            contexts, self._contexts = self._contexts, []
+            for pooled in contexts:
+                await self._close_quietly(pooled.context)
+            await self._close_quietly(self._browser)
+            self._browser = None
+        self._browser = await self._launcher()
+        self.stats["launches"] += 1
+        logger.info(f"Launched pooled browser ({self.max_contexts} contexts x {self.pages_per_context} pages)")
+
+    async def _new_context(self) -> _PooledContext:
+        pooled = _PooledContext(await self._browser.new_context())
+        self._contexts.append(pooled)
+        self.stats["contexts_created"] += 1
+        return pooled
+
+    async def _acquire(self):
+        async with self._lock:
+            await self._ensure_browser()
+            live = [c for c in self._contexts if not c.retiring]
+            # Prefer an idle page, then spare page capacity in an open context, then a new context
+            pooled = next((c for c in live if c.idle_pages), None)
+            if pooled is None:
+                pooled = next((c for c in live if c.in_use + len(c.idle_pages) < self.pages_per_context), None)
+            if pooled is None:
+                # Either below max_contexts, or only retiring contexts still hold pages and
+                # a replacement opens alongside them; the page slots bound usage either way
+                pooled = await self._new_context()
+            page = None
+            while pooled.idle_pages and page is None:
+                candidate = pooled.idle_pages.pop()
+                if not candidate.is_closed():
+                    page = candidate
+            if page is None:
+                page = await pooled.context.new_page()
+                self.stats["pages_created"] += 1
+            pooled.in_use += 1
+            return pooled, page
+
+    async def _release(self, pooled: _PooledContext, page, healthy: bool):
+        async with self._lock:
+            pooled.in_use -= 1
+            pooled.uses += 1
+            if pooled.uses >= self.max_uses:
+                pooled.retiring = True
+            if healthy and not pooled.retiring and not page.is_closed():
+                pooled.idle_pages.append(page)
+            else:
+                await self._close_quietly(page)
+            if pooled.retiring and pooled.in_use == 0 and pooled in self._contexts:
+                self._contexts.remove(pooled)
+                self.stats["contexts_recycled"] += 1
+                await self._close_quietly(pooled.context)
+
+    @staticmethod
+    async def _close_quietly(resource, timeout: float = 10.0):
+        try:
+            # A crashed browser may never answer; don't hold the pool lock forever
+            await asyncio.wait_for(resource.close(), timeout)
+        except Exception as e:
+            logger.debug(f"Ignoring error while closing pooled browser resource: {e}")
+
+    @on_scraper_loop
+    async def start(self):
+        """Launch the browser and open the first context so the first scrape skips cold start"""
+        async with self._primitives():
+            await self._ensure_browser()
+            if not self._contexts:
+                pooled = await self._new_context()
+                pooled.idle_pages.append(await pooled.context.new_page())
+                self.stats["pages_created"] += 1
+
+    def _primitives(self) -> asyncio.Lock:
+        """Create the page slots and pool lock on the scraper loop that uses them"""
+        if self._lock is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @on_scraper_loop
+    async def run(self, scrape: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run `scrape(page, *args, **kwargs)` on a pooled page, waiting for a free one if all are busy"""
+        self._primitives()
+        async with self._slots:
+            pooled, page = await self._acquire()
+            self.stats["leases"] += 1
+            healthy = False
+            try:
+                result = await scrape(page, *args, **kwargs)
+                healthy = True
+                return result
+            finally:
+                # A page whose scrape failed may be stuck mid-navigation; don't hand it out again
+                await self._release(pooled, page, healthy and self._healthy())
+
+    @on_scraper_loop
+    async def close(self):
+        """Close every context, the browser and Playwright"""
+        contexts, self._contexts = self._contexts, []
+        for pooled in contexts:
+            await self._close_quietly(pooled.context)
+        if self._browser is not None:
+            await self._close_quietly(self._browser)
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Pool sizing, current usage and lifetime counters"""
+        return {
+            "browser_connected": self._healthy(),
+            "max_contexts": self.max_contexts,
+            "pages_per_context": self.pages_per_context,
+            "max_uses": self.max_uses,
+            "max_concurrency": self.max_concurrency,
+            "contexts": len(self._contexts),
+            "pages_in_use": sum(c.in_use for c in self._contexts),
+            "idle_pages": sum(len(c.idle_pages) for c in self._contexts),
+            **self.stats,
+        }
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Process-wide browser pool shared by every Playwright scrape"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+        return _pool
+
+
+async def close_browser_pool():
+    """Close the shared browser pool (FastAPI shutdown)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
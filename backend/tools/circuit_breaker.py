@@ -0,0 +1,210 @@
+# tools/circuit_breaker.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from urllib.parse import urlsplit
+
+from tools.query_canonicalizer import canonical_query
+from tools.scraper_config import env_float, env_int
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Marketplace sources, matched against request hosts
+SOURCES = ('amazon', 'flipkart')
+
+# Responses that mean the marketplace is refusing or failing us
+BLOCKED_STATUSES = frozenset({403, 429})
+# Bot-check pages come back as 200s
+BLOCK_PAGE_MARKERS = (b'/errors/validateCaptcha', b'Enter the characters you see below')
+
+
+class SourceUnavailable(Exception):
+    """A source is skipped because its breaker is open or the same search just failed"""
+
+
+def looks_blocked(status: int, content: bytes) -> bool:
+    """Whether a marketplace response counts as a failure for its breaker"""
+    return status in BLOCKED_STATUSES or status >= 500 or any(marker in content for marker in BLOCK_PAGE_MARKERS)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one marketplace.
+
+    After `failure_threshold` consecutive failures the breaker opens and callers are
+    refused at once for `reset_timeout` seconds. Then it turns half-open and lets
+    `half_open_calls` trial requests through: a success closes it, a failure opens
+    it again. A trial that never reports back is given up on after `reset_timeout`.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, half_open_calls: int,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = max(1, half_open_calls)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_at = 0.0
+        self.last_error: Optional[str] = None
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def _refresh_state(self, now: float):
+        if self.state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._trials = 0
+
+    def is_open(self) -> bool:
+        """True (and counted as a rejection) while callers are refused; doesn't use up a half-open trial"""
+        with self._lock:
+            self._refresh_state(self._clock())
+            if self.state == OPEN:
+                self.stats["rejected"] += 1
+                return True
+            return False
+
+    def allow(self) -> bool:
+        """Whether a request may go out now"""
+        with self._lock:
+            now = self._clock()
+            self._refresh_state(now)
+            if self.state == OPEN or (self.state == HALF_OPEN and self._trials >= self.half_open_calls
+                                      and now - self._trial_at < self.reset_timeout):
+                self.stats["rejected"] += 1
+                return False
+            if self.state == HALF_OPEN:
+                self._trials = self._trials + 1 if now - self._trial_at < self.reset_timeout else 1
+                self._trial_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.stats["successes"] += 1
+            self._failures = 0
+            self.state = CLOSED
+
+    def record_failure(self, error: str = ""):
+        with self._lock:
+            self.stats["failures"] += 1
+            self._failures += 1
+            self.last_error = error or self.last_error
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats["opened"] += 1
+                self.state = OPEN
+                self._opened_at = self._clock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            self._refresh_state(now)
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "retry_in_seconds": round(self.reset_timeout - (now - self._opened_at), 1) if self.state == OPEN else None,
+                "last_error": self.last_error,
+                **self.stats,
+            }
+
+
+class NegativeCache:
+    """Short-lived memory of searches that just failed, so repeats skip the source"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.hits = 0
+
+    def add(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = self._clock() + self.ttl_seconds
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return False
+            self.hits += 1
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            live = sum(1 for expires_at in self._entries.values() if expires_at > now)
+        return {"entries": live, "ttl_seconds": self.ttl_seconds, "hits": self.hits}
+
+
+class SourceGuard:
+    """Per-source circuit breakers plus negative caching of failed searches"""
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None,
+                 half_open_calls: Optional[int] = None, negative_ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold or env_int("SCRAPER_BREAKER_FAILURES", 3)
+        self.reset_timeout = reset_timeout or env_float("SCRAPER_BREAKER_RESET_SECONDS", 60)
+        self.half_open_calls = half_open_calls or env_int("SCRAPER_BREAKER_HALF_OPEN_CALLS", 1)
+        self.negative = NegativeCache(negative_ttl or env_float("SCRAPER_NEGATIVE_TTL_SECONDS", 60), clock=clock)
+        self._clock = clock
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def source_for(url_or_source: str) -> str:
+        """'amazon' / 'flipkart' for a marketplace URL or host, else the host itself"""
+        host = (urlsplit(url_or_source).hostname or url_or_source) if "://" in url_or_source else url_or_source
+        host = host.lower()
+        return next((source for source in SOURCES if source in host), host)
+
+    def breaker(self, url_or_source: str) -> CircuitBreaker:
+        source = self.source_for(url_or_source)
+        with self._lock:
+            breaker = self._breakers.get(source)
+            if breaker is None:
+                breaker = CircuitBreaker(source, self.failure_threshold, self.reset_timeout,
+                                         self.half_open_calls, self._clock)
+                self._breakers[source] = breaker
+            return breaker
+
+    def check(self, source: str, query: Optional[str] = None):
+        """Raise SourceUnavailable when a search of `source` should be skipped right now"""
+        if self.breaker(source).is_open():
+            raise SourceUnavailable(f"{source} circuit is open")
+        if query is not None and (source, canonical_query(query)) in self.negative:
+            raise SourceUnavailable(f"{source} search for {query!r} failed recently")
+
+    def remember_failure(self, source: str, query: str):
+        self.negative.add((source, canonical_query(query)))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {
+            "breakers": {breaker.name: breaker.snapshot() for breaker in breakers},
+            "negative_cache": self.negative.snapshot(),
+        }
+
+
+_guard: Optional[SourceGuard] = None
+_guard_lock = threading.Lock()
+
+
+def get_source_guard() -> SourceGuard:
+    """Process-wide breakers and negative cache shared by every scraper"""
+    global _guard
+    with _guard_lock:
+        if _guard is None:
+            _guard = SourceGuard()
+        return _guard
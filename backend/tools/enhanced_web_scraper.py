@@ -1,36 +1,174 @@
 # tools/enhanced_web_scraper.py
 import requests
-from bs4 import BeautifulSoup
 import json
-import time
-import random
-from urllib.parse import quote_plus, urljoin
+from urllib.parse import parse_qs, quote_plus, urljoin, urlsplit
 import re
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import List, Dict, Any, Iterator, Optional
 import logging
 
+from tools.circuit_breaker import SourceGuard, SourceUnavailable, get_source_guard, looks_blocked
+from tools.extraction_plans import ExtractionPlan, Field, any_text, image_source, stripped_text
+from tools.html_parsers import ContainerRule, container_strainer, iter_containers, make_soup, resolve_backend
+from tools.query_canonicalizer import canonical_query, normalize_query
+from tools.rate_limiter import HostRateLimiter, get_rate_limiter
+from tools.scraper_config import env_bool, env_int
+from tools.single_flight import get_single_flight
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Enhanced headers to reduce detection
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate', 
+    'Sec-Fetch-Site': 'cross-site',
+    'Cache-Control': 'max-age=0'
+}
+
+
+# Result container rules, in priority order: the first rule that matches anything wins
+AMAZON_CONTAINER_RULES = [
+    ContainerRule('div', attrs={'data-component-type': 's-search-result'}),
+    ContainerRule('div', class_pattern=r's-result-item'),
+    ContainerRule('div', attrs={'data-asin': True}),
+]
+
+FLIPKART_CONTAINER_RULES = [
+    ContainerRule('div', class_tokens=['_1AtVbE', '_13oc-S', '_2kHMtA', '_3pLy-c'], site='flipkart'),
+    ContainerRule('div', attrs={'data-id': True}),
+    ContainerRule('div', class_pattern=r'col-'),
+]
+
+# Strainers are stateless, so build them once
+AMAZON_CONTAINER_STRAINER = container_strainer(AMAZON_CONTAINER_RULES)
+FLIPKART_CONTAINER_STRAINER = container_strainer(FLIPKART_CONTAINER_RULES)
+
+
+def _amazon_href(element, require_dp: bool = False):
+    """Usable Amazon link: skip empty, invalid, or sponsored URLs"""
+    href = element.get('href')
+    if not href or href == '#' or '/sspa/click' in href:
+        return None
+    if require_dp and '/dp/' not in href:
+        return None
+    return href
+
+
+def _short_text(max_length: int):
+    """Element text when it is non-empty and shorter than max_length"""
+    def value(element):
+        text = element.get_text(strip=True)
+        return text if text and len(text) < max_length else None
+    return value
+
+
+def _flipkart_name(element):
+    """Product title attribute or link text, ignoring very short strings"""
+    name_text = element.get('title') or element.get_text(strip=True)
+    return name_text if name_text and len(name_text) > 5 else None
+
+
+def _flipkart_price(element):
+    """Numeric rupee price"""
+    price_match = re.search(r'₹([\d,]+)', element.get_text(strip=True))
+    return float(price_match.group(1).replace(',', '')) if price_match else None
+
+
+AMAZON_URL_SELECTORS = [
+    'a[href*="/dp/"]',           # Direct product URLs (highest priority)
+    'a[href*="/gp/product/"]',   # Alternative product URLs
+    'h2 a',                      # Title links
+    '.s-link-style',             # Amazon style links
+    'a[data-cy="title-recipe-title"]',
+    '.a-link-normal'             # General Amazon links
+]
+
+# Per-site extraction plans, compiled once at import
+AMAZON_PLAN = ExtractionPlan('amazon', [
+    Field('name', ['h2 a span', 'h2 span', '[data-cy="title-recipe-title"]',
+                   '.s-size-mini .s-link-style a', 'h2.a-size-mini a span'], stripped_text),
+    Field('dp_url', AMAZON_URL_SELECTORS, lambda e: _amazon_href(e, require_dp=True)),
+    Field('any_url', AMAZON_URL_SELECTORS, _amazon_href),
+    Field('price_whole', ['.a-price-whole'], any_text),
+    Field('price_fraction', ['.a-price-fraction'], any_text),
+    Field('price', ['.a-price-whole', '.a-price .a-offscreen', '[data-cy="price-recipe-price"]',
+                    '.a-price-range .a-price .a-offscreen'], any_text),
+    Field('image', ['.s-image', 'img[data-image-latency]', '.a-dynamic-image', 'img[src*="images-amazon"]'],
+          image_source),
+    Field('brand', ['.a-size-base-plus', '[data-cy="brand-recipe-brand"]'], any_text),
+    Field('specs', ['.a-size-base-plus', '.s-size-base-plus'], _short_text(100), many=3),
+])
+
+FLIPKART_PLAN = ExtractionPlan('flipkart', [
+    Field('name', ['a[title]', '._4rR01T', '.s1Q9rs', '._2WkVRV', 'a[href*="/p/"]'], _flipkart_name),
+    Field('url', ['a[href*="/p/"]', 'a[href*="/dp/"]', 'a[title]', '._1fQZEK'], lambda e: e.get('href') or None),
+    Field('price', ['._30jeq3', '._1_WHN1', '._3tbKJL', '._25b18c'], _flipkart_price),
+    Field('image', ['img[src*="rukminim"]', 'img[data-src*="rukminim"]', 'img[src*="flipkart"]', 'img._396cs4'],
+          image_source),
+    Field('specs', ['._1xgFaf', '._3Djpdu', '._2_R_DZ'], _short_text(100), many=3),
+])
+
+
+AMAZON_ASIN_RE = re.compile(r'/(?:dp|gp/product)/([A-Z0-9]{10})')
+
+
+def clean_search_query(query: str) -> str:
+    """Query text sent to the marketplaces: normalized case, currencies, units and punctuation"""
+    return normalize_query(query)
+
 class EnhancedWebScraper:
-    def __init__(self, amazon_domain='amazon.in'):
-        self.session = requests.Session()
+    # Marketplace name -> search method, in the order results are requested
+    PLATFORM_SEARCHES = {
+        'amazon': 'search_amazon',
+        'flipkart': 'search_flipkart',
+    }
+    # Typical number of products on one search results page, used to size page fan-out
+    RESULTS_PER_PAGE = {
+        'amazon': 20,
+        'flipkart': 24,
+    }
+    
+    def __init__(self, amazon_domain='amazon.in', enabled_platforms=None, scrape_deadline: float = 30.0,
+                 parser_backend: str = None, scoped_parsing: bool = None, max_pages: int = None,
+                 rate_limiter: HostRateLimiter = None, source_guard: SourceGuard = None):
+        self._session = None
+        self.rate_limiter = rate_limiter or get_rate_limiter()  # Shared per-host budget unless one is given
+        self.source_guard = source_guard or get_source_guard()  # Per-marketplace breakers and negative cache
+        self.parser_backend = resolve_backend(parser_backend)  # lxml when installed, else html.parser
+        # Only build tree nodes for result containers instead of the whole page
+        self.scoped_parsing = env_bool("SCRAPER_SCOPED_PARSING", True) if scoped_parsing is None else scoped_parsing
         self.amazon_domain = amazon_domain  # Allow configurable Amazon domain
-        # Enhanced headers to reduce detection
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate', 
-            'Sec-Fetch-Site': 'cross-site',
-            'Cache-Control': 'max-age=0'
-        })
+        self.enabled_platforms = list(enabled_platforms or self.PLATFORM_SEARCHES)
+        self.scrape_deadline = scrape_deadline  # Overall budget for a concurrent scrape_products call
+        # Upper bound on result pages read per marketplace for one search
+        self.max_pages = max_pages or env_int("SCRAPER_MAX_PAGES", 3)
+    
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session, created on first use so parse-only instances never open one"""
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers.update(DEFAULT_HEADERS)
+        return self._session
+    
+    def amazon_search_url(self, query: str, page: int = 1) -> str:
+        """Amazon search URL with configurable domain (supports amazon.in)"""
+        url = f"https://www.{self.amazon_domain}/s?k={quote_plus(clean_search_query(query))}"
+        return f"{url}&ref=sr_pg_1" if page == 1 else f"{url}&page={page}&ref=sr_pg_{page}"
+    
+    def flipkart_search_url(self, query: str, page: int = 1) -> str:
+        """Flipkart search URL"""
+        url = f"https://www.flipkart.com/search?q={quote_plus(clean_search_query(query))}"
+        return url if page == 1 else f"{url}&page={page}"
         
     def get_fallback_products(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """Return fallback Amazon India products when scraping fails"""
@@ -103,59 +241,148 @@ class EnhancedWebScraper:
             }
         ]
         
-        # Return requested number of products
-        return fallback_products[:max_results]
+        # Return requested number of products, tagged so they are never indexed or persisted as real listings
+        return [{**product, 'fallback': True} for product in fallback_products[:max_results]]
 
     def search_amazon(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """Enhanced Amazon scraping with better product URL extraction - supports Amazon India"""
-        products = []
+        logger.info(f"Searching Amazon ({self.amazon_domain}) for: {clean_search_query(query)}")
+        products = self._guarded_search('amazon', query, lambda: self._search_pages(
+            'amazon', self.amazon_search_url, self.parse_amazon_results, query, max_results))
+        
+        # If no products found from scraping, use fallback
+        if not products:
+            logger.info("No products from scraping, using fallback products...")
+            products = self.get_fallback_products(query, max_results)
+        
+        return products
+    
+    def _guarded_search(self, source: str, query: str, search) -> List[Dict[str, Any]]:
+        """Run `search()` unless the source's breaker is open or this search just failed.
+
+        Returns [] when skipped or failed; failed searches are negatively cached.
+        """
         try:
-            # Clean and encode the search query
-            clean_query = re.sub(r'[^\w\s-]', '', query).strip()
-            encoded_query = quote_plus(clean_query)
-            
-            # Amazon search URL with configurable domain (supports amazon.in)
-            search_url = f"https://www.{self.amazon_domain}/s?k={encoded_query}&ref=sr_pg_1"
-            
-            logger.info(f"Searching Amazon ({self.amazon_domain}) for: {clean_query}")
-            
-            response = self.session.get(search_url, timeout=15)
+            self.source_guard.check(source, query)
+        except SourceUnavailable as e:
+            logger.warning(f"Skipping {source} scrape: {e}")
+            return []
+        try:
+            return search()
+        except Exception as e:
+            logger.error(f"{source.capitalize()} scraping error: {e}")
+            self.source_guard.remember_failure(source, query)
+            return []
+    
+    def pages_for(self, platform: str, max_results: int) -> int:
+        """How many result pages to request up front for max_results products"""
+        per_page = self.RESULTS_PER_PAGE.get(platform, 20)
+        return max(1, min(self.max_pages, -(-max_results // per_page)))
+    
+    def needs_next_page(self, label: str, page: int, page_products: List[Dict[str, Any]],
+                        products: List[Dict[str, Any]], max_results: int) -> bool:
+        """Whether a results page ran dry before max_results and another page is worth reading"""
+        if len(products) >= max_results or not page_products or page >= self.max_pages:
+            return False
+        logger.info(f"{label} page {page} ran dry at {len(products)}/{max_results} products, reading page {page + 1}")
+        return True
+    
+    @staticmethod
+    def merge_page(products: List[Dict[str, Any]], seen: set, page_products: List[Dict[str, Any]],
+                   max_results: int) -> int:
+        """Append products not already listed (by ASIN / Flipkart pid), returning how many were added"""
+        added = 0
+        for product in page_products:
+            if len(products) >= max_results:
+                break
+            key = product.get('product_id') or product.get('product_url') or product.get('product_name')
+            if key in seen:
+                continue
+            seen.add(key)
+            products.append(product)
+            added += 1
+        return added
+    
+    def _fetch_page(self, label: str, url: str, parse, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """Fetch and parse one results page within the host's rate budget; None when the request fails"""
+        breaker = self.source_guard.breaker(url)
+        if not breaker.allow():
+            logger.warning(f"{label} circuit is open, skipping {url}")
+            return None
+        try:
+            self.rate_limiter.acquire_sync(url)
+            try:
+                response = self.session.get(url, timeout=15)
+            except Exception as e:
+                breaker.record_failure(f"{type(e).__name__}: {e}")
+                raise
+            if looks_blocked(response.status_code, response.content):
+                breaker.record_failure(f"HTTP {response.status_code}")
+            elif response.status_code == 200:
+                breaker.record_success()
             if response.status_code != 200:
-                logger.error(f"Amazon request failed with status: {response.status_code}")
-                logger.info("Using fallback products...")
-                return self.get_fallback_products(query, max_results)
-                
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find product containers (Amazon's current structure)
-            product_containers = soup.find_all('div', {'data-component-type': 's-search-result'}) or \
-                               soup.find_all('div', class_=re.compile(r's-result-item')) or \
-                               soup.find_all('div', {'data-asin': True})
-            
-            logger.info(f"Found {len(product_containers)} Amazon product containers")
-            
-            for i, container in enumerate(product_containers[:max_results]):
-                try:
-                    product = self.extract_amazon_product(container)
-                    if product and product.get('product_name') and product.get('current_price'):
-                        products.append(product)
-                        logger.info(f"Extracted Amazon product {i+1}: {product.get('product_name', 'Unknown')[:50]}...")
-                except Exception as e:
-                    logger.error(f"Error extracting Amazon product {i+1}: {e}")
-                    continue
-                    
-            time.sleep(random.uniform(1, 3))  # Random delay
-            
-            # If no products found from scraping, use fallback
-            if not products:
-                logger.info("No products extracted from scraping, using fallback products...")
-                products = self.get_fallback_products(query, max_results)
-            
+                logger.error(f"{label} request failed with status: {response.status_code}")
+                return None
+            return parse(response.content, max_results)
         except Exception as e:
-            logger.error(f"Amazon scraping error: {e}")
-            logger.info("Using fallback products due to error...")
-            products = self.get_fallback_products(query, max_results)
-            
+            logger.error(f"{label} page error for {url}: {e}")
+            return None
+    
+    def _search_pages(self, platform: str, url_for, parse, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Fetch the pages max_results needs concurrently, then further pages one at a time while short"""
+        label = self.platform_label(platform)
+        first_pages = range(1, self.pages_for(platform, max_results) + 1)
+        if len(first_pages) > 1:
+            logger.info(f"Fetching {label} pages 1-{len(first_pages)} concurrently")
+            with ThreadPoolExecutor(max_workers=len(first_pages)) as executor:
+                pages = list(executor.map(lambda page: self._fetch_page(label, url_for(query, page), parse, max_results),
+                                          first_pages))
+        else:
+            pages = [self._fetch_page(label, url_for(query, 1), parse, max_results)]
+        if all(page is None for page in pages):
+            raise SourceUnavailable(f"every {label} results page failed")
+        
+        products, seen = [], set()
+        for page_products in pages:
+            self.merge_page(products, seen, page_products or [], max_results)
+        
+        page, page_products = len(pages), pages[-1]
+        while page_products and self.needs_next_page(label, page, page_products, products, max_results):
+            page += 1
+            page_products = self._fetch_page(label, url_for(query, page), parse, max_results)
+            self.merge_page(products, seen, page_products or [], max_results)
+        return products
+    
+    def parse_amazon_results(self, content, max_results: int = 10, on_product=None) -> List[Dict[str, Any]]:
+        """Parse a Amazon search results page, stopping once max_results valid products are found.
+
+        `on_product` is called with each product as soon as it is extracted.
+        """
+        products = []
+        if max_results <= 0:
+            return products
+        soup = make_soup(content, self.parser_backend,
+                         parse_only=AMAZON_CONTAINER_STRAINER if self.scoped_parsing else None)
+        
+        # Containers are found lazily, so nothing past the last product we need is walked
+        checked, seen = 0, set()
+        for i, container in enumerate(iter_containers(soup, AMAZON_CONTAINER_RULES)):
+            checked = i + 1
+            try:
+                product = self.extract_amazon_product(container)
+                if product and product.get('product_name') and product.get('current_price'):
+                    if not self.merge_page(products, seen, [product], max_results):
+                        continue
+                    logger.info(f"Extracted Amazon product {i+1}: {product.get('product_name', 'Unknown')[:50]}...")
+                    if on_product:
+                        on_product(product)
+                    if len(products) >= max_results:
+                        break
+            except Exception as e:
+                logger.error(f"Error extracting Amazon product {i+1}: {e}")
+                continue
+        
+        logger.info(f"Checked {checked} Amazon product containers for {len(products)} products")
         return products
     
     def extract_amazon_product(self, container) -> Dict[str, Any]:
@@ -168,115 +395,39 @@ class EnhancedWebScraper:
             'product_url': '',
             'key_specifications': [],
             'summary': '',
-            'brand': ''
+            'brand': '',
+            'product_id': ''
         }
         
         try:
-            # Extract product name using multiple selectors
-            name_selectors = [
-                'h2 a span',
-                'h2 span',
-                '[data-cy="title-recipe-title"]',
-                '.s-size-mini .s-link-style a',
-                'h2.a-size-mini a span'
-            ]
+            # One walk of the container resolves every field's selector cascade
+            fields = AMAZON_PLAN.run(container)
             
-            for selector in name_selectors:
-                name_elem = container.select_one(selector)
-                if name_elem and name_elem.get_text(strip=True):
-                    product['product_name'] = name_elem.get_text(strip=True)
-                    break
+            product['product_name'] = fields.get('name', '')
             
             # Extract product URL with proper Amazon domain (supports amazon.in)
             # Priority: 1) Direct /dp/ URLs, 2) ASIN construction, 3) Other URLs
-            url_selectors = [
-                'a[href*="/dp/"]',           # Direct product URLs (highest priority)
-                'a[href*="/gp/product/"]',   # Alternative product URLs
-                'h2 a',                      # Title links
-                '.s-link-style',             # Amazon style links
-                'a[data-cy="title-recipe-title"]',
-                '.a-link-normal'             # General Amazon links
-            ]
-            
-            found_valid_url = False
-            for selector in url_selectors:
-                url_elem = container.select_one(selector)
-                if url_elem and url_elem.get('href'):
-                    href = url_elem.get('href')
-                    # Skip empty, invalid, or sponsored URLs
-                    if not href or href == '#' or href == '' or '/sspa/click' in href:
-                        continue
-                    
-                    # Prioritize /dp/ URLs
-                    if '/dp/' in href:
-                        if href.startswith('/'):
-                            product['product_url'] = f"https://www.{self.amazon_domain}{href}"
-                        elif href.startswith('http'):
-                            product['product_url'] = href
-                        else:
-                            product['product_url'] = f"https://www.{self.amazon_domain}/{href}"
-                        
-                        # Clean up URL (remove ref parameters for cleaner links)
-                        if '?' in product['product_url']:
-                            base_url = product['product_url'].split('?')[0]
-                            product['product_url'] = base_url
-                        
-                        found_valid_url = True
-                        break
-            
-            # If no direct /dp/ URL found, construct from ASIN
-            if not found_valid_url:
+            href = fields.get('dp_url')
+            if not href:
                 asin = container.get('data-asin')
                 if asin:
                     product['product_url'] = f"https://www.{self.amazon_domain}/dp/{asin}"
-                    found_valid_url = True
-            
-            # Last resort: use any non-sponsored URL
-            if not found_valid_url:
-                for selector in url_selectors:
-                    url_elem = container.select_one(selector)
-                    if url_elem and url_elem.get('href'):
-                        href = url_elem.get('href')
-                        if href and href not in ['#', ''] and '/sspa/click' not in href:
-                            if href.startswith('/'):
-                                product['product_url'] = f"https://www.{self.amazon_domain}{href}"
-                            elif href.startswith('http'):
-                                product['product_url'] = href
-                            else:
-                                product['product_url'] = f"https://www.{self.amazon_domain}/{href}"
-                            
-                            if '?' in product['product_url']:
-                                base_url = product['product_url'].split('?')[0]
-                                product['product_url'] = base_url
-                            break
+                else:
+                    # Last resort: use any non-sponsored URL
+                    href = fields.get('any_url')
+            if href:
+                product['product_url'] = self._absolute_amazon_url(href)
             
-            # Extract price with better parsing
-            price_selectors = [
-                '.a-price-whole',
-                '.a-price .a-offscreen',
-                '[data-cy="price-recipe-price"]',
-                '.a-price-range .a-price .a-offscreen'
-            ]
+            # ASIN identifies the listing across result pages
+            asin_match = AMAZON_ASIN_RE.search(product['product_url'])
+            product['product_id'] = container.get('data-asin') or (asin_match.group(1) if asin_match else '')
             
+            # Extract price with better parsing - whole and fraction parts first
             price_text = ''
-            price_whole = ''
-            price_fraction = ''
-            
-            # Try to get whole and fraction parts separately first
-            whole_elem = container.select_one('.a-price-whole')
-            fraction_elem = container.select_one('.a-price-fraction')
-            
-            if whole_elem and fraction_elem:
-                price_whole = whole_elem.get_text(strip=True)
-                price_fraction = fraction_elem.get_text(strip=True)
-                price_text = f"{price_whole}.{price_fraction}"
+            if fields.get('price_whole') is not None and fields.get('price_fraction') is not None:
+                price_text = f"{fields.get('price_whole')}.{fields.get('price_fraction')}"
             else:
-                # Fall back to other selectors
-                for selector in price_selectors:
-                    price_elem = container.select_one(selector)
-                    if price_elem:
-                        price_text = price_elem.get_text(strip=True)
-                        break
+                price_text = fields.get('price', '')
             
             if price_text:
                 # Clean and format price based on Amazon domain
@@ -304,39 +455,15 @@ class EnhancedWebScraper:
             else:
                 product['price_numeric'] = None
             
-            # Extract image URL
-            img_selectors = [
-                '.s-image',
-                'img[data-image-latency]',
-                '.a-dynamic-image',
-                'img[src*="images-amazon"]'
-            ]
-            
-            for selector in img_selectors:
-                img_elem = container.select_one(selector)
-                if img_elem:
-                    img_src = img_elem.get('src') or img_elem.get('data-src')
-                    if img_src and ('http' in img_src or img_src.startswith('//')):
-                        if img_src.startswith('//'):
-                            img_src = f"https:{img_src}"
-                        product['image_url'] = img_src
-                        break
+            product['image_url'] = fields.get('image', '')
             
             # Extract brand (if available)
-            brand_elem = container.select_one('.a-size-base-plus') or container.select_one('[data-cy="brand-recipe-brand"]')
-            if brand_elem:
-                brand_text = brand_elem.get_text(strip=True)
-                if brand_text and len(brand_text) < 50:  # Reasonable brand name length
-                    product['brand'] = brand_text
+            brand_text = fields.get('brand')
+            if brand_text and len(brand_text) < 50:  # Reasonable brand name length
+                product['brand'] = brand_text
             
             # Extract basic specifications or features
-            specs = []
-            spec_elems = container.select('.a-size-base-plus') or container.select('.s-size-base-plus')
-            for spec_elem in spec_elems[:3]:  # Limit to first 3 specs
-                spec_text = spec_elem.get_text(strip=True)
-                if spec_text and len(spec_text) < 100:  # Reasonable spec length
-                    specs.append(spec_text)
-            
+            specs = fields.get('specs', [])
             product['key_specifications'] = specs
             
             # Create a simple summary
@@ -351,54 +478,60 @@ class EnhancedWebScraper:
                 
                 product['summary'] = ". ".join(summary_parts) if summary_parts else f"Product: {product['product_name']}"
             
+            logger.debug(f"Amazon selectors matched: {fields.matched}")
+            
         except Exception as e:
             logger.error(f"Error extracting Amazon product details: {e}")
         
         return product
     
+    def _absolute_amazon_url(self, href: str) -> str:
+        """Absolute Amazon URL without tracking parameters"""
+        if href.startswith('/'):
+            url = f"https://www.{self.amazon_domain}{href}"
+        elif href.startswith('http'):
+            url = href
+        else:
+            url = f"https://www.{self.amazon_domain}/{href}"
+        # Clean up URL (remove ref parameters for cleaner links)
+        return url.split('?')[0]
+    
     def search_flipkart(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """Enhanced Flipkart scraping with real URLs"""
+        logger.info(f"Searching Flipkart for: {clean_search_query(query)}")
+        return self._guarded_search('flipkart', query, lambda: self._search_pages(
+            'flipkart', self.flipkart_search_url, self.parse_flipkart_results, query, max_results))
+    
+    def parse_flipkart_results(self, content, max_results: int = 10, on_product=None) -> List[Dict[str, Any]]:
+        """Parse a Flipkart search results page, stopping once max_results valid products are found.
+
+        `on_product` is called with each product as soon as it is extracted.
+        """
         products = []
-        try:
-            # Clean and encode query
-            clean_query = re.sub(r'[^\w\s-]', '', query).strip()
-            encoded_query = quote_plus(clean_query)
-            
-            search_url = f"https://www.flipkart.com/search?q={encoded_query}"
-            
-            logger.info(f"Searching Flipkart for: {clean_query}")
-            
-            response = self.session.get(search_url, timeout=15)
-            if response.status_code != 200:
-                logger.error(f"Flipkart request failed with status: {response.status_code}")
-                return products
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find product containers with multiple selectors
-            product_containers = (
-                soup.find_all('div', class_=re.compile(r'_1AtVbE|_13oc-S|_2kHMtA|_3pLy-c')) or
-                soup.find_all('div', {'data-id': True}) or
-                soup.find_all('div', class_=re.compile(r'col-'))
-            )
-            
-            logger.info(f"Found {len(product_containers)} Flipkart product containers")
-            
-            for i, container in enumerate(product_containers[:max_results]):
-                try:
-                    product = self.extract_flipkart_product(container)
-                    if product and product.get('product_name') and product.get('current_price'):
-                        products.append(product)
-                        logger.info(f"Extracted Flipkart product {i+1}: {product.get('product_name', 'Unknown')[:50]}...")
-                except Exception as e:
-                    logger.error(f"Error extracting Flipkart product {i+1}: {e}")
-                    continue
-            
-            time.sleep(random.uniform(1, 3))
-            
-        except Exception as e:
-            logger.error(f"Flipkart scraping error: {e}")
+        if max_results <= 0:
+            return products
+        soup = make_soup(content, self.parser_backend,
+                         parse_only=FLIPKART_CONTAINER_STRAINER if self.scoped_parsing else None)
+        
+        # Containers are found lazily, so nothing past the last product we need is walked
+        checked, seen = 0, set()
+        for i, container in enumerate(iter_containers(soup, FLIPKART_CONTAINER_RULES)):
+            checked = i + 1
+            try:
+                product = self.extract_flipkart_product(container)
+                if product and product.get('product_name') and product.get('current_price'):
+                    if not self.merge_page(products, seen, [product], max_results):
+                        continue
+                    logger.info(f"Extracted Flipkart product {i+1}: {product.get('product_name', 'Unknown')[:50]}...")
+                    if on_product:
+                        on_product(product)
+                    if len(products) >= max_results:
+                        break
+            except Exception as e:
+                logger.error(f"Error extracting Flipkart product {i+1}: {e}")
+                continue
         
+        logger.info(f"Checked {checked} Flipkart product containers for {len(products)} products")
         return products
     
     def extract_flipkart_product(self, container) -> Dict[str, Any]:
@@ -411,104 +544,41 @@ class EnhancedWebScraper:
             'product_url': '',
             'key_specifications': [],
             'summary': '',
-            'brand': ''
+            'brand': '',
+            'product_id': ''
         }
         
         try:
-            # Extract product name with multiple selectors
-            name_selectors = [
-                'a[title]',
-                '._4rR01T',
-                '.s1Q9rs',
-                '._2WkVRV',
-                'a[href*="/p/"]'
-            ]
-            
-            for selector in name_selectors:
-                name_elem = container.select_one(selector)
-                if name_elem:
-                    name_text = name_elem.get('title') or name_elem.get_text(strip=True)
-                    if name_text and len(name_text) > 5:  # Valid product name
-                        product['product_name'] = name_text
-                        break
-            
-            # Extract product URL with multiple selectors
-            url_selectors = [
-                'a[href*="/p/"]',
-                'a[href*="/dp/"]',
-                'a[title]',
-                '._1fQZEK'
-            ]
+            # One walk of the container resolves every field's selector cascade
+            fields = FLIPKART_PLAN.run(container)
             
-            for selector in url_selectors:
-                url_elem = container.select_one(selector)
-                if url_elem and url_elem.get('href'):
-                    href = url_elem.get('href')
-                    if href.startswith('/'):
-                        product['product_url'] = f"https://www.flipkart.com{href}"
-                    elif href.startswith('http'):
-                        product['product_url'] = href
-                    
-                    # Clean URL parameters
-                    if '?' in product['product_url']:
-                        base_url = product['product_url'].split('?')[0]
-                        product['product_url'] = base_url
-                    break
+            product['product_name'] = fields.get('name', '')
             
-            # Extract price with multiple selectors
-            price_selectors = [
-                '._30jeq3',
-                '._1_WHN1',
-                '._3tbKJL',
-                '._25b18c'
-            ]
-            
-            for selector in price_selectors:
-                price_elem = container.select_one(selector)
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    # Look for rupee symbol and numbers
-                    price_match = re.search(r'₹([\d,]+)', price_text)
-                    if price_match:
-                        price_numeric = float(price_match.group(1).replace(',', ''))
-                        product['current_price'] = f"₹{price_numeric:,.0f}"
-                        break
+            href = fields.get('url')
+            if href:
+                if href.startswith('/'):
+                    product['product_url'] = f"https://www.flipkart.com{href}"
+                elif href.startswith('http'):
+                    product['product_url'] = href
+                
+                # Flipkart's product id only lives in the query string we strip below
+                product['product_id'] = parse_qs(urlsplit(href).query).get('pid', [''])[0]
+                
+                # Clean URL parameters
+                product['product_url'] = product['product_url'].split('?')[0]
+            if not product['product_id']:
+                # Nested result containers share the listing's data-id with their outer row
+                row = container if container.get('data-id') else container.find_parent(attrs={'data-id': True})
+                product['product_id'] = row.get('data-id', '') if row else ''
             
-            # Extract image with multiple selectors
-            img_selectors = [
-                'img[src*="rukminim"]',
-                'img[data-src*="rukminim"]',
-                'img[src*="flipkart"]',
-                'img._396cs4'
-            ]
+            price_numeric = fields.get('price')
+            if price_numeric is not None:
+                product['current_price'] = f"₹{price_numeric:,.0f}"
             
-            for selector in img_selectors:
-                img_elem = container.select_one(selector)
-                if img_elem:
-                    img_src = img_elem.get('src') or img_elem.get('data-src')
-                    if img_src and ('http' in img_src or img_src.startswith('//')):
-                        if img_src.startswith('//'):
-                            img_src = f"https:{img_src}"
-                        product['image_url'] = img_src
-                        break
+            product['image_url'] = fields.get('image', '')
             
             # Extract specifications or features
-            specs = []
-            spec_selectors = [
-                '._1xgFaf',
-                '._3Djpdu',
-                '._2_R_DZ'
-            ]
-            
-            for selector in spec_selectors:
-                spec_elems = container.select(selector)
-                for spec_elem in spec_elems[:3]:
-                    spec_text = spec_elem.get_text(strip=True)
-                    if spec_text and len(spec_text) < 100:
-                        specs.append(spec_text)
-                if specs:
-                    break
-            
+            specs = fields.get('specs', [])
             product['key_specifications'] = specs
             
             # Create summary
@@ -520,61 +590,128 @@ class EnhancedWebScraper:
                     summary_parts.append(f"Features: {', '.join(specs[:2])}")
                 
                 product['summary'] = ". ".join(summary_parts)
+            
+            logger.debug(f"Flipkart selectors matched: {fields.matched}")
         
         except Exception as e:
             logger.error(f"Error extracting Flipkart product details: {e}")
         
         return product
     
-    def scrape_products(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
-        """Main scraping function that combines results from both platforms"""
+    def scrape_products(self, query: str, max_results: int = 10, concurrent: bool = True,
+                        deadline: float = None) -> List[Dict[str, Any]]:
+        """Main scraping function that combines results from all enabled platforms.
+        
+        In concurrent mode every platform is scraped at once and results are merged as they
+        arrive; platforms still running after `deadline` seconds are skipped.
+        """
         all_products = []
+        platforms = [p for p in self.enabled_platforms if p in self.PLATFORM_SEARCHES]
+        if not platforms:
+            return all_products
         
         # Split results between platforms
-        amazon_results = max_results // 2
-        flipkart_results = max_results - amazon_results
+        per_platform = max_results // len(platforms)
+        platform_results = {p: per_platform for p in platforms}
+        platform_results[platforms[-1]] += max_results - per_platform * len(platforms)
+        
+        if not concurrent:
+            try:
+                for platform in platforms:
+                    logger.info(f"Starting {self.platform_label(platform)} scrape for: {query}")
+                    all_products.extend(self._search_platform(platform, query, platform_results[platform]))
+            except Exception as e:
+                logger.error(f"Scraping error: {e}")
+            
+            logger.info(f"Total products scraped: {len(all_products)}")
+            return all_products
+        
+        deadline = self.scrape_deadline if deadline is None else deadline
+        executor = ThreadPoolExecutor(max_workers=len(platforms), thread_name_prefix="scrape")
+        futures = {}
+        for platform in platforms:
+            logger.info(f"Starting {self.platform_label(platform)} scrape for: {query}")
+            future = executor.submit(self._search_platform, platform, query, platform_results[platform])
+            futures[future] = platform
         
         try:
-            # Scrape Amazon (with configured domain - default is amazon.in)
-            logger.info(f"Starting Amazon ({self.amazon_domain}) scrape for: {query}")
-            amazon_products = self.search_amazon(query, amazon_results)
-            all_products.extend(amazon_products)
-            
-            # Scrape Flipkart
-            logger.info(f"Starting Flipkart scrape for: {query}")
-            flipkart_products = self.search_flipkart(query, flipkart_results)
-            all_products.extend(flipkart_products)
-            
-        except Exception as e:
-            logger.error(f"Scraping error: {e}")
+            # Merge each platform's products as soon as it finishes
+            for future in as_completed(futures, timeout=deadline):
+                platform = futures[future]
+                try:
+                    platform_products = future.result()
+                    all_products.extend(platform_products)
+                    logger.info(f"{self.platform_label(platform)} returned {len(platform_products)} products")
+                except Exception as e:
+                    logger.error(f"{self.platform_label(platform)} scraping error: {e}")
+        except FuturesTimeoutError:
+            pending = [futures[f] for f in futures if not f.done()]
+            logger.warning(f"Scrape deadline of {deadline}s reached, skipping: {', '.join(pending)}")
+        finally:
+            # Don't hold the caller hostage to a slow site past the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
         
         logger.info(f"Total products scraped: {len(all_products)}")
         return all_products
+    
+    def _search_platform(self, platform: str, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Dispatch a search to the scraper method registered for a platform"""
+        return getattr(self, self.PLATFORM_SEARCHES[platform])(query, max_results)
+    
+    def platform_label(self, platform: str) -> str:
+        """Human readable platform name for logs"""
+        if platform == 'amazon':
+            return f"Amazon ({self.amazon_domain})"
+        return platform.capitalize()
 
 
-# Utility functions for easy usage
+# Utility functions for easy usage - these share the pooled async engine's clients
 def search_amazon_india(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
     """Search Amazon India specifically"""
-    scraper = EnhancedWebScraper(amazon_domain='amazon.in')
-    return scraper.search_amazon(query, max_results)
+    from tools.async_scraper import get_scraper_engine
+    engine = get_scraper_engine()
+    return engine.run_sync(engine.search_amazon(query, max_results, amazon_domain='amazon.in'))
 
 
 def search_amazon_us(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
     """Search Amazon US specifically"""
-    scraper = EnhancedWebScraper(amazon_domain='amazon.com')
-    return scraper.search_amazon(query, max_results)
+    from tools.async_scraper import get_scraper_engine
+    engine = get_scraper_engine()
+    return engine.run_sync(engine.search_amazon(query, max_results, amazon_domain='amazon.com'))
 
 
 def search_flipkart(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
     """Search Flipkart specifically"""
-    scraper = EnhancedWebScraper()
-    return scraper.search_flipkart(query, max_results)
+    from tools.async_scraper import get_scraper_engine
+    engine = get_scraper_engine()
+    return engine.run_sync(engine.search_flipkart(query, max_results))
+
+
+def search_both_platforms(query: str, max_results: int = 10, amazon_domain: str = 'amazon.in',
+                          deadline: float = 30.0) -> List[Dict[str, Any]]:
+    """Search Amazon and Flipkart concurrently - default uses Amazon India.
+
+    Concurrent identical searches share one scrape.
+    """
+    from tools.async_scraper import get_scraper_engine
+    engine = get_scraper_engine()
+    return get_single_flight("search_both_platforms").run_sync(
+        (canonical_query(query), max_results, amazon_domain),
+        lambda: engine.scrape_products(query, max_results, amazon_domain=amazon_domain, deadline=deadline))
+
 
+def stream_both_platforms(query: str, max_results: int = 10, amazon_domain: str = 'amazon.in',
+                          deadline: float = 30.0) -> Iterator[Dict[str, Any]]:
+    """Like search_both_platforms, but yields each product as soon as it is extracted.
 
-def search_both_platforms(query: str, max_results: int = 10, amazon_domain: str = 'amazon.in') -> List[Dict[str, Any]]:
-    """Search both Amazon and Flipkart - default uses Amazon India"""
-    scraper = EnhancedWebScraper(amazon_domain=amazon_domain)
-    return scraper.scrape_products(query, max_results)
+    Concurrent identical searches share one scrape; later callers first get the
+    products found so far.
+    """
+    from tools.async_scraper import get_scraper_engine
+    engine = get_scraper_engine()
+    return get_single_flight("stream_both_platforms").stream_sync(
+        (canonical_query(query), max_results, amazon_domain),
+        lambda on_product: engine.scrape_products(query, max_results, amazon_domain, deadline, on_product))
 
 
 # Backwards compatibility function
@@ -583,4 +720,4 @@ def search_amazon(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
     return search_amazon_india(query, max_results)
 
 # Create a global instance
-enhanced_scraper = EnhancedWebScraper()
\ No newline at end of file
+enhanced_scraper = EnhancedWebScraper()
@@ -0,0 +1,260 @@
+# tools/extraction_plans.py
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bs4 import Tag
+
+from tools.selector_stats import get_selector_stats
+
+# Compound selectors we support: tag, .class, [attr], [attr="v"], [attr*="v"] and
+# any combination of them, joined by descendant combinators ("h2 a span").
+_COMPOUND_RE = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:\.[\w-]+|\[[^\]]+\])*)$')
+_CLASS_RE = re.compile(r'\.([\w-]+)')
+_ATTR_RE = re.compile(r'\[([\w-]+)(?:(\*?=)"([^"]*)")?\]')
+
+
+class CompiledSelector:
+    """A CSS selector parsed once into cheap per-tag checks"""
+
+    def __init__(self, css: str):
+        self.css = css
+        self.steps = [self._compile_compound(part) for part in css.split()]
+        self.tag = self.steps[-1][0]  # None matches any tag
+
+    @staticmethod
+    def _compile_compound(part: str) -> Tuple[Optional[str], frozenset, tuple]:
+        match = _COMPOUND_RE.match(part)
+        if not match:
+            raise ValueError(f"Unsupported selector syntax: {part!r}")
+        tag = match.group('tag')
+        rest = match.group('rest')
+        classes = frozenset(_CLASS_RE.findall(re.sub(r'\[[^\]]*\]', '', rest)))
+        attrs = tuple(_ATTR_RE.findall(rest))
+        if len(attrs) != rest.count('['):
+            raise ValueError(f"Unsupported attribute selector in: {part!r}")
+        return (None if tag in (None, '*') else tag.lower()), classes, attrs
+
+    @staticmethod
+    def _step_matches(step, tag: Tag) -> bool:
+        name, classes, attrs = step
+        if name is not None and tag.name != name:
+            return False
+        if classes:
+            tag_classes = tag.get('class') or ()
+            if not classes.issubset(tag_classes):
+                return False
+        for attr, op, expected in attrs:
+            value = tag.get(attr)
+            if value is None:
+                return False
+            if isinstance(value, list):
+                value = " ".join(value)
+            if op == '=' and value != expected:
+                return False
+            if op == '*=' and (not expected or expected not in value):
+                return False
+        return True
+
+    def matches(self, tag: Tag, ancestors: List[Tag]) -> bool:
+        """Match the tag against the selector; `ancestors` is outermost first"""
+        if not self._step_matches(self.steps[-1], tag):
+            return False
+        step_index = len(self.steps) - 2
+        for ancestor in reversed(ancestors):
+            if step_index < 0:
+                break
+            if self._step_matches(self.steps[step_index], ancestor):
+                step_index -= 1
+        return step_index < 0
+
+
+@dataclass
+class Field:
+    """A product field and the selectors to try for it, in fallback order.
+
+    `value` turns a matched element into the field value, returning None to reject
+    the match and fall through to the next selector. With `many` > 0 the field
+    collects values from up to that many matches of the first selector that
+    yields any.
+    """
+    name: str
+    selectors: List[str]
+    value: Optional[Callable[[Tag], Any]] = None
+    many: int = 0
+
+
+class PlanResult:
+    """Field values for one container plus the selector each one came from"""
+
+    def __init__(self):
+        self.values: Dict[str, Any] = {}
+        self.matched: Dict[str, str] = {}
+
+    def get(self, field: str, default=None):
+        return self.values.get(field, default)
+
+
+class ExtractionPlan:
+    """Declarative per-site extraction plan, compiled once and run in a single walk per container.
+
+    Fields resolve as soon as their highest-priority selector yields a value, and the
+    walk stops once nothing unresolved still needs a selector. With `adaptive` set,
+    selector priority follows the live hit statistics in `stats`.
+    """
+
+    def __init__(self, site: str, fields: List[Field], adaptive: bool = True):
+        self.site = site
+        self.fields = fields
+        self.adaptive = adaptive
+        self.stats = get_selector_stats(site)
+        self.selectors: Dict[str, CompiledSelector] = {}
+        self._fields_by_css: Dict[str, List[Field]] = {}
+        for field in fields:
+            self.stats.register(field.name, field.selectors)
+            for css in field.selectors:
+                if css not in self.selectors:
+                    self.selectors[css] = CompiledSelector(css)
+                self._fields_by_css.setdefault(css, []).append(field)
+        # Selectors indexed by the tag their last step needs, so each node only tests candidates
+        self._by_tag: Dict[Optional[str], List[CompiledSelector]] = {}
+        for selector in self.selectors.values():
+            self._by_tag.setdefault(selector.tag, []).append(selector)
+
+    def _order(self, field: Field) -> List[str]:
+        return self.stats.order(field.name) if self.adaptive else field.selectors
+
+    def collect(self, container: Tag) -> Dict[str, List[Tag]]:
+        """Walk the container once, collecting the first matches of every selector in document order"""
+        limits = {css: max((f.many or 1) for f in fields) for css, fields in self._fields_by_css.items()}
+        found: Dict[str, List[Tag]] = {css: [] for css in self.selectors}
+        pending = set(self.selectors)
+
+        def on_match(css: str):
+            if len(found[css]) >= limits[css]:
+                pending.discard(css)
+            return not pending
+
+        self._walk(container, found, pending, on_match)
+        return found
+
+    def run(self, container: Tag) -> PlanResult:
+        """Resolve every field for a container from a single walk"""
+        result = PlanResult()
+        orders = {field.name: self._order(field) for field in self.fields}
+        positions = {field.name: 0 for field in self.fields}
+        misses: Dict[str, List[str]] = {field.name: [] for field in self.fields}
+        unresolved = {field.name: field for field in self.fields}
+        found: Dict[str, List[Tag]] = {css: [] for css in self.selectors}
+        pending = set()
+        limits: Dict[str, int] = {}
+
+        def refresh_pending():
+            pending.clear()
+            limits.clear()
+            for name, field in unresolved.items():
+                for css in orders[name][positions[name]:]:
+                    limits[css] = max(limits.get(css, 1), field.many or 1)
+            for css, limit in limits.items():
+                if len(found[css]) < limit:
+                    pending.add(css)
+
+        def advance(field: Field, walk_done: bool) -> bool:
+            """Move the field down its selector order; True once it is settled"""
+            name = field.name
+            order = orders[name]
+            while positions[name] < len(order):
+                css = order[positions[name]]
+                matches = found[css]
+                complete = walk_done or len(matches) >= (field.many or 1)
+                if not matches and not complete:
+                    return False
+                if field.many:
+                    if not complete:
+                        return False
+                    values = [v for v in (self._value(field, m) for m in matches[:field.many]) if v is not None]
+                    value = values or None
+                else:
+                    value = self._value(field, matches[0]) if matches else None
+                if value is not None:
+                    result.values[name] = value
+                    result.matched[name] = css
+                    return True
+                if not matches:
+                    # Only a selector missing from the page counts against it, not an empty value
+                    misses[name].append(css)
+                positions[name] += 1
+            return True
+
+        def on_match(css: str) -> bool:
+            settled = False
+            for field in self._fields_by_css[css]:
+                if field.name in unresolved and advance(field, walk_done=False):
+                    del unresolved[field.name]
+                    settled = True
+            if settled or len(found[css]) >= limits.get(css, 1):
+                refresh_pending()
+            return not pending
+
+        refresh_pending()
+        self._walk(container, found, pending, on_match)
+        for name, field in list(unresolved.items()):
+            advance(field, walk_done=True)
+
+        self.stats.record({name: (result.matched.get(name), misses[name]) for name in orders})
+        return result
+
+    def _walk(self, container: Tag, found: Dict[str, List[Tag]], pending: set, on_match) -> None:
+        """Depth-first walk in document order, reporting each new match of a pending selector"""
+        any_tag = self._by_tag.get(None, [])
+        ancestors = [parent for parent in reversed(list(container.parents)) if parent.name != '[document]']
+        ancestors.append(container)
+
+        def walk(node: Tag) -> bool:
+            for child in node.children:
+                if not isinstance(child, Tag):
+                    continue
+                for selector in self._by_tag.get(child.name, []) + any_tag:
+                    css = selector.css
+                    if css in pending and selector.matches(child, ancestors):
+                        found[css].append(child)
+                        if on_match(css):
+                            return True
+                if not pending:
+                    return True
+                ancestors.append(child)
+                done = walk(child)
+                ancestors.pop()
+                if done:
+                    return True
+            return False
+
+        if pending:
+            walk(container)
+
+    @staticmethod
+    def _value(field: Field, element: Tag):
+        return field.value(element) if field.value else element
+
+
+# --- Common value extractors ---
+
+def stripped_text(element: Tag) -> Optional[str]:
+    """Element text, rejecting empty elements"""
+    text = element.get_text(strip=True)
+    return text or None
+
+
+def any_text(element: Tag) -> str:
+    """Element text, accepting empty elements"""
+    return element.get_text(strip=True)
+
+
+def image_source(element: Tag) -> Optional[str]:
+    """Absolute image URL from src/data-src"""
+    img_src = element.get('src') or element.get('data-src')
+    if img_src and ('http' in img_src or img_src.startswith('//')):
+        if img_src.startswith('//'):
+            img_src = f"https:{img_src}"
+        return img_src
+    return None
@@ -0,0 +1,154 @@
+# tools/html_parsers.py
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Union
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from bs4.builder import builder_registry
+
+from tools.scraper_config import env_str
+from tools.selector_stats import get_selector_stats
+
+logger = logging.getLogger(__name__)
+
+# BeautifulSoup tree builders in order of preference. lxml is C-backed and several
+# times faster than the pure-Python html.parser; both build the same Tag API, so the
+# extractors work unchanged whichever one is picked.
+PARSER_BACKENDS = ('lxml', 'html.parser')
+DEFAULT_BACKEND = 'html.parser'
+
+
+def available_backends() -> List[str]:
+    """Parser backends installed in this environment, fastest first"""
+    return [name for name in PARSER_BACKENDS if builder_registry.lookup(name) is not None]
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """Pick a parser backend, honouring SCRAPER_HTML_PARSER and falling back to html.parser"""
+    requested = (name or env_str("SCRAPER_HTML_PARSER", "auto")).lower()
+    available = available_backends()
+    if requested == "auto":
+        return available[0] if available else DEFAULT_BACKEND
+    if requested in available:
+        return requested
+    logger.warning(f"HTML parser backend '{requested}' is not available, using {DEFAULT_BACKEND}")
+    return DEFAULT_BACKEND
+
+
+def make_soup(markup, backend: Optional[str] = None, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parse markup with the selected backend"""
+    return BeautifulSoup(markup, resolve_backend(backend), parse_only=parse_only)
+
+
+@dataclass
+class ContainerRule:
+    """One way of recognising a result container, like a find_all('div', ...) call.
+
+    `class_tokens` is a list of class-name fragments, any of which identifies a
+    container. When `site` is set the fragments are tried in the order their hit
+    statistics suggest, most frequent winner first.
+    """
+    tag: str
+    attrs: Dict[str, Union[str, bool]] = field(default_factory=dict)  # True means "attribute present"
+    class_pattern: Optional[str] = None
+    class_tokens: Optional[List[str]] = None
+    site: Optional[str] = None
+
+    STATS_FIELD = 'container'
+
+    def __post_init__(self):
+        self._class_re = re.compile(self.class_pattern) if self.class_pattern else None
+        self.stats = get_selector_stats(self.site) if self.site and self.class_tokens else None
+        if self.stats:
+            self.stats.register(self.STATS_FIELD, self.class_tokens)
+
+    def _tokens(self) -> List[str]:
+        return self.stats.order(self.STATS_FIELD) if self.stats else self.class_tokens
+
+    def _classes(self, attrs: dict) -> List[str]:
+        classes = attrs.get('class') or []
+        return classes.split() if isinstance(classes, str) else classes
+
+    def matches(self, name: str, attrs: dict) -> bool:
+        if name != self.tag:
+            return False
+        for key, expected in self.attrs.items():
+            value = attrs.get(key)
+            if value is None or (expected is not True and _attr_text(value) != expected):
+                return False
+        if self._class_re is not None:
+            classes = self._classes(attrs)
+            if not classes:
+                return False
+            if not (any(self._class_re.search(c) for c in classes) or self._class_re.search(" ".join(classes))):
+                return False
+        if self.class_tokens is not None and self.matched_token(attrs) is None:
+            return False
+        return True
+
+    def matched_token(self, attrs: dict) -> Optional[str]:
+        """The first class token, in current order, found in the element's classes"""
+        classes = " ".join(self._classes(attrs))
+        for token in self._tokens():
+            if token in classes:
+                return token
+        return None
+
+    def record_matches(self, elements: List[Tag]):
+        """Feed the class tokens that identified these containers into the hit statistics"""
+        if not self.stats or not elements:
+            return
+        order = self._tokens()
+        for element in elements:
+            token = self.matched_token(element.attrs)
+            self.stats.record({self.STATS_FIELD: (token, order[:order.index(token)])}, containers=0)
+
+
+def container_strainer(rules: List[ContainerRule]) -> SoupStrainer:
+    """SoupStrainer that only builds nodes inside elements matching any of the rules"""
+    def _match(name, attrs=None):
+        if isinstance(name, Tag):
+            name, attrs = name.name, name.attrs
+        return any(rule.matches(name, attrs or {}) for rule in rules)
+    return SoupStrainer(_match)
+
+
+def iter_containers(soup: BeautifulSoup, rules: List[ContainerRule]) -> Iterator[Tag]:
+    """Lazily yield containers for the first rule that matches anything, in one walk of the tree.
+
+    Equivalent to `soup.find_all(rule_1) or soup.find_all(rule_2) or ...` without
+    rescanning the document once per rule. Matches of the first rule are yielded as
+    the walk finds them, so a caller that stops early never walks the rest of the page;
+    lower-priority rules are buffered and only used if the first rule finds nothing.
+    """
+    first, fallbacks = rules[0], rules[1:]
+    buckets = [[] for _ in fallbacks]
+    first_matched = False
+    for element in soup.descendants:
+        if not isinstance(element, Tag):
+            continue
+        if first.matches(element.name, element.attrs):
+            first_matched = True
+            first.record_matches([element])
+            yield element
+        elif not first_matched:
+            for index, rule in enumerate(fallbacks):
+                if rule.matches(element.name, element.attrs):
+                    buckets[index].append(element)
+    if first_matched:
+        return
+    for rule, bucket in zip(fallbacks, buckets):
+        if bucket:
+            rule.record_matches(bucket)
+            yield from bucket
+            return
+
+
+def find_containers(soup: BeautifulSoup, rules: List[ContainerRule]) -> List[Tag]:
+    """All containers for the first rule that matches anything"""
+    return list(iter_containers(soup, rules))
+
+
+def _attr_text(value) -> str:
+    return " ".join(value) if isinstance(value, list) else value
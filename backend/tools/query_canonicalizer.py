@@ -0,0 +1,83 @@
+# tools/query_canonicalizer.py
+import re
+import unicodedata
+from functools import lru_cache
+
+# Filler words that don't change what the marketplaces return. Price qualifiers
+# ("under", "over", "between") are kept: they change the results. So are words that
+# can be part of a product name ("tank top", "in ear", "vitamin a", "tv show").
+STOPWORDS = frozenset({
+    'an', 'the', 'and', 'or', 'of', 'for', 'with', 'to', 'at', 'by',
+    'best', 'buy', 'online', 'me', 'my', 'find',
+})
+
+# Price bounds and their synonyms; they bind to the amount that follows
+PRICE_QUALIFIERS = {'under': 'under', 'below': 'under', 'upto': 'under', 'over': 'over', 'above': 'over'}
+
+# Amounts written with a currency, e.g. "rs. 60,000", "₹60k", "60000 rupees", "$1.2k"
+_AMOUNT = r'(\d{1,3}(?:,\d{2,3})+|\d+(?:\.\d+)?)(\s?k\b)?'
+_PRICE_BEFORE_RE = re.compile(r'(?<!\w)(₹|rs\.?|inr|\$|usd)\s*' + _AMOUNT)
+_PRICE_AFTER_RE = re.compile(r'(?<![\w.,])' + _AMOUNT + r'\s*(rupees?|rs|inr|dollars?|usd)\b')
+# Bare thousands separators: "60,000" -> "60000"
+_GROUPED_RE = re.compile(r'(?<![\w.,])\d{1,3}(?:,\d{2,3})+(?![\d,])')
+_DOLLAR = {'$', 'usd', 'dollar', 'dollars'}
+
+# Unit spellings -> canonical suffix, attached to the number ("16 GB" -> "16gb")
+UNITS = {
+    'gb': 'gb', 'gigabyte': 'gb', 'gigabytes': 'gb',
+    'tb': 'tb', 'terabyte': 'tb', 'terabytes': 'tb',
+    'mb': 'mb',
+    'inch': 'inch', 'inches': 'inch', '"': 'inch', "''": 'inch',
+    'hz': 'hz', 'ghz': 'ghz', 'mhz': 'mhz',
+    'mah': 'mah', 'w': 'w', 'watt': 'w', 'watts': 'w',
+    'kg': 'kg', 'kgs': 'kg', 'g': 'g', 'mm': 'mm', 'cm': 'cm', 'mp': 'mp',
+}
+_UNIT_RE = re.compile(
+    r'(?<![\w.])(\d+(?:\.\d+)?)\s*-?\s*(' + '|'.join(sorted((re.escape(u) for u in UNITS), key=len, reverse=True))
+    + r')(?![\w])')
+_PUNCT_RE = re.compile(r'[^\w\s₹$.+-]')
+# Stray dots and dashes; a run of "+" after a word is part of it ("c++", "iphone 15+")
+_STRAY_RE = re.compile(r'(?<!\d)\.|\.(?!\d)|(?<!\w)-+|(?<![\w+])\++|-+(?!\w)')
+
+
+def _price(currency: str, amount: str, thousands: str) -> str:
+    value = float(amount.replace(',', ''))
+    if thousands:
+        value *= 1000
+    symbol = '$' if currency.rstrip('.') in _DOLLAR else '₹'
+    return f" {symbol}{value:g} " if value != int(value) else f" {symbol}{int(value)} "
+
+
+@lru_cache(maxsize=4096)
+def normalize_query(query: str) -> str:
+    """Case-fold, normalize currencies and units, strip punctuation and collapse whitespace.
+
+    Word order and stopwords are kept, so the result is still a good marketplace query.
+    """
+    text = unicodedata.normalize('NFKC', query or '').casefold()
+    text = text.replace('”', '"').replace('″', '"')
+    text = _PRICE_BEFORE_RE.sub(lambda m: _price(m.group(1), m.group(2), m.group(3)), text)
+    text = _PRICE_AFTER_RE.sub(lambda m: _price(m.group(3), m.group(1), m.group(2)), text)
+    text = _GROUPED_RE.sub(lambda m: m.group(0).replace(',', ''), text)
+    text = _UNIT_RE.sub(lambda m: f"{m.group(1)}{UNITS[m.group(2)]}", text)
+    text = _PUNCT_RE.sub(' ', text)
+    text = _STRAY_RE.sub(' ', text)
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=4096)
+def canonical_query(query: str) -> str:
+    """Order-independent form of a query for cache keys: normalized, without stopwords, tokens sorted.
+
+    "Gaming Laptop", "gaming  laptop" and "laptop for gaming" all map to "gaming laptop".
+    Price qualifiers stay attached to their amount ("under ₹60000"), so sorting can't
+    swap the bounds of a price range.
+    """
+    tokens = []
+    for token in normalize_query(query).split():
+        token = PRICE_QUALIFIERS.get(token, token)
+        if tokens and tokens[-1] in PRICE_QUALIFIERS.values() and token[:1] in '₹$0123456789':
+            tokens[-1] += ' ' + token
+        elif token not in STOPWORDS:
+            tokens.append(token)
+    return ' '.join(sorted(set(tokens))) or normalize_query(query)
@@ -0,0 +1,128 @@
+# tools/rate_limiter.py
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from tools.scraper_config import env_float, env_host_map, env_int
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst` tokens.
+
+    Callers reserve a token up front and are told how long to wait for it, so the
+    bucket itself never sleeps and concurrent callers queue up in arrival order.
+    A caller that gives up while waiting refunds its token, so abandoned waits
+    don't leave debt on the bucket for everyone after them.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.delayed = 0
+        self.waited = 0.0
+        self.refunded = 0
+
+    def reserve(self) -> float:
+        """Take a token, returning how many seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            self.requests += 1
+            if self._tokens >= 0:
+                return 0.0
+            delay = -self._tokens / self.rate
+            self.delayed += 1
+            self.waited += delay
+            return delay
+
+    def refund(self):
+        """Give back a reserved token that will never be used"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate + 1)
+            self._updated = now
+            self.refunded += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "requests": self.requests,
+                "delayed": self.delayed,
+                "waited_seconds": round(self.waited, 3),
+                "refunded": self.refunded,
+            }
+
+
+class HostRateLimiter:
+    """Per-host request budgets shared by every scraper in the process"""
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None,
+                 host_rates: Optional[Dict[str, float]] = None, host_bursts: Optional[Dict[str, int]] = None):
+        self.rate = rate or env_float("SCRAPER_RATE_PER_SECOND", 0.5)
+        self.burst = burst or env_int("SCRAPER_RATE_BURST", 3)
+        self.host_rates = host_rates if host_rates is not None else env_host_map("SCRAPER_HOST_RATES", float)
+        self.host_bursts = host_bursts if host_bursts is not None else env_host_map("SCRAPER_HOST_BURSTS", int)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url_or_host: str) -> str:
+        host = urlsplit(url_or_host).hostname if "://" in url_or_host else url_or_host
+        return (host or url_or_host).lower()
+
+    def bucket(self, url_or_host: str) -> TokenBucket:
+        host = self._host(url_or_host)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.host_rates.get(host, self.rate), self.host_bursts.get(host, self.burst))
+                self._buckets[host] = bucket
+            return bucket
+
+    async def acquire(self, url_or_host: str) -> float:
+        """Wait without blocking the event loop until the host has budget for one request"""
+        bucket = self.bucket(url_or_host)
+        delay = bucket.reserve()
+        if delay:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Search deadline or abandoned stream: the request is never made
+                bucket.refund()
+                raise
+        return delay
+
+    def acquire_sync(self, url_or_host: str) -> float:
+        """Blocking variant of acquire() for worker threads"""
+        delay = self.bucket(url_or_host).reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            buckets = list(self._buckets.items())
+        return {host: bucket.snapshot() for host, bucket in buckets}
+
+
+_limiter: Optional[HostRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Process-wide per-host rate limiter"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = HostRateLimiter()
+        return _limiter
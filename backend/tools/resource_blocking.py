@@ -0,0 +1,163 @@
+# tools/resource_blocking.py
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+from tools.scraper_config import env_bool, env_host_map
+
+logger = logging.getLogger(__name__)
+
+# We only read text and src/href attributes, so none of these need to load
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'stylesheet', 'media'})
+
+# First-party hosts per site; requests to any other host are aborted in fast mode
+SITE_ALLOWED_HOSTS = {
+    'amazon': ('amazon.in', 'amazon.com', 'media-amazon.com', 'ssl-images-amazon.com'),
+    'flipkart': ('flipkart.com', 'flixcart.com'),
+}
+
+
+def fast_mode_enabled(fast: Optional[bool] = None) -> bool:
+    """Whether Playwright scrapes should block heavy and third-party requests"""
+    return env_bool("SCRAPER_BROWSER_FAST_MODE", True) if fast is None else fast
+
+
+def allowed_hosts(site: str) -> Tuple[str, ...]:
+    """Site allowlist, extended by SCRAPER_BROWSER_ALLOWED_HOSTS ('flipkart=cdn.example.com|x.com')"""
+    extra = env_host_map("SCRAPER_BROWSER_ALLOWED_HOSTS", lambda value: tuple(value.split('|')))
+    return SITE_ALLOWED_HOSTS.get(site, ()) + extra.get(site, ())
+
+
+def _host_allowed(host: str, hosts: Iterable[str]) -> bool:
+    return any(host == allowed or host.endswith('.' + allowed) for allowed in hosts)
+
+
+def should_block(site: str, resource_type: str, url: str, hosts: Optional[Iterable[str]] = None) -> bool:
+    """True when fast mode should abort this request"""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = (urlsplit(url).hostname or '').lower()
+    if not host:  # data: and blob: URLs never leave the browser
+        return False
+    return not _host_allowed(host, allowed_hosts(site) if hosts is None else hosts)
+
+
+class PageTraffic:
+    """Requests, bytes and page-ready latency for one Playwright scrape"""
+
+    def __init__(self, site: str, fast: bool):
+        self.site = site
+        self.fast = fast
+        self.hosts = allowed_hosts(site)
+        self.requests = 0
+        self.blocked: Dict[str, int] = {}
+        self.bytes_received = 0
+        self.ready_seconds: Optional[float] = None
+        self._started = time.monotonic()
+        self._pending = set()
+
+    async def route(self, route):
+        request = route.request
+        if should_block(self.site, request.resource_type, request.url, self.hosts):
+            self.blocked[request.resource_type] = self.blocked.get(request.resource_type, 0) + 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def on_request_finished(self, request):
+        self.requests += 1
+        task = asyncio.ensure_future(self._add_sizes(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _add_sizes(self, request):
+        try:
+            sizes = await request.sizes()
+            self.bytes_received += sizes.get('responseBodySize', 0) + sizes.get('responseHeadersSize', 0)
+        except Exception as e:
+            logger.debug(f"Could not read request sizes: {e}")
+
+    def mark_ready(self):
+        """Call once the result containers are on the page"""
+        self.ready_seconds = time.monotonic() - self._started
+
+    async def settle(self):
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+
+@asynccontextmanager
+async def page_traffic(page, site: str, fast: Optional[bool] = None):
+    """Measure a scrape on a pooled page, blocking heavy requests in fast mode.
+
+    Routes and listeners are removed on exit, so the page goes back to the pool clean.
+    """
+    traffic = PageTraffic(site, fast_mode_enabled(fast))
+    page.on("requestfinished", traffic.on_request_finished)
+    if traffic.fast:
+        await page.route("**/*", traffic.route)
+    try:
+        yield traffic
+    finally:
+        if traffic.fast:
+            await page.unroute("**/*", traffic.route)
+        page.remove_listener("requestfinished", traffic.on_request_finished)
+        await traffic.settle()
+        get_resource_report().record(traffic)
+
+
+class ResourceReport:
+    """Per site and mode averages, and what fast mode saves against full page loads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record(self, traffic: PageTraffic):
+        key = (traffic.site, "fast" if traffic.fast else "full")
+        with self._lock:
+            totals = self._totals.setdefault(key, {"scrapes": 0, "requests": 0, "blocked": 0, "bytes": 0,
+                                                   "ready_seconds": 0.0, "ready_samples": 0})
+            totals["scrapes"] += 1
+            totals["requests"] += traffic.requests
+            totals["blocked"] += sum(traffic.blocked.values())
+            totals["bytes"] += traffic.bytes_received
+            if traffic.ready_seconds is not None:
+                totals["ready_seconds"] += traffic.ready_seconds
+                totals["ready_samples"] += 1
+        logger.info(f"{traffic.site} {key[1]} scrape: {traffic.requests} requests, "
+                    f"{traffic.bytes_received / 1024:.0f} KB, blocked {traffic.blocked}, ready {traffic.ready_seconds}")
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            totals = {key: dict(value) for key, value in self._totals.items()}
+        report: Dict[str, Dict] = {}
+        for (site, mode), t in totals.items():
+            report.setdefault(site, {})[mode] = {
+                "scrapes": t["scrapes"],
+                "avg_requests": round(t["requests"] / t["scrapes"], 1),
+                "avg_blocked": round(t["blocked"] / t["scrapes"], 1),
+                "avg_kb": round(t["bytes"] / t["scrapes"] / 1024, 1),
+                "avg_ready_ms": round(t["ready_seconds"] / t["ready_samples"] * 1000) if t["ready_samples"] else None,
+            }
+        for modes in report.values():
+            fast, full = modes.get("fast"), modes.get("full")
+            if fast and full:
+                modes["savings_per_search"] = {
+                    "kb": round(full["avg_kb"] - fast["avg_kb"], 1),
+                    "ready_ms": (full["avg_ready_ms"] - fast["avg_ready_ms"])
+                    if full["avg_ready_ms"] is not None and fast["avg_ready_ms"] is not None else None,
+                }
+        return report
+
+
+_report = ResourceReport()
+
+
+def get_resource_report() -> ResourceReport:
+    """Process-wide resource blocking report"""
+    return _report
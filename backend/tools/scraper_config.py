@@ -0,0 +1,57 @@
+# tools/scraper_config.py
+import os
+import logging
+from typing import Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def env_str(name: str, default: str) -> str:
+    """Read a string setting from the environment"""
+    value = os.getenv(name)
+    return default if value is None or value.strip() == "" else value.strip()
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    return _env_value(name, default, int)
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    return _env_value(name, default, float)
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment"""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_host_map(name: str, cast: Callable[[str], T]) -> Dict[str, T]:
+    """Read per-host overrides like 'www.amazon.in=4,www.flipkart.com=6'"""
+    overrides = {}
+    for item in (os.getenv(name) or "").split(","):
+        if "=" not in item:
+            continue
+        host, value = item.split("=", 1)
+        try:
+            overrides[host.strip().lower()] = cast(value.strip())
+        except ValueError:
+            logger.warning(f"Ignoring invalid {name} entry: {item}")
+    return overrides
+
+
+def _env_value(name: str, default: T, cast: Callable[[str], T]) -> T:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={value!r}, using {default}")
+        return default
@@ -0,0 +1,85 @@
+# tools/scraper_loop.py
+import asyncio
+import functools
+import threading
+import logging
+from typing import Any, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Process-wide event loop that owns every long-lived scraping resource (pooled
+# HTTP clients, browsers). Those objects are bound to the loop that created them,
+# while callers arrive from FastAPI's loop, asyncio.run() inside CrewAI tools and
+# plain worker threads, so all of them hand their coroutines to this one loop.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def get_scraper_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared scraper loop, starting its thread on first use"""
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            _thread = threading.Thread(target=_run, name="scraper-loop", daemon=True)
+            _thread.start()
+            ready.wait()
+            _loop = loop
+            logger.info("Started shared scraper event loop")
+        return _loop
+
+
+def in_scraper_loop() -> bool:
+    """True when called from a coroutine running on the scraper loop"""
+    try:
+        return asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        return False
+
+
+async def run_on_scraper_loop(coro: Awaitable[Any]) -> Any:
+    """Await a coroutine on the scraper loop from any event loop"""
+    loop = get_scraper_loop()
+    if in_scraper_loop():
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def on_scraper_loop(method):
+    """Run a coroutine method on the shared scraper loop, whichever loop awaits it"""
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await run_on_scraper_loop(method(self, *args, **kwargs))
+    return wrapper
+
+
+def run_sync(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the scraper loop and block the calling thread for its result"""
+    loop = get_scraper_loop()
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run_sync() would deadlock when called from the scraper loop itself")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+def stop_scraper_loop():
+    """Stop the shared loop; resources on it should already be closed"""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop, _thread = None, None
+    if loop is None:
+        return
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None and thread is not threading.current_thread():
+        thread.join(timeout=5)
+    loop.close()
+    logger.info("Stopped shared scraper event loop")
@@ -0,0 +1,131 @@
+# tools/selector_stats.py
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from tools.scraper_config import env_int
+
+
+class SelectorStats:
+    """Hit/miss counters per (field, selector) for one marketplace, driving adaptive selector order.
+
+    A hit means the selector supplied the field's value; a miss means it was tried
+    and found no element at all. An element with an unusable value (e.g. an empty
+    title on one card) is not a miss, since the layout still has it. Every
+    `reorder_every` containers each field's selectors are re-ranked: one that
+    recently missed more often than it hit moves behind the rest, otherwise the
+    hand-written priority holds. A generic fallback therefore only moves up while
+    the selectors above it are missing from the page. Every `probe_every`-th
+    container is extracted in the default order, and a demoted selector that wins
+    there is restored at once. Recent counts decay on every re-rank so a layout
+    change shows up within a few pages.
+    """
+
+    def __init__(self, site: str, reorder_every: Optional[int] = None, probe_every: Optional[int] = None):
+        self.site = site
+        self.reorder_every = reorder_every or env_int("SCRAPER_SELECTOR_REORDER_EVERY", 25)
+        self.probe_every = probe_every or env_int("SCRAPER_SELECTOR_PROBE_EVERY", 10)
+        self._lock = threading.Lock()
+        self._defaults: Dict[str, List[str]] = {}
+        self._orders: Dict[str, List[str]] = {}
+        self._hits: Dict[Tuple[str, str], int] = {}
+        self._misses: Dict[Tuple[str, str], int] = {}
+        self._recent: Dict[Tuple[str, str], float] = {}
+        self._recent_misses: Dict[Tuple[str, str], float] = {}
+        self._last_hit: Dict[Tuple[str, str], float] = {}
+        self._containers = 0
+        self._since_reorder = 0
+
+    def register(self, field: str, selectors: List[str]):
+        """Declare a field's selectors in their default order"""
+        with self._lock:
+            if field not in self._defaults:
+                self._defaults[field] = list(selectors)
+                self._orders[field] = list(selectors)
+
+    def order(self, field: str) -> List[str]:
+        """Current selector order for a field; the default order on probe containers"""
+        with self._lock:
+            if self._containers % self.probe_every == self.probe_every - 1:
+                return self._defaults[field]
+            return self._orders[field]
+
+    def record(self, outcomes: Dict[str, Tuple[Optional[str], List[str]]], containers: int = 1):
+        """Record one container: field -> (winning selector or None, selectors that found no element)"""
+        now = time.time()
+        with self._lock:
+            self._containers += containers
+            self._since_reorder += containers
+            for field, (winner, missed) in outcomes.items():
+                for css in missed:
+                    self._misses[(field, css)] = self._misses.get((field, css), 0) + 1
+                    self._recent_misses[(field, css)] = self._recent_misses.get((field, css), 0.0) + 1.0
+                if winner is not None:
+                    key = (field, winner)
+                    demoted = self._demoted(key)
+                    self._hits[key] = self._hits.get(key, 0) + 1
+                    self._recent[key] = self._recent.get(key, 0.0) + 1.0
+                    self._last_hit[key] = now
+                    if demoted:
+                        # Back on the page (seen on a probe): restore its place now, not at the next re-rank
+                        self._recent_misses[key] = 0.0
+                        self._rank(field)
+            if self._since_reorder >= self.reorder_every:
+                self._reorder()
+
+    def _demoted(self, key: Tuple[str, str]) -> bool:
+        return self._recent_misses.get(key, 0.0) > self._recent.get(key, 0.0)
+
+    def _rank(self, field: str):
+        # Selectors that currently miss more than they hit go last; otherwise keep the hand-written priority
+        defaults = self._defaults[field]
+        self._orders[field] = sorted(defaults, key=lambda css: (self._demoted((field, css)), defaults.index(css)))
+
+    def _reorder(self):
+        self._since_reorder = 0
+        for field in self._defaults:
+            self._rank(field)
+        for recent in (self._recent, self._recent_misses):
+            for key in recent:
+                recent[key] *= 0.5
+
+    def snapshot(self) -> Dict:
+        """Counters and current order for every field"""
+        with self._lock:
+            fields = {}
+            for field, defaults in self._defaults.items():
+                order = self._orders[field]
+                selectors = []
+                for css in order:
+                    hits = self._hits.get((field, css), 0)
+                    misses = self._misses.get((field, css), 0)
+                    selectors.append({
+                        "selector": css,
+                        "position": order.index(css),
+                        "default_position": defaults.index(css),
+                        "hits": hits,
+                        "misses": misses,
+                        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+                        "last_hit": self._last_hit.get((field, css)),
+                    })
+                fields[field] = selectors
+            return {"containers": self._containers, "fields": fields}
+
+
+_stats: Dict[str, SelectorStats] = {}
+_stats_lock = threading.Lock()
+
+
+def get_selector_stats(site: str) -> SelectorStats:
+    """Process-wide selector statistics for a marketplace"""
+    with _stats_lock:
+        if site not in _stats:
+            _stats[site] = SelectorStats(site)
+        return _stats[site]
+
+
+def selector_stats_snapshot() -> Dict[str, Dict]:
+    """Selector statistics for every marketplace, for the introspection endpoint"""
+    with _stats_lock:
+        sites = list(_stats.items())
+    return {site: stats.snapshot() for site, stats in sites}
@@ -0,0 +1,156 @@
+# tools/single_flight.py
+import asyncio
+import concurrent.futures
+import copy
+import functools
+import queue
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from tools.scraper_loop import get_scraper_loop, in_scraper_loop
+
+_END = object()
+
+
+class _Broadcast:
+    """Items of one in-flight stream, replayed to late subscribers"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items: List[Any] = []
+        self.subscribers: List[Callable[[Any], None]] = []
+        self.future: Optional[concurrent.futures.Future] = None
+
+    def publish(self, item):
+        with self.lock:
+            self.items.append(item)
+            for deliver in self.subscribers:
+                deliver(item)
+
+    def finish(self, _future=None):
+        with self.lock:
+            subscribers, self.subscribers = self.subscribers, []
+            for deliver in subscribers:
+                deliver(_END)
+
+
+class SingleFlight:
+    """Share one in-progress call among concurrent callers with the same key.
+
+    The first caller for a key starts the call on the shared scraper loop; callers
+    arriving before it finishes wait for the same future instead of scraping again.
+    Calls run detached from any caller, so one caller timing out or being cancelled
+    doesn't fail the others. Followers get deep copies, so no caller can mutate
+    another's results.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Any] = {}
+        self.stats = {"calls": 0, "executed": 0, "coalesced": 0, "errors": 0}
+
+    def _join(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Tuple[concurrent.futures.Future, bool]:
+        with self._lock:
+            self.stats["calls"] += 1
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, False
+            future = asyncio.run_coroutine_threadsafe(call(), get_scraper_loop())
+            self._calls[key] = future
+            self.stats["executed"] += 1
+        future.add_done_callback(functools.partial(self._finished, key))
+        return future, True
+
+    def _finished(self, key: Hashable, future: concurrent.futures.Future):
+        with self._lock:
+            if self._calls.get(key) is future or getattr(self._calls.get(key), "future", None) is future:
+                del self._calls[key]
+            if not future.cancelled() and future.exception() is not None:
+                self.stats["errors"] += 1
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `call()`, or the identical call already in flight, from any event loop"""
+        future, leader = self._join(key, call)
+        result = await asyncio.shield(asyncio.wrap_future(future))
+        return result if leader else copy.deepcopy(result)
+
+    def run_sync(self, key: Hashable, call: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Blocking variant of run() for worker threads"""
+        if in_scraper_loop():
+            raise RuntimeError("SingleFlight.run_sync() would deadlock when called from the scraper loop")
+        future, leader = self._join(key, call)
+        result = future.result(timeout)
+        return result if leader else copy.deepcopy(result)
+
+    def stream_sync(self, key: Hashable, call: Callable[[Callable[[Any], None]], Awaitable[Any]]) -> Iterator[Any]:
+        """Iterate the items `call(on_item)` emits, sharing one in-flight stream per key.
+
+        Late subscribers first get the items emitted so far. The stream is cancelled
+        once every subscriber has stopped iterating.
+        """
+        items: queue.Queue = queue.Queue()
+        with self._lock:
+            self.stats["calls"] += 1
+            broadcast = self._calls.get(key)
+            leader = broadcast is None
+            if leader:
+                broadcast = _Broadcast()
+                self.stats["executed"] += 1
+            else:
+                self.stats["coalesced"] += 1
+            deliver = items.put if leader else (lambda item: items.put(item if item is _END else copy.deepcopy(item)))
+            with broadcast.lock:
+                for item in broadcast.items:
+                    deliver(item)
+                broadcast.subscribers.append(deliver)
+            if leader:
+                # Followers only find the broadcast once it has a future to await or cancel
+                broadcast.future = asyncio.run_coroutine_threadsafe(call(broadcast.publish), get_scraper_loop())
+                self._calls[key] = broadcast
+        if leader:
+            broadcast.future.add_done_callback(broadcast.finish)
+            broadcast.future.add_done_callback(functools.partial(self._finished, key))
+        try:
+            while True:
+                item = items.get()
+                if item is _END:
+                    break
+                yield item
+        finally:
+            self._unsubscribe(key, broadcast, deliver)
+
+    def _unsubscribe(self, key: Hashable, broadcast: _Broadcast, deliver: Callable[[Any], None]):
+        with self._lock, broadcast.lock:
+            if deliver in broadcast.subscribers:
+                broadcast.subscribers.remove(deliver)
+            abandoned = not broadcast.subscribers and broadcast.future is not None and not broadcast.future.done()
+            if abandoned and self._calls.get(key) is broadcast:
+                # Nobody is listening; new callers start a fresh scrape
+                del self._calls[key]
+        if abandoned:
+            broadcast.future.cancel()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._calls)}
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Process-wide single-flight group for one kind of scrape"""
+    with _flights_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight(name)
+        return _flights[name]
+
+
+def single_flight_snapshot() -> Dict[str, Dict[str, int]]:
+    """Calls, executed scrapes and coalesced callers per group"""
+    with _flights_lock:
+        flights = list(_flights.values())
+    return {flight.name: flight.snapshot() for flight in flights}
@@ -1,10 +1,104 @@
 # tools/web_scraper.py
 import asyncio
 import json
-from playwright.async_api import async_playwright
-
-
-async def scrape_amazon(page, product_keyword: str, num_results: int):
+from contextvars import ContextVar
+from urllib.parse import quote_plus
+
+from tools.browser_pool import get_browser_pool
+from tools.circuit_breaker import get_source_guard, looks_blocked
+from tools.query_canonicalizer import normalize_query
+from tools.resource_blocking import page_traffic
+from tools.scraper_loop import run_sync
+
+# Browser-side extraction: each script runs once per page over all result elements
+# and returns plain field values, mirroring the per-element locator reads it replaces.
+AMAZON_EXTRACT_JS = """
+(results, limit) => results.slice(0, limit).map(result => {
+    const first = selector => result.querySelector(selector);
+    const text = selector => { const el = first(selector); return el ? el.innerText : null; };
+    const attr = (selector, name) => { const el = first(selector); return el ? el.getAttribute(name) : null; };
+    return {
+        name: text("h2 a span"),
+        link: attr("h2 a", "href"),
+        price_whole: text(".a-price-whole"),
+        price_fraction: text(".a-price-fraction"),
+        offscreen_price: text(".a-offscreen"),
+        image_url: attr(".s-image", "src"),
+    };
+})
+"""
+
+FLIPKART_EXTRACT_JS = """
+(results, limit) => results.slice(0, limit).map(result => {
+    const name = result.querySelector("a.s1Q9rs, a.IRpwTa");
+    const price = result.querySelector("div._30jeq3");
+    const image = result.querySelector("img._396cs4, img._2r_T1I");
+    return {
+        name: name ? name.innerText : null,
+        link: name ? name.getAttribute("href") : null,
+        price: price ? price.innerText : null,
+        image_url: image ? image.getAttribute("src") : null,
+    };
+})
+"""
+
+
+def _to_float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def amazon_product(raw: dict) -> dict:
+    """Build an Amazon product from the fields AMAZON_EXTRACT_JS read"""
+    link = raw.get("link")
+    if link and not link.startswith("http"):
+        link = "https://www.amazon.in" + link
+    link = link or "N/A"
+
+    if raw.get("price_whole") is not None and raw.get("price_fraction") is not None:
+        price = _to_float(raw["price_whole"].replace(",", "") + raw["price_fraction"])
+    elif raw.get("offscreen_price") is not None:
+        price = _to_float(raw["offscreen_price"].replace("$", "").replace(",", ""))
+    else:
+        price = None
+
+    return {
+        "name": raw.get("name") if raw.get("name") is not None else "N/A",
+        "image_url": raw.get("image_url") or "N/A",
+        "current_price": price,
+        "summary": "Summary to be generated by AI agent.",
+        "key_specifications": {"placeholder_spec": "Details to be determined by AI"},
+        "product_url": link,
+        "source": "Amazon"
+    }
+
+
+def flipkart_product(raw: dict) -> dict:
+    """Build a Flipkart product from the fields FLIPKART_EXTRACT_JS read"""
+    link = raw.get("link")
+    if link and not link.startswith("http"):
+        link = "https://www.flipkart.com" + link
+    link = link or "N/A"
+
+    price = None
+    if raw.get("price") is not None:
+        price = _to_float(raw["price"].replace("₹", "").replace(",", ""))
+
+    return {
+        "name": raw.get("name") if raw.get("name") is not None else "N/A",
+        "image_url": raw.get("image_url") or "N/A",
+        "current_price": price,
+        "summary": "Summary to be generated by AI agent.",
+        "key_specifications": {"placeholder_spec": "Details to be determined by AI"},
+        "product_url": link,
+        "source": "Flipkart"
+    }
+
+
+
+async def scrape_amazon(page, product_keyword: str, num_results: int, fast: bool = None):
     """
     Scrape product data from Amazon India.
 
@@ -12,64 +106,25 @@ async def scrape_amazon(page, product_keyword: str, num_results: int):
         page: Playwright page instance
         product_keyword: Search term
         num_results: Number of products to return
+        fast: Block images, fonts, stylesheets, media and third-party hosts (default from config)
 
     Returns:
         List of product dicts with keys: name, image_url, current_price, summary, key_specifications, product_url, source
     """
     products_data = []
-    search_url = f"https://www.amazon.in/s?k={product_keyword.replace(' ', '+')}"
-    await page.goto(search_url, wait_until="domcontentloaded")
-    await page.wait_for_selector('[data-component-type="s-search-result"]', timeout=15000)
+    search_url = f"https://www.amazon.in/s?k={quote_plus(normalize_query(product_keyword))}"
+    async with page_traffic(page, "amazon", fast) as traffic:
+        await _open_search_page(page, search_url)
+        await page.wait_for_selector('[data-component-type="s-search-result"]', timeout=15000)
+        traffic.mark_ready()
 
-    results = await page.locator('[data-component-type="s-search-result"]').all()
-    results_to_process = results[:num_results] if results else []
+    # One round-trip reads every field of every result
+    raw_results = await page.locator('[data-component-type="s-search-result"]').evaluate_all(
+        AMAZON_EXTRACT_JS, num_results)
 
-    for result in results_to_process:
+    for raw in raw_results:
         try:
-            # Name
-            name_element = result.locator("h2 a span").first
-            name = await name_element.inner_text() if await name_element.count() > 0 else "N/A"
-
-            # URL
-            link_element = result.locator("h2 a").first
-            link = await link_element.get_attribute("href") if await link_element.count() > 0 else "N/A"
-            if link and not link.startswith("http"):
-                link = "https://www.amazon.in" + link
-
-            # Price
-            price = None
-            price_whole = result.locator(".a-price-whole").first
-            price_fraction = result.locator(".a-price-fraction").first
-            if await price_whole.count() > 0 and await price_fraction.count() > 0:
-                price_str = (await price_whole.inner_text()).replace(",", "") + await price_fraction.inner_text()
-                try:
-                    price = float(price_str)
-                except ValueError:
-                    price = None
-            else:
-                offscreen_price = result.locator(".a-offscreen").first
-                if await offscreen_price.count() > 0:
-                    offscreen_price_str = (await offscreen_price.inner_text()).replace("$", "").replace(",", "")
-                    try:
-                        price = float(offscreen_price_str)
-                    except ValueError:
-                        price = None
-
-            # Image
-            image_element = result.locator(".s-image").first
-            image_url = await image_element.get_attribute("src") if await image_element.count() > 0 else "N/A"
-
-            # Append
-            products_data.append({
-                "name": name,
-                "image_url": image_url,
-                "current_price": price,
-                "summary": "Summary to be generated by AI agent.",
-                "key_specifications": {"placeholder_spec": "Details to be determined by AI"},
-                "product_url": link,
-                "source": "Amazon"
-            })
-
+            products_data.append(amazon_product(raw))
         except Exception as e:
             print(f"⚠️ Amazon scraping error: {e}")
             continue
@@ -77,7 +132,7 @@ async def scrape_amazon(page, product_keyword: str, num_results: int):
     return products_data
 
 
-async def scrape_flipkart(page, product_keyword: str, num_results: int):
+async def scrape_flipkart(page, product_keyword: str, num_results: int, fast: bool = None):
     """
     Scrape product data from Flipkart.
 
@@ -85,52 +140,24 @@ async def scrape_flipkart(page, product_keyword: str, num_results: int):
         page: Playwright page instance
         product_keyword: Search term
         num_results: Number of products to return
+        fast: Block images, fonts, stylesheets, media and third-party hosts (default from config)
 
     Returns:
         List of product dicts similar to Amazon scraper
     """
     products_data = []
-    search_url = f"https://www.flipkart.com/search?q={product_keyword.replace(' ', '+')}"
-    await page.goto(search_url, wait_until="domcontentloaded")
-    await page.wait_for_selector("div._1AtVbE", timeout=15000)
+    search_url = f"https://www.flipkart.com/search?q={quote_plus(normalize_query(product_keyword))}"
+    async with page_traffic(page, "flipkart", fast) as traffic:
+        await _open_search_page(page, search_url)
+        await page.wait_for_selector("div._1AtVbE", timeout=15000)
+        traffic.mark_ready()
 
-    results = await page.locator("div._1AtVbE").all()
-    results_to_process = results[:num_results] if results else []
+    # One round-trip reads every field of every result
+    raw_results = await page.locator("div._1AtVbE").evaluate_all(FLIPKART_EXTRACT_JS, num_results)
 
-    for result in results_to_process:
+    for raw in raw_results:
         try:
-            # Name & URL
-            name_element = result.locator("a.s1Q9rs, a.IRpwTa").first
-            name = await name_element.inner_text() if await name_element.count() > 0 else "N/A"
-            link = await name_element.get_attribute("href") if await name_element.count() > 0 else "N/A"
-            if link and not link.startswith("http"):
-                link = "https://www.flipkart.com" + link
-
-            # Price
-            price = None
-            price_element = result.locator("div._30jeq3").first
-            if await price_element.count() > 0:
-                price_str = (await price_element.inner_text()).replace("₹", "").replace(",", "")
-                try:
-                    price = float(price_str)
-                except ValueError:
-                    price = None
-
-            # Image
-            image_element = result.locator("img._396cs4, img._2r_T1I").first
-            image_url = await image_element.get_attribute("src") if await image_element.count() > 0 else "N/A"
-
-            # Append
-            products_data.append({
-                "name": name,
-                "image_url": image_url,
-                "current_price": price,
-                "summary": "Summary to be generated by AI agent.",
-                "key_specifications": {"placeholder_spec": "Details to be determined by AI"},
-                "product_url": link,
-                "source": "Flipkart"
-            })
-
+            products_data.append(flipkart_product(raw))
         except Exception as e:
             print(f"⚠️ Flipkart scraping error: {e}")
             continue
@@ -138,9 +165,63 @@ async def scrape_flipkart(page, product_keyword: str, num_results: int):
     return products_data
 
 
-def scrape_ecommerce_site(product_keyword: str, num_results: int = 5, source: str = "both", tracker=None, session_id=None):
+SITE_SCRAPERS = {
+    "amazon": scrape_amazon,
+    "flipkart": scrape_flipkart,
+}
+
+
+# Breaker of the marketplace being scraped, for _open_search_page to report to
+_page_breaker: ContextVar = ContextVar("page_breaker", default=None)
+
+
+async def _open_search_page(page, url: str):
+    """Navigate to a results page, reporting how the marketplace answered to its breaker.
+
+    Navigation errors and blocked responses count as failures and only a 200 as a
+    success; anything that goes wrong afterwards (a stale selector timing out) is
+    our problem, not the site blocking us.
+    """
+    breaker = _page_breaker.get()
+    try:
+        response = await page.goto(url, wait_until="domcontentloaded")
+    except Exception as e:
+        if breaker is not None:
+            breaker.record_failure(f"{type(e).__name__}: {e}")
+        raise
+    if breaker is not None and response is not None:
+        try:
+            body = await response.body()
+        except Exception:
+            body = b""
+        if looks_blocked(response.status, body):
+            breaker.record_failure(f"HTTP {response.status}" + (" bot check" if response.status == 200 else ""))
+        elif response.status == 200:
+            breaker.record_success()
+    return response
+
+
+async def _guarded_scrape(page, scrape, breaker, *args):
+    """Run a site scraper whose page navigation reports to the site's breaker.
+
+    A browser that can't start never gets this far, and extraction errors after the
+    page loaded don't count against the marketplace.
     """
-    Scrape products from Amazon, Flipkart, or both with progress tracking.
+    token = _page_breaker.set(breaker)
+    try:
+        return await scrape(page, *args)
+    finally:
+        _page_breaker.reset(token)
+
+
+async def scrape_ecommerce_site_async(product_keyword: str, num_results: int = 5, source: str = "both",
+                                      tracker=None, session_id=None):
+    """
+    Scrape products from Amazon, Flipkart, or both (in parallel) with progress tracking.
+
+    Safe to await from any event loop (FastAPI handlers and background tasks,
+    EnhancedDataSources); the browser work runs on the shared scraper loop and the
+    blocking tracker calls run in worker threads.
 
     Args:
         product_keyword: Search keyword
@@ -152,58 +233,56 @@ def scrape_ecommerce_site(product_keyword: str, num_results: int = 5, source: st
     Returns:
         List of product dicts
     """
-    async def _scrape_async():
-        products_data = []
-
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-
-            if source.lower() == "amazon":
-                if tracker and session_id:
-                    tracker.update_status(session_id, "scraping_amazon", "amazon")
-                products_data = await scrape_amazon(page, product_keyword, num_results)
-                if tracker and session_id:
-                    tracker.store_products(session_id, products_data, "amazon")
-                    tracker.update_product_count(session_id, amazon_count=len(products_data))
-                    
-            elif source.lower() == "flipkart":
-                if tracker and session_id:
-                    tracker.update_status(session_id, "scraping_flipkart", "flipkart")
-                products_data = await scrape_flipkart(page, product_keyword, num_results)
-                if tracker and session_id:
-                    tracker.store_products(session_id, products_data, "flipkart")
-                    tracker.update_product_count(session_id, flipkart_count=len(products_data))
-                    
-            elif source.lower() == "both":
-                # Scrape Amazon first
-                if tracker and session_id:
-                    tracker.update_status(session_id, "scraping_amazon", "amazon")
-                amazon_results = await scrape_amazon(page, product_keyword, num_results)
-                if tracker and session_id:
-                    tracker.store_products(session_id, amazon_results, "amazon")
-                
-                # Scrape Flipkart second
-                if tracker and session_id:
-                    tracker.update_status(session_id, "scraping_flipkart", "flipkart")
-                flipkart_results = await scrape_flipkart(page, product_keyword, num_results)
-                if tracker and session_id:
-                    tracker.store_products(session_id, flipkart_results, "flipkart")
-                    tracker.update_product_count(session_id, amazon_count=len(amazon_results), flipkart_count=len(flipkart_results))
-                
-                products_data = amazon_results + flipkart_results
+    sites = ["amazon", "flipkart"] if source.lower() == "both" else [source.lower()]
+    if any(site not in SITE_SCRAPERS for site in sites):
+        raise ValueError("Invalid source. Choose 'amazon', 'flipkart', or 'both'.")
+    tracking = tracker is not None and bool(session_id)
+
+    async def _scrape_site(site):
+        # Each marketplace gets its own pooled page; the pool caps pages per browser
+        breaker = get_source_guard().breaker(site)
+        try:
+            if not breaker.allow():
+                print(f"⏭️ {site.capitalize()} circuit is open, skipping browser scrape")
+                results = []
             else:
-                raise ValueError("Invalid source. Choose 'amazon', 'flipkart', or 'both'.")
+                results = await get_browser_pool().run(_guarded_scrape, SITE_SCRAPERS[site], breaker,
+                                                       product_keyword, num_results)
+        except Exception as e:
+            print(f"⚠️ {site.capitalize()} browser scrape failed: {e}")
+            results = []
+        if tracking:
+            await asyncio.to_thread(tracker.store_products, session_id, results, site)
+        return results
+
+    if tracking:
+        await asyncio.to_thread(tracker.mark_sources_in_flight, session_id, sites)
+
+    site_results = await asyncio.gather(*(_scrape_site(site) for site in sites))
+    counts = {f"{site}_count": len(results) for site, results in zip(sites, site_results)}
+    products_data = [product for results in site_results for product in results]
 
-            await browser.close()
-            
-            # Mark as processing if we have a tracker
-            if tracker and session_id:
-                tracker.update_status(session_id, "processing", "processing")
-                
-        return products_data
+    # Mark as processing if we have a tracker
+    if tracking:
+        await asyncio.to_thread(tracker.update_product_count, session_id, **counts)
+        await asyncio.to_thread(tracker.update_status, session_id, "processing", "processing")
 
-    return asyncio.run(_scrape_async())
+    return products_data
+
+
+def scrape_ecommerce_site(product_keyword: str, num_results: int = 5, source: str = "both", tracker=None, session_id=None):
+    """
+    Blocking wrapper around scrape_ecommerce_site_async() for threads and scripts.
+
+    Coroutines must await scrape_ecommerce_site_async() instead; blocking here would
+    stall their event loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return run_sync(scrape_ecommerce_site_async(product_keyword, num_results, source, tracker, session_id))
+    raise RuntimeError("scrape_ecommerce_site() called from a running event loop; "
+                       "await scrape_ecommerce_site_async() instead")
 
 
 # --- Test Scraper ---
@@ -21,7 +21,7 @@ const ScrapingProgressIndicator = ({ sessionId, onComplete }) => {
           }
           
           // If still processing, continue polling
-          if (['initiated', 'scraping_amazon', 'scraping_flipkart', 'processing'].includes(data.status)) {
+          if (['initiated', 'scraping_amazon', 'scraping_flipkart', 'scraping_both', 'processing'].includes(data.status)) {
             setTimeout(fetchStatus, 2000); // Poll every 2 seconds
           }
         }
@@ -56,6 +56,8 @@ const ScrapingProgressIndicator = ({ sessionId, onComplete }) => {
         return 'Scraping Amazon products...';
       case 'scraping_flipkart':
         return 'Scraping Flipkart products...';
+      case 'scraping_both':
+        return 'Scraping Amazon and Flipkart products...';
       case 'processing':
         return 'Processing and analyzing results...';
       case 'completed':
@@ -72,6 +74,7 @@ const ScrapingProgressIndicator = ({ sessionId, onComplete }) => {
       case 'initiated': return 10;
       case 'scraping_amazon': return 30;
       case 'scraping_flipkart': return 60;
+      case 'scraping_both': return 45;
       case 'processing': return 85;
       case 'completed': return 100;
       case 'failed': return 0;
@@ -95,6 +98,13 @@ const ScrapingProgressIndicator = ({ sessionId, onComplete }) => {
             <span className="text-sm text-blue-600 font-medium">Flipkart</span>
           </div>
         );
+      case 'amazon,flipkart':
+        return (
+          <div className="flex items-center space-x-3">
+            {getSourceIcon('amazon')}
+            {getSourceIcon('flipkart')}
+          </div>
+        );
       case 'processing':
         return (
           <div className="flex items-center space-x-1">